@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+# Make the repository root importable so the shared scripts package can be used
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The same hash names the columnar store files, so cache keys and store paths agree
+from scripts.store import content_hash
+
+
+def nbytes(value):
+    """
+    Memory footprint of a cached value in bytes: DataFrames and Series including
+    object column contents, anything else by its nbytes attribute
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    return int(getattr(value, 'nbytes', 0))
+
+
+class DataCache:
+    """
+    Bounded LRU cache of frames derived from an upload, keyed by content hash
+
+    Streamlit reruns the whole script on every widget interaction, so tables
+    read or built from the upload's store (rollups, resampled series, filter
+    indexes, metric means) are kept here (module state survives reruns) and
+    only rebuilt when the data or the filters they depend on change. Entries
+    are evicted least recently used first once either the entry count or the
+    total memory footprint is exceeded.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=2 * 1024 ** 3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+
+    def get_or_build(self, key, build):
+        """
+        Return the cached value for key, calling build() on a miss
+
+        Args:
+            key: hashable tuple starting with the dataset content hash
+            build: callable returning a DataFrame, Series or object with nbytes
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+        self.misses += 1
+        value = build()
+        size = nbytes(value)
+        self._entries[key] = (value, size)
+        self._nbytes += size
+        self._evict(keep=key)
+        return value
+
+    def _evict(self, keep):
+        # Never evict the entry that was just built, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._nbytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            _, size = self._entries.pop(oldest)
+            self._nbytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    def stats(self):
+        """
+        Cache counters for display in the dashboard
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'bytes': self._nbytes,
+        }
+
+
+class FigureCache:
+    """
+    LRU cache of rendered figures stored as PNG bytes under a byte budget
+
+    Keys combine the dataset hash, the plot name and the active filter values,
+    so reruns triggered by unrelated widgets reuse the rendered image. Figures
+    are closed as soon as they are rendered, so pyplot does not accumulate
+    them over a long session.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 ** 2, dpi=100):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+
+    def get_or_render(self, key, render):
+        """
+        Return PNG bytes for key, calling render() to build the figure on a miss
+
+        Args:
+            key: hashable tuple identifying the dataset, plot and filter state
+            render: callable returning a matplotlib figure
+        Returns:
+            PNG image as bytes
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        fig = render()
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight')
+        finally:
+            plt.close(fig)
+        png = buffer.getvalue()
+
+        self._entries[key] = png
+        self._nbytes += len(png)
+        while len(self._entries) > 1 and self._nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= len(evicted)
+        return png
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'bytes': self._nbytes,
+        }
+
+
+class ArtifactCache:
+    """
+    Small LRU cache for per-dataset handles that hold no data themselves (queries)
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get_or_build(self, key, build):
+        """
+        Return the artifact for key, calling build() on first use
+
+        Args:
+            key: hashable tuple, typically (artifact name, dataset hash)
+            build: callable creating the artifact
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        artifact = build()
+        self._entries[key] = artifact
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return artifact
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Module state persists across Streamlit reruns, so one shared instance of each is enough
+data_cache = DataCache()
+figure_cache = FigureCache()
+artifact_cache = ArtifactCache()
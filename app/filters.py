@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    Sorted-order indexes for the dashboard's sidebar filters, built once per dataset
+
+    Each range column keeps its values in sorted order together with the row
+    positions they came from, so a slider range resolves to a contiguous slice
+    with two binary searches. Region rows are grouped by category code the
+    same way. A query starts from the most selective filter and checks the
+    remaining ones only on those candidate rows: O(log n + k) instead of a
+    full scan.
+    """
+
+    def __init__(self, df, range_columns=('Tamb', 'WS'), category_column='Region'):
+        self.n_rows = len(df)
+        self.values = {}
+        self.sorted_values = {}
+        self.sorted_rows = {}
+        for col in range_columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            order = np.argsort(values, kind='stable')
+            # argsort puts NaN last; keep only the rows a range can match
+            n_valid = int(np.count_nonzero(~np.isnan(values)))
+            self.values[col] = values
+            self.sorted_rows[col] = order[:n_valid]
+            self.sorted_values[col] = values[order[:n_valid]]
+
+        self.category_column = category_column if category_column in df.columns else None
+        if self.category_column is not None:
+            codes, labels = pd.factorize(df[category_column], sort=False)
+            self.codes = codes
+            self.labels = {label: i for i, label in enumerate(labels)}
+            self.category_rows = np.argsort(codes, kind='stable')
+            self.category_bounds = np.searchsorted(codes[self.category_rows], np.arange(len(labels) + 1))
+
+    @property
+    def nbytes(self):
+        # Index memory, so the dashboard's DataCache can budget it like a frame
+        arrays = list(self.values.values()) + list(self.sorted_values.values()) + list(self.sorted_rows.values())
+        if self.category_column is not None:
+            arrays += [self.codes, self.category_rows, self.category_bounds]
+        return sum(values.nbytes for values in arrays)
+
+    def count(self, ranges=None, categories=None):
+        """
+        Number of rows matching every active filter (see select)
+        """
+        rows = self.select(ranges, categories)
+        return self.n_rows if rows is None else len(rows)
+
+    def _range_slice(self, col, lo, hi):
+        sorted_values = self.sorted_values[col]
+        start = np.searchsorted(sorted_values, lo, side='left')
+        stop = np.searchsorted(sorted_values, hi, side='right')
+        return self.sorted_rows[col][start:stop]
+
+    def _category_rows(self, selected):
+        codes = [self.labels[label] for label in dict.fromkeys(selected) if label in self.labels]
+        parts = [self.category_rows[self.category_bounds[c]:self.category_bounds[c + 1]] for c in codes]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+
+    def select(self, ranges=None, categories=None):
+        """
+        Row positions matching every active filter
+
+        Args:
+            ranges: dict of column -> (low, high) inclusive bounds, or None to skip
+            categories: selected category labels, or None to skip the category filter
+        Returns:
+            sorted numpy array of row positions, or None if no filter is active
+        """
+        ranges = {col: bounds for col, bounds in (ranges or {}).items() if bounds is not None}
+        use_categories = categories is not None and self.category_column is not None
+        if not ranges and not use_categories:
+            return None
+
+        # Size of each candidate set, known from the indexes before touching any rows
+        candidates = {}
+        for col, (lo, hi) in ranges.items():
+            sorted_values = self.sorted_values[col]
+            candidates[col] = (np.searchsorted(sorted_values, hi, side='right')
+                               - np.searchsorted(sorted_values, lo, side='left'))
+        if use_categories:
+            selected_codes = [self.labels[label] for label in dict.fromkeys(categories) if label in self.labels]
+            candidates[None] = sum(self.category_bounds[c + 1] - self.category_bounds[c]
+                                   for c in selected_codes)
+
+        driver = min(candidates, key=candidates.get)
+        if driver is None:
+            rows = self._category_rows(categories)
+        else:
+            rows = self._range_slice(driver, *ranges[driver])
+
+        # Check the remaining filters on the candidate rows only
+        for col, (lo, hi) in ranges.items():
+            if col != driver:
+                values = self.values[col][rows]
+                rows = rows[(values >= lo) & (values <= hi)]
+        if use_categories and driver is not None:
+            allowed = np.zeros(len(self.labels) + 1, dtype=bool)
+            allowed[selected_codes] = True
+            # Code -1 (missing category) indexes the trailing False entry
+            rows = rows[allowed[self.codes[rows]]]
+        return np.sort(rows)
+
+
+def active_range(selected, full):
+    """
+    The selected slider range, or None when it still spans the full data range
+    """
+    selected = tuple(selected)
+    return None if selected == tuple(full) else selected
@@ -1,6 +1,11 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-from utils import load_data, plot_wind_rose, time_series, correlation, humidity_analysis
+from utils import (load_query, plot_wind_rose, time_series, resampled_table, resampled_series,
+                   correlation, humidity_analysis, PLOT_COLUMNS)
+from cache import content_hash, data_cache, figure_cache, artifact_cache
+from filters import FilterIndex, active_range
+from scripts.rollup import RollupCube
+from scripts.resample import FREQUENCIES
+from scripts.profiling import Profiler, activate
 import streamlit as st
 
 # Set page config
@@ -11,95 +16,169 @@ st.title("Solar Data Analysis Dashboard")
 st.write("here is the link to the data: https://drive.google.com/file/d/1boBQADBu-_QuCWawStJpvZahgzkcerGB/view?usp=sharing")
 # File uploader
 uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
+# One profiler per browser session, so the Performance panel only shows this session's runs
+profiler = activate(st.session_state.setdefault('profiler', Profiler()))
+profiler.new_run()
 
 if uploaded_file is not None:
     try:
-        # Load data
-        df = load_data(uploaded_file)
+        # Lazy query over the uploaded data (stored once per content hash); filters and
+        # column lists below are pushed down into the Parquet reads
+        dataset_key = content_hash(uploaded_file)
+        base = artifact_cache.get_or_build(('query', dataset_key), lambda: load_query(uploaded_file))
 
         # Add sidebar filters
         st.sidebar.header("Data Filters")
         
        
         # Region filter if multiple regions exist
-        if 'Region' in df.columns:
-            regions = df['Region'].unique()
+        selected_regions = None
+        if 'Region' in base.schema_columns:
+            # Read from the partition directory names, not the data
+            regions = base.partitions()
             selected_regions = st.sidebar.multiselect("Select Regions", regions, default=regions)
         
         
         
-        # Weather condition filters
-        min_temp = float(df['Tamb'].min())
-        max_temp = float(df['Tamb'].max())
+        # Weather condition filters; the bounds come from the Parquet row-group statistics
+        min_temp, max_temp = (float(value) for value in base.column_range('Tamb'))
         temp_range = st.sidebar.slider("Temperature Range (°C)", 
                                      min_value=min_temp,
                                      max_value=max_temp,
                                      value=(min_temp, max_temp))
         
-        min_ws = float(df['WS'].min())
-        max_ws = float(df['WS'].max())
+        min_ws, max_ws = (float(value) for value in base.column_range('WS'))
         wind_range = st.sidebar.slider("Wind Speed Range (m/s)",
                                      min_value=min_ws,
                                      max_value=max_ws, 
                                      value=(min_ws, max_ws))
+
+        # Bucket size of the resampled series; 'auto' keeps a plot to at most 2000 buckets
+        resolution = st.sidebar.selectbox("Time Series Resolution", ['auto'] + FREQUENCIES)
         
        
-        if 'Region' in df.columns:
-            mask = df['Region'].isin(selected_regions)
-            
-        # Filter the dataframe
-        df = df[mask]
+        # Collect the filters on the query; rows are only read per view, below
+        with profiler.stage('filter'):
+            # Sorted Tamb/WS indexes and Region groups, built once per dataset from three columns
+            filter_index = data_cache.get_or_build(('filter_index', dataset_key), lambda: FilterIndex(
+                base.select(['Tamb', 'WS', 'Region']).to_frame()))
+            tamb_filter = active_range(temp_range, (min_temp, max_temp))
+            ws_filter = active_range(wind_range, (min_ws, max_ws))
+            region_filter = None
+            if selected_regions is not None and set(selected_regions) != set(regions):
+                region_filter = selected_regions
+            query = base
+            if region_filter is not None:
+                query = query.isin('Region', region_filter)
+            if tamb_filter is not None:
+                query = query.between('Tamb', *tamb_filter)
+            if ws_filter is not None:
+                query = query.between('WS', *ws_filter)
+            # Counted from the indexes with two binary searches per range, without a scan
+            n_rows = filter_index.count(ranges={'Tamb': tamb_filter, 'WS': ws_filter},
+                                        categories=region_filter)
+
+        # Weather ranges cut across the hourly cells, so with one active the views read the raw rows
+        cube = None
+        resampled = None
+        if tamb_filter is None and ws_filter is None:
+            with profiler.stage('rollup'):
+                # Hourly rollup of the full dataset, cut to the selected regions
+                cells = data_cache.get_or_build(('rollup', dataset_key), lambda: RollupCube.build(
+                    base.select(PLOT_COLUMNS['time_series'] + ['Region']).to_frame()).cells)
+                cube = RollupCube(cells).select(regions=region_filter)
+            with profiler.stage('resample'):
+                # Resampled series of the full dataset, cut by region the same way as the cube
+                resampled = data_cache.get_or_build(('resample', dataset_key, resolution), lambda: resampled_table(
+                    base.select(PLOT_COLUMNS['resampled_series']).to_frame(), resolution))
+                if region_filter is not None:
+                    resampled = resampled[resampled.index.get_level_values('Region').isin(region_filter)]
         
         # Show number of records after filtering
-        st.sidebar.markdown(f"**Filtered Records:** {len(df):,}")
+        st.sidebar.markdown(f"**Filtered Records:** {n_rows:,}")
+        scan = query.scan_stats()
+        st.sidebar.caption(f"Reads {scan['partitions']} of {scan['partitions_total']} partitions, "
+                           f"{scan['row_groups']} of {scan['row_groups_total']} row groups")
+        if n_rows == 0:
+            # e.g. every region deselected; there is nothing to summarise or plot
+            st.warning("No records match the selected filters.")
+            st.stop()
+
+        # Rendered figures are cached per dataset and filter state
+        filter_key = (dataset_key,
+                      tuple(sorted(selected_regions)) if selected_regions is not None else None,
+                      tuple(temp_range), tuple(wind_range))
+
+        def show_figure(name, plot, columns=None):
+            # Covers reading, building and PNG encoding; a cache hit reads nothing and shows up
+            # as a near-zero stage. columns=None renders without reading any rows.
+            def render():
+                return plot(query.select(columns).to_frame() if columns is not None else None)
+            with profiler.stage(f'render {name}', rows=n_rows):
+                png = figure_cache.get_or_render((name,) + filter_key, render)
+            st.image(png, use_container_width=True)
 
         # Basic statistics
         st.subheader("Data Statistics")
         col1, col2, col3 = st.columns(3)
+        # Cached per filter state like the figures, so reruns from unrelated widgets read nothing
+        with profiler.stage('statistics', rows=n_rows):
+            means = data_cache.get_or_build(('means',) + filter_key, lambda: query.select(
+                ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'Tamb', 'WS', 'RH', 'BP']).to_frame().mean())
         
         with col1:
-            st.metric("Average GHI (W/m²)", f"{df['GHI'].mean():.2f}")
-            st.metric("Average DNI (W/m²)", f"{df['DNI'].mean():.2f}")
-            st.metric("Average DHI (W/m²)", f"{df['DHI'].mean():.2f}")
+            st.metric("Average GHI (W/m²)", f"{means['GHI']:.2f}")
+            st.metric("Average DNI (W/m²)", f"{means['DNI']:.2f}")
+            st.metric("Average DHI (W/m²)", f"{means['DHI']:.2f}")
         
         with col2:
-            st.metric("Average Module A Temp (°C)", f"{df['TModA'].mean():.2f}")
-            st.metric("Average Module B Temp (°C)", f"{df['TModB'].mean():.2f}")
-            st.metric("Average Ambient Temp (°C)", f"{df['Tamb'].mean():.2f}")
+            st.metric("Average Module A Temp (°C)", f"{means['TModA']:.2f}")
+            st.metric("Average Module B Temp (°C)", f"{means['TModB']:.2f}")
+            st.metric("Average Ambient Temp (°C)", f"{means['Tamb']:.2f}")
             
         with col3:
-            st.metric("Average Wind Speed (m/s)", f"{df['WS'].mean():.2f}")
-            st.metric("Average Relative Humidity (%)", f"{df['RH'].mean():.2f}")
-            st.metric("Average Barometric Pressure (hPa)", f"{df['BP'].mean():.2f}")
+            st.metric("Average Wind Speed (m/s)", f"{means['WS']:.2f}")
+            st.metric("Average Relative Humidity (%)", f"{means['RH']:.2f}")
+            st.metric("Average Barometric Pressure (hPa)", f"{means['BP']:.2f}")
 
         # Time series plots
         st.subheader("Time Series Analysis")
         
-        # Get monthly and daily plots from time_series function
-        monthly_fig= time_series(df)
-        
-        # Display the plots
-        st.pyplot(monthly_fig)
+        # Get monthly plots from time_series function and display them
+        show_figure('time_series', lambda data: time_series(data, cube=cube),
+                    None if cube is not None else PLOT_COLUMNS['time_series'])
+        show_figure(f'resampled_series {resolution}',
+                    lambda data: resampled_series(data, resolution, table=resampled),
+                    None if resampled is not None else PLOT_COLUMNS['resampled_series'])
 
         # Correlation plots
         st.subheader("Correlation Analysis")
-        correlation_fig = correlation(df)
-        st.pyplot(correlation_fig)
+        show_figure('correlation', correlation, PLOT_COLUMNS['correlation'])
 
 
         # Humidity analysis
         st.subheader("Humidity Analysis")
-        humidity_fig = humidity_analysis(df)
-        st.pyplot(humidity_fig)
+        show_figure('humidity_analysis', humidity_analysis, PLOT_COLUMNS['humidity_analysis'])
 
-        # Remove this line since humidity_analysis() is already called above
-        # and its figure is displayed with st.pyplot(humidity_fig)
-        
 
         # Wind rose diagram
         st.subheader("Wind Analysis")
-        wind_rose = plot_wind_rose(df)
-        st.pyplot(wind_rose)
+        show_figure('plot_wind_rose', plot_wind_rose, PLOT_COLUMNS['plot_wind_rose'])
+
+        cache_stats = data_cache.stats()
+        st.sidebar.caption(f"Data cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                           f"{cache_stats['bytes'] / 1024 ** 2:,.1f} MB held")
+        figure_stats = figure_cache.stats()
+        st.sidebar.caption(f"Figure cache: {figure_stats['hits']} hits, {figure_stats['misses']} misses, "
+                           f"{figure_stats['bytes'] / 1024 ** 2:,.1f} MB held")
+
+        # Optional per-stage timings for this rerun, exportable for offline analysis
+        if st.sidebar.checkbox("Show performance panel"):
+            st.sidebar.subheader("Performance")
+            timings = pd.DataFrame(profiler.latest(), columns=['stage', 'rows', 'seconds', 'peak_mb'])
+            st.sidebar.dataframe(timings.set_index('stage').round(3), use_container_width=True)
+            st.sidebar.download_button("Download timings (JSON)", profiler.to_json(),
+                                       file_name='performance.json', mime='application/json')
 
     except Exception as e:
         st.error(f"Error processing data: {str(e)}")
@@ -1,20 +1,40 @@
-import pandas as pd
+import os
+import sys
 import matplotlib.pyplot as plt
-import numpy as np
 import seaborn as sns
-from windrose import WindroseAxes
 
-def load_data(file):
+# Make the repository root importable so the shared scripts package can be used
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.ingest import prepare, calendar
+from scripts.dataset import downcast
+from scripts.store import DEFAULT_STORE_DIR, load as load_columnar
+from scripts.render import DENSITY_THRESHOLD, scatter_or_density
+from scripts.moments import CovarianceAccumulator
+from scripts.wind import SPEED_BINS, wind_histogram, polar_axes, stacked_rose
+from scripts.resample import plot_resampled, resample
+from scripts.query import Query, to_partitioned
+from scripts.profiling import timed
+
+@timed(rows='output')
+def load_data(file, store_dir=DEFAULT_STORE_DIR):
     """
-    Load and validate CSV data file
-    
+    Load and validate CSV data file as one in-memory frame
+
+    For callers that need every row at once (benchmarks, notebooks); the
+    dashboard reads through load_query instead. Only the known station columns are parsed, with float32 sensor channels,
+    a categorical Region and a Timestamp parsed once at load time. Each upload
+    is converted to a content-addressed Feather file, so reopening the same
+    data memory-maps it instead of parsing the CSV again. A gap-free 0/1
+    Cleaning column is then held as bool (see dataset.downcast).
+
     Args:
         file: Uploaded CSV file object
+        store_dir: directory holding the columnar copies
     Returns:
         pandas DataFrame with validated data
     """
     try:
-        df = pd.read_csv(file)
+        df = prepare(downcast(load_columnar(file, store_dir=store_dir)))
         # required_columns = ['Timestamp',	'GHI',	'DNI,'	'DHI',	'ModA',	'ModB',	'Tamb',	'RH',	'WS',	'WSgust',	'WSstdev',	'WD',	'WDstdev',	'BP',	'Cleaning',	'Precipitation',	'TModA',	'TModB',	'Region']
         
         # # Validate required columns exist
@@ -26,24 +46,49 @@ def load_data(file):
     except Exception as e:
         raise Exception(f"Error loading data: {str(e)}")
 
-def time_series(df):
+@timed()
+def load_query(file, store_dir=DEFAULT_STORE_DIR):
+    """
+    Lazy query over the uploaded data, for reading only the rows and columns a view needs
+
+    Each upload is converted once to a content-addressed Parquet store
+    partitioned by Region (see query.write_partitioned); later uploads of
+    the same data reuse it. Nothing is read until the query is evaluated.
+
+    Args:
+        file: Uploaded CSV file object
+        store_dir: directory holding the partitioned stores
+    Returns:
+        scripts.query.Query over every row and column
+    """
+    try:
+        return Query.open(to_partitioned(file, store_dir=store_dir))
+    except Exception as e:
+        raise Exception(f"Error loading data: {str(e)}")
+
+@timed()
+def time_series(df, cube=None):
     """
     Generate time series plots showing monthly and daily patterns of solar radiation and temperature
     
     Args:
-        df: pandas DataFrame with solar and temperature data
+        df: pandas DataFrame with solar and temperature data (not used when cube is given)
+        cube: optional RollupCube covering the same rows; monthly averages are
+            then re-aggregated from the cube instead of the raw rows
     """
-    # Extract month and hour from timestamp
-    df['Month'] = pd.to_datetime(df['Timestamp']).dt.month
-    df['Hour'] = pd.to_datetime(df['Timestamp']).dt.hour
+    if cube is not None:
+        monthly_avg = cube.aggregate('Month', columns=['GHI', 'DNI', 'DHI', 'Tamb']).round(2)
+    else:
+        # Month is derived once at load time; reuse it instead of re-parsing Timestamp
+        month = calendar(df, 'Month')
 
-    # Calculate monthly averages
-    monthly_avg = df.groupby('Month').agg({
-        'GHI': 'mean',
-        'DNI': 'mean', 
-        'DHI': 'mean',
-        'Tamb': 'mean'
-    }).round(2)
+        # Calculate monthly averages
+        monthly_avg = df.groupby(month).agg({
+            'GHI': 'mean',
+            'DNI': 'mean', 
+            'DHI': 'mean',
+            'Tamb': 'mean'
+        }).round(2)
 
     # Create figure for monthly patterns
     fig1, axes1 = plt.subplots(2, 2, figsize=(15, 10))
@@ -72,7 +117,54 @@ def time_series(df):
     plt.tight_layout()
      
     return fig1
+
+# Channels shown by resampled_series
+SERIES_COLUMNS = ['GHI', 'Tamb']
+
+def resampled_table(df, freq='auto'):
+    """
+    Per-region resample() of the channels resampled_series plots, with empty buckets kept as gaps
+    """
+    return resample(df, freq, columns=SERIES_COLUMNS, dense=True)
+
+@timed()
+def resampled_series(df, freq='auto', table=None):
+    """
+    Plot per-region GHI, GHI energy and temperature over time at a fixed bucket size
+
+    Args:
+        df: pandas DataFrame with Timestamp, Region and sensor data (not used when table is given)
+        freq: bucket size ('5min', '1h', '1D', ...) or 'auto' for at most 2000 buckets
+        table: optional resampled_table() of the same rows (e.g. cut from a cached
+            table of the full dataset); it is plotted instead of resampling df
+    Returns:
+        matplotlib figure with the resampled series
+    """
+    if table is None:
+        table = resampled_table(df, freq)
+    freq = table.attrs.get('freq', freq)
+
+    fig, axes = plt.subplots(3, 1, figsize=(15, 12), sharex=True)
+
+    plot_resampled(axes[0], table, 'GHI')
+    axes[0].set_title(f'GHI ({freq} mean)')
+    axes[0].set_ylabel('GHI (W/m²)')
+    axes[0].legend()
+
+    plot_resampled(axes[1], table, 'GHI', stat='energy')
+    axes[1].set_title(f'GHI Energy per {freq} Bucket')
+    axes[1].set_ylabel('Energy (Wh/m²)')
+
+    plot_resampled(axes[2], table, 'Tamb')
+    axes[2].set_title(f'Temperature ({freq} mean)')
+    axes[2].set_xlabel('Time')
+    axes[2].set_ylabel('Temperature (°C)')
+
+    plt.tight_layout()
+
+    return fig
     
+@timed()
 def correlation(df):
     """
     Create correlation plots for solar, temperature and wind variables
@@ -83,13 +175,16 @@ def correlation(df):
         matplotlib figure with correlation heatmaps
     """
     try:
-        # Create correlation matrix for solar and temperature variables
+        # One pass over the union of variables; both matrices are sliced from it
         solar_temp_vars = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'Tamb']
-        solar_temp_corr = df[solar_temp_vars].corr()
+        wind_solar_vars = ['GHI', 'DNI', 'DHI', 'WS', 'WSgust', 'WD']
+        stats = CovarianceAccumulator(solar_temp_vars + ['WS', 'WSgust', 'WD']).update(df)
+
+        # Create correlation matrix for solar and temperature variables
+        solar_temp_corr = stats.corr(solar_temp_vars)
 
         # Create correlation matrix for wind and solar variables 
-        wind_solar_vars = ['GHI', 'DNI', 'DHI', 'WS', 'WSgust', 'WD']
-        wind_solar_corr = df[wind_solar_vars].corr()
+        wind_solar_corr = stats.corr(wind_solar_vars)
 
         # Set up the figure with two subplots
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -116,12 +211,17 @@ def correlation(df):
     except Exception as e:
         raise Exception(f"Error creating correlation plots: {str(e)}")
 
-def humidity_analysis(df):
+@timed()
+def humidity_analysis(df, density_threshold=DENSITY_THRESHOLD):
     """
     Create scatter plots analyzing relationships between relative humidity and other variables
     
+    Above density_threshold rows the scatter plots switch to 2D density images,
+    so render time depends on the grid size rather than the number of rows.
+
     Args:
         df: pandas DataFrame containing RH, temperature and solar measurements
+        density_threshold: point count above which density images are drawn
     Returns:
         matplotlib figure with humidity analysis plots
     """
@@ -129,21 +229,23 @@ def humidity_analysis(df):
         # Create scatter plots to examine RH relationships
         fig = plt.figure(figsize=(15, 10))
 
-        plt.subplot(2,2,1)
-        plt.scatter(df['RH'], df['Tamb'], alpha=0.5)
+        ax = plt.subplot(2,2,1)
+        scatter_or_density(ax, df['RH'], df['Tamb'], threshold=density_threshold)
         plt.title('Relative Humidity vs Ambient Temperature')
         plt.xlabel('Relative Humidity (%)')
         plt.ylabel('Temperature (°C)')
 
-        plt.subplot(2,2,2)
-        plt.scatter(df['RH'], df['GHI'], alpha=0.5)
+        ax = plt.subplot(2,2,2)
+        scatter_or_density(ax, df['RH'], df['GHI'], threshold=density_threshold)
         plt.title('Relative Humidity vs Global Horizontal Irradiance')
         plt.xlabel('Relative Humidity (%)')
         plt.ylabel('GHI (W/m²)')
 
-        plt.subplot(2,2,3)
-        plt.scatter(df['RH'], df['TModA'], alpha=0.5, label='Module A')
-        plt.scatter(df['RH'], df['TModB'], alpha=0.5, label='Module B')
+        ax = plt.subplot(2,2,3)
+        scatter_or_density(ax, df['RH'], df['TModA'], threshold=density_threshold,
+                           cmap='Blues', label='Module A')
+        scatter_or_density(ax, df['RH'], df['TModB'], threshold=density_threshold,
+                           cmap='Oranges', label='Module B')
         plt.title('Relative Humidity vs Module Temperatures')
         plt.xlabel('Relative Humidity (%)')
         plt.ylabel('Temperature (°C)')
@@ -156,6 +258,7 @@ def humidity_analysis(df):
         raise Exception(f"Error creating humidity analysis plots: {str(e)}")
 
 
+@timed()
 def plot_wind_rose(df):
     """
     Create wind rose plot from wind speed and direction data
@@ -166,21 +269,29 @@ def plot_wind_rose(df):
         matplotlib figure with wind rose plot
     """
     try:
+        # Bin directions and speeds once; the plot only sees the small sector table
+        _, speeds = wind_histogram(df, n_sectors=16, speed_bins=SPEED_BINS)
+
         # Create wind rose figure
         fig = plt.figure(figsize=(8, 8))
-        ax = WindroseAxes.from_ax(fig=fig)
-        
-        # Plot wind rose using correct column names
-        ax.bar(df['WD'], df['WS'], 
-               bins=np.arange(0, 35, 5), # Wind speed bins
-               normed=True,
-               opening=0.8,
-               edgecolor='white')
-        
+        ax = polar_axes(fig)
+        stacked_rose(ax, speeds, opening=0.8, edgecolor='white')
+        ax.yaxis.set_major_formatter(lambda value, _: f"{value:.0f}%")
+
         # Customize appearance
-        ax.set_legend(title='Wind Speed (m/s)')
+        ax.legend(title='Wind Speed (m/s)', loc='lower left')
         ax.set_title('Wind Rose Diagram')
         
         return fig
     except Exception as e:
         raise Exception(f"Error creating wind rose plot: {str(e)}")
+
+
+# Columns each plot function reads, so the dashboard loads only those for a figure
+PLOT_COLUMNS = {
+    'time_series': ['Timestamp', 'GHI', 'DNI', 'DHI', 'Tamb'],
+    'resampled_series': ['Timestamp', 'Region'] + SERIES_COLUMNS,
+    'correlation': ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'Tamb', 'WS', 'WSgust', 'WD'],
+    'humidity_analysis': ['RH', 'Tamb', 'GHI', 'TModA', 'TModB'],
+    'plot_wind_rose': ['WS', 'WD', 'WDstdev'],
+}
@@ -0,0 +1,463 @@
+"""
+Benchmark harness for the ingestion, cleaning, analysis and dashboard plotting hot paths
+
+Generates synthetic station data with the real column schema, times every
+benchmark (best of --repeat runs) and measures its peak traced memory in a
+separate run, and writes the results as JSON. Passing --compare with an
+earlier result file reports the ratio per benchmark and exits non-zero when
+any benchmark got slower than --threshold. --check-memory runs every
+data_proccess analysis once more and fails if one modifies its input frame
+or traces more memory than its bound in MEMORY_BOUNDS.
+
+Usage:
+    python -m scripts.benchmark --rows 1000000 --regions 3 --output bench.json
+    python -m scripts.benchmark --rows 1000000 --regions 3 --compare bench.json
+    python -m scripts.benchmark --rows 1000000 --only data_cleaning --check-memory
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from scripts import data_proccess
+from scripts.dataset import downcast
+from scripts.ingest import SCHEMA_COLUMNS, load_csv, prepare
+from scripts.profiling import RSSSampler
+from scripts.render import DENSITY_THRESHOLD
+from scripts.resample import SENSOR_COLUMNS, resample
+from scripts.store import load as load_columnar
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_DIR, 'app')
+
+# Column order of the raw station exports
+CSV_COLUMNS = SCHEMA_COLUMNS[:-1] + ['Comments', 'Region']
+REGION_NAMES = ['Benin', 'Togo', 'Sierra Leone']
+
+# Peak traced memory each analysis may add per byte of input frame, as a multiple of the
+# frame's size (see check_memory).
+# data_cleaning returns a cleaned frame of up to the input's size; bubble_plot
+# is left out because matplotlib keeps per-point transforms for every bubble.
+MEMORY_BOUNDS = {
+    'summary_stats': 0.5,
+    'missing_values': 0.5,
+    'negative_values': 0.5,
+    'outliers': 0.75,
+    'time_series': 0.5,
+    'cleaning_impact': 0.75,
+    'correlation': 0.75,
+    'wind_analysis': 1.0,
+    'humidity_analysis': 0.75,
+    'distribution_analysis': 0.5,
+    'z_score_analysis': 0.5,
+    'data_cleaning': 1.5,
+}
+
+
+def synthetic(n_rows, n_regions=3, seed=0, nan_frac=0.01, start='2021-08-09', first_minute=0):
+    """
+    Synthetic minute-level station data with the raw CSV schema
+
+    Irradiance follows a daily cycle with random cloud cover, module readings
+    and temperatures follow irradiance, and the other channels are drawn
+    around typical station values, rounded to 0.1 like the station exports.
+    Rows are split evenly over the regions, each with its own minute-level
+    series starting first_minute minutes after start.
+
+    Args:
+        n_rows: total number of rows
+        n_regions: number of regions (the first three use the real station names)
+        seed: random seed
+        nan_frac: fraction of sensor readings set to NaN
+        start: first timestamp of every region
+        first_minute: offset of the first row, to continue a series in chunks
+    Returns:
+        pandas DataFrame with Timestamp as text, like a freshly read CSV
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.full(n_regions, n_rows // n_regions)
+    sizes[:n_rows % n_regions] += 1
+    minutes = np.concatenate([np.arange(size) for size in sizes]) + first_minute
+    region_codes = np.repeat(np.arange(n_regions), sizes)
+    names = [REGION_NAMES[i] if i < len(REGION_NAMES) else f"Station {i + 1}" for i in range(n_regions)]
+
+    hour = (minutes % 1440) / 60
+    sun = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)
+    clouds = np.clip(rng.normal(0.8, 0.2, n_rows), 0.05, 1)
+    ghi = 1000 * sun * clouds + rng.normal(0, 3, n_rows)
+    dni = 850 * sun * clouds ** 2 + rng.normal(0, 3, n_rows)
+    dhi = np.clip(ghi - dni * sun, 0, None) + rng.normal(0, 2, n_rows)
+    tamb = 24 + 8 * sun + rng.normal(0, 2, n_rows)
+    ws = np.abs(rng.gamma(2.0, 1.2, n_rows))
+
+    columns = {
+        'GHI': ghi, 'DNI': dni, 'DHI': dhi,
+        'ModA': 0.95 * ghi + rng.normal(0, 5, n_rows),
+        'ModB': 0.93 * ghi + rng.normal(0, 5, n_rows),
+        'Tamb': tamb,
+        'RH': np.clip(rng.normal(70, 15, n_rows) - 20 * sun, 5, 100),
+        'WS': ws,
+        'WSgust': ws * rng.uniform(1.1, 1.6, n_rows),
+        'WSstdev': np.abs(rng.normal(0.5, 0.2, n_rows)),
+        'WD': np.round(rng.vonmises(np.radians(200), 1.5, n_rows) % (2 * np.pi) * 180 / np.pi, 1),
+        'WDstdev': np.abs(rng.normal(8, 4, n_rows)),
+        'BP': rng.normal(995, 2, n_rows),
+        'Precipitation': np.where(rng.random(n_rows) < 0.01, rng.exponential(0.5, n_rows), 0.0),
+        'TModA': tamb + 25 * sun + rng.normal(0, 2, n_rows),
+        'TModB': tamb + 22 * sun + rng.normal(0, 2, n_rows),
+    }
+    for name, values in columns.items():
+        np.round(values, 1, out=values)
+        values[rng.random(n_rows) < nan_frac] = np.nan
+    # Panels are cleaned at midnight roughly every ten days
+    columns['Cleaning'] = ((minutes % 1440 == 0) & (rng.random(n_rows) < 0.1)).astype(np.int64)
+
+    timestamps = np.datetime64(start, 'm') + minutes.astype('timedelta64[m]')
+    text = np.char.replace(np.datetime_as_string(timestamps, unit='m'), 'T', ' ')
+    df = pd.DataFrame({'Timestamp': text.astype(object)})
+    for name in CSV_COLUMNS[1:-2]:
+        df[name] = columns[name]
+    df['Comments'] = np.nan
+    df['Region'] = pd.Categorical.from_codes(region_codes, names).astype(object)
+    return df
+
+
+def write_csv(path, n_rows, n_regions=3, seed=0, chunk_rows=2_000_000, **kwargs):
+    """
+    Write synthetic data to a CSV file in chunks, so tens of millions of rows fit in memory
+
+    Each chunk holds the next stretch of every region's series (see synthetic)
+    and uses its own seed.
+    """
+    types = {'Timestamp': pa.string(), 'Region': pa.string(), 'Cleaning': pa.int64()}
+    schema = pa.schema([(col, types.get(col, pa.float64())) for col in CSV_COLUMNS])
+    # Whole rows per region in every chunk but the last keeps the series continuous
+    chunk_rows = max(chunk_rows - chunk_rows % n_regions, n_regions)
+    written = 0
+    with pa_csv.CSVWriter(path, schema) as writer:
+        chunk = 0
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            df = synthetic(size, n_regions, seed=seed + chunk, first_minute=written // n_regions, **kwargs)
+            writer.write_table(pa.Table.from_pandas(df, preserve_index=False).cast(schema))
+            written += size
+            chunk += 1
+    return path
+
+
+def measure(fn, repeat=3, memory=True):
+    """
+    Best-of-repeat wall time and the peak memory of one extra run
+
+    Memory is measured in its own run, first, so tracing overhead does not
+    skew the timings: peak_mb is the tracemalloc peak (NumPy and pandas
+    allocations report to it) and peak_rss_mb the sampled growth of the
+    resident set, which also covers Arrow buffers but understates memory the
+    allocators had already reserved.
+
+    Returns:
+        dict with seconds (best), mean_seconds, peak_mb and peak_rss_mb
+    """
+    result = {}
+    if memory:
+        # Measured first, before earlier runs leave freed memory cached in the allocators
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with RSSSampler() as sampler:
+                fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['peak_mb'] = peak / 1024 ** 2
+        result['peak_rss_mb'] = sampler.peak_mb
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    result['seconds'] = min(times)
+    result['mean_seconds'] = float(np.mean(times))
+    return result
+
+
+def _quiet(fn, *args, **kwargs):
+    # Analysis functions print and call plt.show(); discard both
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    plt.close('all')
+    return result
+
+
+def _render(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _dashboard():
+    # The dashboard modules import each other by flat name from app/
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import utils
+    return utils
+
+
+def benchmarks(csv_path, work_dir):
+    """
+    Benchmark callables keyed by name; the frame is loaded once and shared
+
+    Args:
+        csv_path: synthetic CSV file
+        work_dir: scratch directory for columnar copies and cleaned output
+    """
+    store_dir = os.path.join(work_dir, 'store')
+    dashboard = _dashboard()
+    # Loaded like the scripts load a dataset (see report.py); the load_query_* cases time
+    # the dashboard's own loader, reading every row back as its views would together, and
+    # the load_data_* cases its whole-frame loader
+    df = prepare(downcast(load_columnar(csv_path, store_dir=store_dir)))
+
+    def load_cold(loader):
+        # A dashboard loader into an empty store, as on the first upload
+        def run():
+            with tempfile.TemporaryDirectory(dir=work_dir) as cold_dir:
+                loader(cold_dir)
+        return run
+
+    def load_query(store):
+        return dashboard.load_query(csv_path, store_dir=store).to_frame()
+
+    def load_data(store):
+        return dashboard.load_data(csv_path, store_dir=store)
+
+    return df, {
+        # Schema-less pandas read, as a reference for the compact loaders below
+        'load_csv_default': lambda: pd.read_csv(csv_path),
+        'load_csv': lambda: load_csv(csv_path),
+        'load_data_cold': load_cold(load_data),
+        'load_data_warm': lambda: load_data(store_dir),
+        'load_query_cold': load_cold(load_query),
+        'load_query_warm': lambda: load_query(store_dir),
+        'data_cleaning': lambda: _quiet(data_proccess.data_cleaning, df, output_format='parquet',
+                                        output_path=os.path.join(work_dir, 'cleaned.parquet')),
+        'outliers': lambda: _quiet(data_proccess.outliers, df),
+        'cleaning_impact': lambda: _quiet(data_proccess.cleaning_impact, df),
+        'correlation_stats': lambda: data_proccess.correlation_stats(df),
+        'correlation': lambda: _quiet(data_proccess.correlation, df),
+        'time_series': lambda: _quiet(data_proccess.time_series, df),
+        'resample_15min': lambda: resample(df, '15min', stats=('mean', 'max')),
+        # Reference for resample: the same buckets via a pandas groupby (no energy integral)
+        'resample_15min_groupby': lambda: df.groupby(['Region', df['Timestamp'].dt.floor('15min')],
+                                                     observed=True)[SENSOR_COLUMNS].agg(['mean', 'max']),
+        'dashboard_time_series': lambda: _render(dashboard.time_series(df)),
+        'dashboard_resampled_series': lambda: _render(dashboard.resampled_series(df, 'auto')),
+        'dashboard_correlation': lambda: _render(dashboard.correlation(df)),
+        'dashboard_humidity': lambda: _render(dashboard.humidity_analysis(df)),
+        'dashboard_wind_rose': lambda: _render(dashboard.plot_wind_rose(df)),
+    }
+
+
+def _fingerprint(df):
+    # Column labels, dtypes and content hashes, to detect added columns and in-place edits
+    return [(col, str(df[col].dtype), int(pd.util.hash_pandas_object(df[col], index=False).sum()))
+            for col in df.columns], len(df)
+
+
+def _traced_peak_mb(name, df, work_dir):
+    # Peak traced memory of one quiet run of a data_proccess analysis
+    kwargs = {}
+    if name == 'data_cleaning':
+        kwargs = {'output_format': 'parquet', 'output_path': os.path.join(work_dir, 'cleaned.parquet')}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _quiet(getattr(data_proccess, name), df, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 ** 2
+
+
+def _frame_mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+
+
+def check_memory(df, work_dir, bounds=None, baseline=None):
+    """
+    Run each analysis once and check it leaves the frame untouched within its memory bound
+
+    Figures, fonts and the fixed-size samples some plots draw cost the same at
+    any frame size, so every analysis is first run on a smaller baseline frame.
+    The bound then covers what the full frame needs on top of that run:
+    peak <= baseline peak + ratio * (frame size - baseline frame size).
+
+    Args:
+        df: input frame, as loaded by benchmarks()
+        work_dir: scratch directory for the cleaned output
+        bounds: analysis name -> allowed extra peak as a multiple of the extra frame size
+            (defaults to MEMORY_BOUNDS)
+        baseline: smaller frame with the same columns (defaults to a copy of the
+            first quarter of df's rows, or of DENSITY_THRESHOLD + 1 rows if more)
+    Returns:
+        (table, failures): DataFrame of peak_mb, bound_mb and modified per
+        analysis, and the names that modified a frame or exceeded their bound
+    """
+    bounds = bounds or MEMORY_BOUNDS
+    if baseline is None:
+        # Above the density threshold where df is, so both runs draw the same kind of plot
+        rows = max(len(df) // 4, min(len(df), DENSITY_THRESHOLD + 1))
+        baseline = df.iloc[:rows].copy()
+    frame_mb, baseline_mb = _frame_mb(df), _frame_mb(baseline)
+    before, baseline_before = _fingerprint(df), _fingerprint(baseline)
+    rows = []
+    for name, ratio in bounds.items():
+        baseline_peak = _traced_peak_mb(name, baseline, work_dir)
+        peak = _traced_peak_mb(name, df, work_dir)
+        rows.append({'analysis': name, 'peak_mb': peak, 'baseline_peak_mb': baseline_peak,
+                     'bound_mb': baseline_peak + ratio * (frame_mb - baseline_mb),
+                     'modified': _fingerprint(df) != before or _fingerprint(baseline) != baseline_before})
+    table = pd.DataFrame(rows).set_index('analysis')
+    failures = list(table.index[table['modified'] | (table['peak_mb'] > table['bound_mb'])])
+    return table, failures
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(n_rows, n_regions=3, repeat=3, only=None, memory=True, seed=0, check=False):
+    """
+    Generate a dataset and run the selected benchmarks on it
+
+    Args:
+        check: also run check_memory on the loaded frame
+    Returns:
+        dict ready to be written as JSON: environment, configuration and per-benchmark
+        results, plus a memory_check section when check is set
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = write_csv(os.path.join(work_dir, 'synthetic.csv'), n_rows, n_regions, seed=seed)
+        df, cases = benchmarks(csv_path, work_dir)
+        if only:
+            unknown = [name for name in only if name not in cases]
+            if unknown:
+                raise ValueError(f"Unknown benchmarks: {unknown}")
+            cases = {name: cases[name] for name in only}
+
+        results = {}
+        for name, fn in cases.items():
+            results[name] = measure(fn, repeat=repeat, memory=memory)
+            results[name]['rows_per_second'] = n_rows / results[name]['seconds']
+            line = f"{name:<24}{results[name]['seconds']:>10.3f}s"
+            if memory:
+                rss = results[name]['peak_rss_mb']
+                line += f"{results[name]['peak_mb']:>10.1f} MB traced" + (f"{rss:>10.1f} MB rss" if rss is not None else '')
+            print(line, file=sys.stderr)
+        frame_mb = _frame_mb(df)
+        csv_mb = os.path.getsize(csv_path) / 1024 ** 2
+        if check:
+            table, failures = check_memory(df, work_dir)
+            print(table.round(1).to_string(), file=sys.stderr)
+
+    result = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'pyarrow': pa.__version__,
+            'matplotlib': matplotlib.__version__,
+        },
+        'config': {'rows': n_rows, 'regions': n_regions, 'repeat': repeat, 'seed': seed,
+                   'csv_mb': csv_mb, 'frame_mb': frame_mb},
+        'results': results,
+    }
+    if check:
+        result['memory_check'] = {'results': table.reset_index().to_dict(orient='records'), 'failures': failures}
+    return result
+
+
+def compare(current, baseline, threshold=1.2):
+    """
+    Time ratios of current over baseline results for the benchmarks both contain
+
+    Returns:
+        (table, regressions): DataFrame of baseline/current seconds and ratio,
+        and the names whose ratio exceeds threshold
+    """
+    names = [name for name in current['results'] if name in baseline['results']]
+    table = pd.DataFrame({
+        'baseline': [baseline['results'][name]['seconds'] for name in names],
+        'current': [current['results'][name]['seconds'] for name in names],
+    }, index=pd.Index(names, name='benchmark'))
+    table['ratio'] = table['current'] / table['baseline']
+    return table, list(table.index[table['ratio'] > threshold])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ingestion, cleaning and plotting hot paths')
+    parser.add_argument('--rows', type=int, default=100_000, help='total synthetic rows (10k to 50M)')
+    parser.add_argument('--regions', type=int, default=3, help='number of regions')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (best is kept)')
+    parser.add_argument('--only', nargs='+', help='benchmarks to run (default: all)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced-memory run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='write results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='earlier results file to compare timings against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression (default: 1.2)')
+    parser.add_argument('--check-memory', action='store_true',
+                        help='fail if an analysis modifies its input or exceeds its memory bound')
+    args = parser.parse_args(argv)
+
+    result = run(args.rows, args.regions, args.repeat, args.only, not args.no_memory, args.seed,
+                 args.check_memory)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        table, regressions = compare(result, baseline, args.threshold)
+        print(table.round(3).to_string(), file=sys.stderr)
+        if regressions:
+            print(f"Regressions above {args.threshold}x: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    if args.check_memory and result['memory_check']['failures']:
+        print(f"Memory check failed: {', '.join(result['memory_check']['failures'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Region-partitioned catalog over a directory of per-station files
+
+Each file's Region is inferred from its name (e.g. benin-malanville.csv,
+sierraleone-bumbuna.csv, togo-dapaong_qc.csv) or, failing that, from its
+Region column. Files are read in parallel straight into preallocated compact
+column buffers, grouped so that every region is one contiguous partition,
+instead of being concatenated by hand (which holds every file twice).
+
+Usage:
+    python -m scripts.catalog data/
+    python -m scripts.catalog data/ --regions Benin --workers 4
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from scripts.dataset import FLAG_COLUMNS, Dataset, _is_flag
+from scripts.ingest import SCHEMA_COLUMNS, _header, _pyarrow_options, iter_csv, timestamps
+from scripts.store import FORMATS, read_columnar
+
+# File name prefixes (lower case, letters only) of each region's station exports
+REGION_ALIASES = {
+    'benin': 'Benin',
+    'sierraleone': 'Sierra Leone',
+    'togo': 'Togo',
+}
+
+# Station files the catalog picks up, by extension
+EXTENSIONS = ('.csv',) + tuple(FORMATS.values())
+
+# Bytes of CSV parsed per block when streaming a file into the buffers
+BLOCK_SIZE = 1 << 23
+
+# Bytes read at a time when counting CSV rows
+_COUNT_BLOCK = 1 << 24
+
+
+def region_from_name(path, aliases=REGION_ALIASES):
+    """
+    Region whose alias (or name) starts the file name, ignoring case and punctuation
+
+    Returns:
+        region name, or None if no alias matches
+    """
+    stem = re.sub(r'[^a-z]', '', os.path.basename(path).lower())
+    candidates = dict(aliases)
+    for region in aliases.values():
+        candidates.setdefault(re.sub(r'[^a-z]', '', region.lower()), region)
+    # Longest alias first, so a longer name is not shadowed by its prefix
+    for alias in sorted(candidates, key=len, reverse=True):
+        if stem.startswith(alias):
+            return candidates[alias]
+    return None
+
+
+def _is_csv(path):
+    return str(path).endswith('.csv')
+
+
+def _file_columns(path):
+    if _is_csv(path):
+        names = _header(path)
+    elif str(path).endswith(FORMATS['parquet']):
+        names = pq.read_schema(path).names
+    else:
+        names = feather.read_table(path, memory_map=True).schema.names
+    return [col for col in SCHEMA_COLUMNS if col in names]
+
+
+def _count_rows(path):
+    """
+    Data rows in a station file: lines after the header for a CSV, metadata for Parquet/Feather
+
+    Blank lines are counted too, so for a CSV this is an upper bound that
+    the catalog corrects once the file has been read.
+    """
+    if not _is_csv(path):
+        if str(path).endswith(FORMATS['parquet']):
+            return pq.ParquetFile(path).metadata.num_rows
+        return feather.read_table(path, columns=[], memory_map=True).num_rows
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(_COUNT_BLOCK)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last = block[-1:]
+    # A last line without a trailing newline still holds a row
+    return max(lines + (last != b'\n') - 1, 0)
+
+
+def _region_from_content(path):
+    if 'Region' not in _file_columns(path):
+        return None
+    if _is_csv(path):
+        first = pd.read_csv(path, usecols=['Region'], nrows=1)['Region']
+    else:
+        first = read_columnar(path, ['Region'])['Region'].iloc[:1]
+    return str(first.iloc[0]) if len(first) and pd.notna(first.iloc[0]) else None
+
+
+def _blocks(path, columns, block_size=BLOCK_SIZE, engine='pyarrow'):
+    # A station file as a sequence of small frames, so no whole-file copy is ever held
+    if not _is_csv(path):
+        # Memory-mapped, so the frame references the file rather than a copy of it
+        yield read_columnar(path, columns)
+    elif engine == 'pyarrow':
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=block_size),
+                                 convert_options=_pyarrow_options(columns))
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from iter_csv(path, chunksize=max(block_size // 64, 1), columns=columns)
+
+
+def _fill(path, region, columns, buffers, start, expected, engine='pyarrow'):
+    # Stream one file into rows start.. of the buffers; returns the number of rows written
+    position = start
+    for block in _blocks(path, columns, engine=engine):
+        n = len(block)
+        if position + n > start + expected:
+            raise ValueError(f"{path} has more rows than the {expected} counted")
+        if 'Region' in block.columns:
+            # The file's own Region column is only read to check it agrees with the partition
+            other = set(block['Region'].dropna().astype(str).unique()) - {region}
+            if other:
+                raise ValueError(f"{path} is catalogued as {region} but also holds rows of {sorted(other)}; "
+                                 f"split it into one file per region")
+        for col, values in buffers.items():
+            target = values[position:position + n]
+            if col not in block.columns:
+                target[:] = np.iinfo(np.int64).min if col == 'Timestamp' else np.nan
+            elif col == 'Timestamp':
+                target[:] = timestamps(block).to_numpy().astype('datetime64[ns]', copy=False).view(np.int64)
+            else:
+                target[:] = block[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        position += n
+    return position - start
+
+
+class PartitionedDataset(Dataset):
+    """
+    Dataset whose rows are grouped by Region, one contiguous slice per region
+
+    partition() wraps one region's slice of the buffers in a DataFrame
+    without copying; to_frame() covers every partition.
+    """
+
+    def __init__(self, columns, regions, bounds):
+        super().__init__(columns, regions)
+        # region -> (start, stop) row positions
+        self.bounds = bounds
+
+    def partition(self, region):
+        """
+        One region's rows as a DataFrame view over the shared buffers
+        """
+        if region not in self.bounds:
+            raise KeyError(f"No partition for region {region!r}; available: {list(self.bounds)}")
+        start, stop = self.bounds[region]
+        return Dataset({col: values[start:stop] for col, values in self.columns.items()},
+                       self.regions).to_frame()
+
+    def partitions(self):
+        """
+        Yield (region, DataFrame view) for every partition
+        """
+        for region in self.bounds:
+            yield region, self.partition(region)
+
+
+class Catalog:
+    """
+    Station files of a directory with their regions and row counts
+
+    scan() only reads file names, headers and row counts. read() then loads the
+    files of the selected regions in a thread pool, each streamed block by
+    block straight into its slice of preallocated compact buffers (float32
+    sensors, int64 Timestamp, int8 Region codes), so peak memory is the
+    buffers plus one block per reader thread rather than every file twice.
+    Reading one region touches only that region's files.
+    """
+
+    def __init__(self, files):
+        # files: DataFrame with path, region, rows and columns (list of schema columns) per file
+        self.files = files.sort_values(['region', 'path'], ignore_index=True)
+
+    @classmethod
+    def scan(cls, directory, regions=None, aliases=REGION_ALIASES):
+        """
+        List the station files (CSV, Parquet, Feather) in a directory
+
+        Args:
+            directory: directory with one or more files per station
+            regions: optional dict of file name -> region for files whose name
+                and content do not tell
+            aliases: file name prefix -> region
+        Returns:
+            Catalog
+        """
+        paths = sorted(path for path in glob.glob(os.path.join(directory, '*'))
+                       if str(path).endswith(EXTENSIONS) and os.path.isfile(path))
+        if not paths:
+            raise ValueError(f"No station files ({', '.join(EXTENSIONS)}) in {directory}")
+        regions = regions or {}
+        rows = []
+        for path in paths:
+            region = regions.get(os.path.basename(path)) or region_from_name(path, aliases) \
+                or _region_from_content(path)
+            if region is None:
+                raise ValueError(f"Cannot infer the region of {path}; name it after a region "
+                                 f"or pass regions={{'{os.path.basename(path)}': ...}}")
+            rows.append({'path': path, 'region': region, 'rows': _count_rows(path),
+                         'columns': _file_columns(path)})
+        return cls(pd.DataFrame(rows))
+
+    @property
+    def regions(self):
+        return list(dict.fromkeys(self.files['region']))
+
+    def columns(self):
+        """
+        Schema columns present in at least one file, in schema order (Region included)
+        """
+        present = set(col for columns in self.files['columns'] for col in columns)
+        return [col for col in SCHEMA_COLUMNS if col in present or col == 'Region']
+
+    def read(self, regions=None, columns=None, max_workers=None):
+        """
+        Load the files of some or all regions into one region-partitioned dataset
+
+        Args:
+            regions: regions to load (defaults to all)
+            columns: schema columns to load (defaults to all present); Region is always included
+            max_workers: reader threads (defaults to one per file, capped at the CPU count)
+        Returns:
+            PartitionedDataset; columns missing from a file are NaN (NaT) in its rows
+        """
+        files = self.files
+        if regions is not None:
+            unknown = [region for region in regions if region not in self.regions]
+            if unknown:
+                raise KeyError(f"No files for regions {unknown}; available: {self.regions}")
+            files = files[files['region'].isin(regions)].reset_index(drop=True)
+        wanted = self.columns() if columns is None else [col for col in self.columns() if col in columns]
+        wanted = [col for col in wanted if col != 'Region']
+
+        offsets = np.concatenate([[0], np.cumsum(files['rows'].to_numpy())])
+        buffers = {}
+        for col in wanted:
+            if col == 'Timestamp':
+                buffers[col] = np.empty(offsets[-1], dtype=np.int64)
+            else:
+                buffers[col] = np.empty(offsets[-1], dtype=np.float32)
+
+        def fill(i):
+            path, region = files['path'][i], files['region'][i]
+            # A Region column in the file is read too, to check it against the partition
+            columns = [col for col in files['columns'][i] if col in wanted or col == 'Region']
+            try:
+                return _fill(path, region, columns, buffers, offsets[i], files['rows'][i])
+            except pa.ArrowInvalid:
+                # e.g. timestamps in another format; start over with the pandas parser
+                return _fill(path, region, columns, buffers, offsets[i], files['rows'][i], engine='c')
+
+        if max_workers is None:
+            max_workers = min(len(files), os.cpu_count() or 1)
+        if max_workers <= 1:
+            lengths = [fill(i) for i in range(len(files))]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                lengths = list(pool.map(fill, range(len(files))))
+
+        # Row counts of CSVs are upper bounds (blank lines); close any gaps left behind
+        end = 0
+        for i, n in enumerate(lengths):
+            if offsets[i] != end:
+                for values in buffers.values():
+                    values[end:end + n] = values[offsets[i]:offsets[i] + n]
+            end += n
+        columns = {col: values[:end] for col, values in buffers.items()}
+
+        for col in FLAG_COLUMNS:
+            if col in columns and _is_flag(columns[col]):
+                columns[col] = columns[col].astype(bool)
+
+        labels = list(dict.fromkeys(files['region']))
+        codes = np.empty(end, dtype=np.int8)
+        bounds = {}
+        start = 0
+        for code, region in enumerate(labels):
+            n = sum(n for n, file_region in zip(lengths, files['region']) if file_region == region)
+            codes[start:start + n] = code
+            bounds[region] = (start, start + n)
+            start += n
+        columns['Region'] = codes
+        return PartitionedDataset(columns, labels, bounds)
+
+    def partition(self, region, columns=None, max_workers=None):
+        """
+        One region's rows as a compact DataFrame, reading only that region's files
+        """
+        return self.read([region], columns, max_workers).to_frame()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load a directory of station files as a region-partitioned dataset')
+    parser.add_argument('directory', help='directory with the per-station CSV, Parquet or Feather files')
+    parser.add_argument('--regions', nargs='+', help='regions to load (default: all)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='reader threads (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    catalog = Catalog.scan(args.directory)
+    print(catalog.files[['path', 'region', 'rows']].to_string(index=False))
+
+    start = time.perf_counter()
+    dataset = catalog.read(args.regions, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"\nLoaded {len(dataset):,} rows ({dataset.nbytes / 1024 ** 2:,.1f} MB) in {elapsed:.2f}s")
+    for region, (start, stop) in dataset.bounds.items():
+        print(f"  {region}: rows {start:,}-{stop:,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,21 +2,119 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import zscore
-def summary_stats(df):
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    regional_stats = {}
-
-    for region in df['Region'].unique():
-        region_data = df[df['Region'] == region][numeric_cols]
-        stats = region_data.describe().round(2)
-        regional_stats[region] = stats
-        
+from scripts.ingest import calendar, numeric_columns
+from scripts.store import FORMATS, write_columnar
+from scripts.zscores import zscore_outliers, outlier_counts, column_mask
+from scripts.render import DENSITY_THRESHOLD, scatter_or_density
+from scripts.moments import CovarianceAccumulator
+from scripts.sketches import DESCRIBE_STATS, QuantileSketch, RegionSummary
+from scripts.wind import wind_histogram, polar_axes
+from scripts.resample import plot_resampled, resample
+
+# Union of the variables used by correlation, humidity_analysis and bubble_plot
+CORRELATION_VARS = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'Tamb', 'WS', 'WSgust', 'WD', 'RH', 'BP']
+
+
+def region_slices(df):
+    """
+    Row order that makes each Region contiguous, computed once with a stable sort
+
+    Args:
+        df: pandas DataFrame with a Region column
+    Returns:
+        (regions, order, bounds): region labels in order of appearance, the row
+        permutation grouping them, and slice boundaries so that region i
+        occupies order[bounds[i]:bounds[i + 1]]; rows without a Region are dropped
+    """
+    codes, regions = pd.factorize(df['Region'], sort=False)
+    if np.all(codes[1:] >= codes[:-1]):
+        # Regions already contiguous (e.g. station files read one after another); no sort needed
+        order = np.arange(len(codes))
+    else:
+        order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(regions) + 1))
+    return list(regions), order, bounds
+
+
+def region_stats(df, columns=None):
+    """
+    describe()-style statistics for every Region from one grouped pass
+
+    Rows are grouped by a single stable sort on the Region codes, then every
+    column is gathered once and described slice by slice, so the cost is
+    linear in rows instead of re-masking the full frame for each region.
+
+    Args:
+        df: pandas DataFrame with a Region column
+        columns: columns to describe (defaults to all numeric columns)
+    Returns:
+        pandas DataFrame indexed by (Region, stat) with one column per input column
+    """
+    numeric_cols = numeric_columns(df) if columns is None else columns
+    regions, order, bounds = region_slices(df)
+
+    stats = np.full((len(regions), len(DESCRIBE_STATS), len(numeric_cols)), np.nan)
+    for j, col in enumerate(numeric_cols):
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        for i in range(len(regions)):
+            v = values[bounds[i]:bounds[i + 1]]
+            v = v[~np.isnan(v)]
+            stats[i, 0, j] = len(v)
+            if len(v) == 0:
+                continue
+            stats[i, 1, j] = v.mean()
+            stats[i, 2, j] = v.std(ddof=1) if len(v) > 1 else np.nan
+            stats[i, 3, j], stats[i, 7, j] = v.min(), v.max()
+            stats[i, 4:7, j] = np.quantile(v, [0.25, 0.5, 0.75])
+
+    index = pd.MultiIndex.from_product([regions, DESCRIBE_STATS], names=['Region', 'stat'])
+    return pd.DataFrame(stats.reshape(-1, len(numeric_cols)), index=index, columns=numeric_cols)
+
+
+def region_missing(df):
+    """
+    Null counts and percentages per Region and column from one vectorized pass
+
+    Args:
+        df: pandas DataFrame with a Region column
+    Returns:
+        pandas DataFrame indexed by (Region, column) with 'Missing Values'
+        and 'Percentage Missing' columns
+    """
+    # Sorted region labels, the row order groupby('Region') gives the printed table
+    codes, regions = pd.factorize(df['Region'], sort=True)
+    # Rows without a Region are not counted towards any region, like groupby
+    keep = codes >= 0
+    codes = codes[keep]
+    sizes = np.bincount(codes, minlength=len(regions))
+
+    nulls = pd.DataFrame({
+        col: np.bincount(codes, weights=df[col].isnull().to_numpy()[keep], minlength=len(regions))
+        for col in df.columns
+    }, index=pd.Index(regions, name='Region')).astype(np.int64)
+    percentages = nulls.div(sizes, axis=0) * 100
+    return pd.DataFrame({
+        'Missing Values': nulls.stack(),
+        'Percentage Missing': percentages.stack().round(2)
+    })
+
+
+def summary_stats(df, approximate=False):
+    # approximate: quartiles from mergeable quantile sketches (sketches.py) instead of exact sorts,
+    # in memory independent of the row count; count, mean, std, min and max stay exact
+    if approximate:
+        stats = RegionSummary(numeric_columns(df)).update(df).describe().round(2)
+    else:
+        stats = region_stats(df).round(2)
+
+    for region in stats.index.unique(level='Region'):
         print(f"\nSummary Statistics for {region}:")
         print("=" * 80)
-        print(stats)
+        print(stats.loc[region])
         print("\n")
 
+    return stats
+
 def missing_values(df):
     missing_values = df.isnull().sum()
     missing_percentages = (missing_values / len(df) * 100).round(2)
@@ -32,13 +130,13 @@ def missing_values(df):
     print(missing_summary)
 
     # Check missing values by region
-    missing_by_region = df.groupby('Region').apply(
-        lambda x: x.isnull().sum()
-    ).round(2)
+    missing_by_region = region_missing(df)
 
     print("\nMissing Values by Region:")
     print("=" * 80) 
-    print(missing_by_region)
+    print(missing_by_region['Missing Values'].unstack())
+
+    return missing_summary, missing_by_region
 
 def negative_values(df):
     radiation_cols = ['GHI', 'DNI', 'DHI']
@@ -84,28 +182,30 @@ def negative_values(df):
 def outliers(df):
     z_score_threshold = 3
 
-    # Calculate z-scores for key measurements
+    # Flag |z-score| > 3 per region for key measurements (df is left unmodified)
     key_cols = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS']
-    for col in key_cols:
-        z_col = f'{col}_zscore'
-        df[z_col] = df.groupby('Region')[col].transform(lambda x: zscore(x))
-        
+    flags = zscore_outliers(df, key_cols, threshold=z_score_threshold, by='Region')
+
     # Identify outliers
-    outliers = pd.DataFrame()
-    for col in key_cols:
-        z_col = f'{col}_zscore'
-        outliers[col] = (abs(df[z_col]) > z_score_threshold).sum()
+    outliers = outlier_counts(flags, key_cols)
 
     print("Number of outliers detected (|z-score| > 3):")
     print("=" * 50)
-    print(outliers.T)
+    print(outliers)
 
-    # Visualize outlier distribution for key metrics
+    # Visualize outlier distribution for key metrics, from per-region arrays of one column at a time
+    regions, order, bounds = region_slices(df)
     plt.figure(figsize=(15, 8))
     for i, col in enumerate(['GHI', 'DNI', 'DHI']):
-        plt.subplot(1, 3, i+1)
-        sns.boxplot(data=df, x='Region', y=col)
+        ax = plt.subplot(1, 3, i+1)
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        groups = [v[~np.isnan(v)] for v in np.split(values, bounds[1:-1])]
+        ax.boxplot(groups, patch_artist=True, boxprops={'facecolor': 'C0'},
+                   medianprops={'color': 'black'}, flierprops={'marker': 'd', 'markersize': 4})
+        ax.set_xticks(range(1, len(regions) + 1), regions)
         plt.title(f'{col} Distribution with Outliers')
+        plt.xlabel('Region')
+        plt.ylabel(col)
         plt.xticks(rotation=45)
     plt.tight_layout()
     plt.show()
@@ -113,25 +213,38 @@ def outliers(df):
     # Print extreme outlier examples
     print("\nExample records with extreme outliers:")
     print("=" * 50)
-    extreme_outliers = df[
-        (abs(df['GHI_zscore']) > z_score_threshold) |
-        (abs(df['DNI_zscore']) > z_score_threshold) |
-        (abs(df['DHI_zscore']) > z_score_threshold)
-    ].head()
+    extreme_rows = np.flatnonzero(column_mask(flags, key_cols, ['GHI', 'DNI', 'DHI']))[:5]
+    extreme_outliers = df.iloc[extreme_rows]
     print(extreme_outliers[['Timestamp', 'Region', 'GHI', 'DNI', 'DHI']])
 
-def time_series(df):
-    # Extract month and hour from timestamp
-    df['Month'] = pd.to_datetime(df['Timestamp']).dt.month
-    df['Hour'] = pd.to_datetime(df['Timestamp']).dt.hour
-
-    # Calculate monthly averages
-    monthly_avg = df.groupby('Month').agg({
-        'GHI': 'mean',
-        'DNI': 'mean', 
-        'DHI': 'mean',
-        'Tamb': 'mean'
-    }).round(2)
+    return outliers
+
+def time_series(df, cube=None, freq=None):
+    # With a RollupCube the averages come from its pre-aggregated cells, not the raw rows
+    # freq (e.g. '1h', '1D' or 'auto') adds per-region series resampled to that bucket size
+    if cube is not None:
+        monthly_avg = cube.aggregate('Month', columns=['GHI', 'DNI', 'DHI', 'Tamb']).round(2)
+        hourly_avg = cube.aggregate('Hour', columns=['GHI', 'DNI', 'DHI', 'Tamb']).round(2)
+    else:
+        # Month and Hour come from the shared preparation stage (parsed at most once)
+        month = calendar(df, 'Month')
+        hour = calendar(df, 'Hour')
+
+        # Calculate monthly averages
+        monthly_avg = df.groupby(month).agg({
+            'GHI': 'mean',
+            'DNI': 'mean', 
+            'DHI': 'mean',
+            'Tamb': 'mean'
+        }).round(2)
+
+        # Calculate hourly averages for the daily patterns
+        hourly_avg = df.groupby(hour).agg({
+            'GHI': 'mean',
+            'DNI': 'mean',
+            'DHI': 'mean',
+            'Tamb': 'mean'
+        }).round(2)
 
     # Plot monthly patterns
     plt.figure(figsize=(15, 10))
@@ -164,13 +277,6 @@ def time_series(df):
     plt.show()
 
     # 2. Daily patterns
-    hourly_avg = df.groupby('Hour').agg({
-        'GHI': 'mean',
-        'DNI': 'mean',
-        'DHI': 'mean',
-        'Tamb': 'mean'
-    }).round(2)
-
     plt.figure(figsize=(15, 10))
 
     plt.subplot(2,2,1)
@@ -200,26 +306,114 @@ def time_series(df):
     plt.tight_layout()
     plt.show()
 
+    if freq is None:
+        return
 
-def cleaning_impact(df):
-    # Calculate average readings for the day before and after cleaning
-    df['Date'] = pd.to_datetime(df['Timestamp']).dt.date
-    cleaning_dates = df[df['Cleaning'] == 1]['Date'].unique()
+    # 3. Resampled series: one bucketed pass over the rows, so a year plots as thousands of points
+    resampled = resample(df, freq, columns=['GHI', 'Tamb'], dense=True)
+    freq = resampled.attrs['freq']
+    plt.figure(figsize=(15, 10))
 
-    before_after_df = pd.DataFrame()
-    for date in cleaning_dates:
-        # Get day before and day of cleaning
-        day_before = df[df['Date'] == date - pd.Timedelta(days=1)][['ModA', 'ModB']].mean()
-        day_of = df[df['Date'] == date][['ModA', 'ModB']].mean()
-        
-        before_after_df = pd.concat([before_after_df, pd.DataFrame({
-            'Day': ['Before', 'After'],
-            'ModA': [day_before['ModA'], day_of['ModA']],
-            'ModB': [day_before['ModB'], day_of['ModB']]
-        })])
+    plt.subplot(3,1,1)
+    plot_resampled(plt.gca(), resampled, 'GHI')
+    plt.title(f'GHI ({freq} mean)')
+    plt.ylabel('GHI (W/m²)')
+    plt.legend()
 
-    # Calculate averages
-    before_after_avg = before_after_df.groupby('Day')[['ModA', 'ModB']].mean()
+    plt.subplot(3,1,2)
+    plot_resampled(plt.gca(), resampled, 'GHI', stat='energy')
+    plt.title(f'GHI Energy per {freq} Bucket')
+    plt.ylabel('Energy (Wh/m²)')
+
+    plt.subplot(3,1,3)
+    plot_resampled(plt.gca(), resampled, 'Tamb')
+    plt.title(f'Temperature ({freq} mean)')
+    plt.xlabel('Time')
+    plt.ylabel('Temperature (°C)')
+
+    plt.tight_layout()
+    plt.show()
+
+
+def cleaning_events(df, window=1, by_region=False):
+    """
+    Mean ModA/ModB readings over the window days before and from each cleaning day
+
+    Daily sums and counts are accumulated with one bincount pass over the rows,
+    and the before/after windows are differences of their cumulative sums, so
+    the cost is linear in rows however many cleaning days there are.
+
+    Args:
+        df: pandas DataFrame with Timestamp, Cleaning, ModA and ModB columns
+        window: number of days on each side; 'Before' covers the window days
+            before the cleaning day, 'After' the cleaning day and the days after it
+        by_region: find cleaning days and average readings per Region
+    Returns:
+        pandas DataFrame indexed by cleaning Date (and Region) with
+        ('Before'|'After', sensor) columns
+    """
+    sensors = ['ModA', 'ModB']
+    dates = calendar(df, 'Date').to_numpy()
+    keep = ~np.isnat(dates)
+    if by_region:
+        region = df['Region'].astype('category')
+        labels = list(region.cat.categories)
+        codes = region.cat.codes.to_numpy()
+        keep &= codes >= 0
+    else:
+        labels = [None]
+        codes = np.zeros(len(df), dtype=np.int8)
+    if not keep.any():
+        return pd.DataFrame(columns=pd.MultiIndex.from_product([['Before', 'After'], sensors]))
+
+    start = dates[keep].min()
+    day = (dates[keep] - start) // np.timedelta64(1, 'D')
+    # Pad the calendar by window days on each side so every window stays in bounds
+    n_days = int(day.max()) + 1 + 2 * window
+    cell = codes[keep].astype(np.int64) * n_days + day + window
+    n_cells = len(labels) * n_days
+
+    cleaned = np.bincount(cell[df['Cleaning'].to_numpy()[keep] == 1], minlength=n_cells)
+    region_idx, pos = np.nonzero(cleaned.reshape(len(labels), n_days))
+
+    result = {}
+    for sensor in sensors:
+        values = df[sensor].to_numpy(dtype=np.float64)[keep]
+        valid = ~np.isnan(values)
+        sums = np.bincount(cell[valid], weights=values[valid], minlength=n_cells)
+        counts = np.bincount(cell[valid], minlength=n_cells).astype(np.float64)
+        # cum[:, t] holds the total over padded days [0, t)
+        cum_sums = np.zeros((len(labels), n_days + 1))
+        cum_counts = np.zeros((len(labels), n_days + 1))
+        np.cumsum(sums.reshape(len(labels), n_days), axis=1, out=cum_sums[:, 1:])
+        np.cumsum(counts.reshape(len(labels), n_days), axis=1, out=cum_counts[:, 1:])
+        for side, lo, hi in [('Before', pos - window, pos), ('After', pos, pos + window)]:
+            total = cum_sums[region_idx, hi] - cum_sums[region_idx, lo]
+            n = cum_counts[region_idx, hi] - cum_counts[region_idx, lo]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[(side, sensor)] = np.where(n > 0, total / n, np.nan)
+
+    event_dates = pd.DatetimeIndex(start + (pos - window) * np.timedelta64(1, 'D'), name='Date')
+    if by_region:
+        index = pd.MultiIndex.from_arrays([np.asarray(labels, dtype=object)[region_idx], event_dates],
+                                          names=['Region', 'Date'])
+    else:
+        index = event_dates
+    events = pd.DataFrame(result, index=index)
+    return events[[(side, sensor) for side in ['Before', 'After'] for sensor in sensors]]
+
+
+def cleaning_impact(df, window=1, by_region=False):
+    # Average readings over the window days before cleaning and from the cleaning day on
+    events = cleaning_events(df, window=window, by_region=by_region)
+
+    # Calculate averages across cleaning days
+    if by_region:
+        before_after_avg = events.groupby(level='Region').mean().stack(level=0, future_stack=True)
+        before_after_avg.index.names = ['Region', 'Day']
+    else:
+        before_after_avg = events.mean().unstack()
+        before_after_avg.index.name = 'Day'
 
     # Plot
     plt.figure(figsize=(10, 6))
@@ -238,19 +432,41 @@ def cleaning_impact(df):
     print(before_after_avg.round(2))
 
     # Calculate percentage change
-    pct_change = ((before_after_avg.loc['After'] - before_after_avg.loc['Before']) / before_after_avg.loc['Before'] * 100).round(2)
+    if by_region:
+        before = before_after_avg.xs('Before', level='Day')
+        after = before_after_avg.xs('After', level='Day')
+    else:
+        before, after = before_after_avg.loc['Before'], before_after_avg.loc['After']
+    pct_change = ((after - before) / before * 100).round(2)
     print("\nPercentage Change After Cleaning:")
     print("=" * 50)
     print(pct_change)
 
-def correlation(df):
-    # Create correlation matrix for solar and temperature variables
+    return before_after_avg
+
+def correlation_stats(df, columns=CORRELATION_VARS):
+    """
+    One-pass covariance accumulator over every variable the correlation views use
+
+    Pass the result as stats= to correlation, humidity_analysis and bubble_plot
+    so they slice their matrices from it instead of rescanning the frame.
+    Accumulators for separate chunks, files or regions can be combined with merge().
+    """
+    return CovarianceAccumulator([col for col in columns if col in df.columns]).update(df)
+
+
+def correlation(df, stats=None):
+    # Both matrices are sliced from one accumulator over the union of their variables
     solar_temp_vars = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'Tamb']
-    solar_temp_corr = df[solar_temp_vars].corr()
+    wind_solar_vars = ['GHI', 'DNI', 'DHI', 'WS', 'WSgust', 'WD']
+    if stats is None:
+        stats = correlation_stats(df, solar_temp_vars + ['WS', 'WSgust', 'WD'])
+
+    # Create correlation matrix for solar and temperature variables
+    solar_temp_corr = stats.corr(solar_temp_vars)
 
     # Create correlation matrix for wind and solar variables 
-    wind_solar_vars = ['GHI', 'DNI', 'DHI', 'WS', 'WSgust', 'WD']
-    wind_solar_corr = df[wind_solar_vars].corr()
+    wind_solar_corr = stats.corr(wind_solar_vars)
 
     # Set up the figure with two subplots
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -276,40 +492,37 @@ def correlation(df):
 
     # Create pair plots for deeper analysis
     # Solar and temperature variables
-    sns.pairplot(df[solar_temp_vars].sample(1000),
+    sns.pairplot(df.sample(1000)[solar_temp_vars],
                 diag_kind='kde')
     plt.suptitle('Solar Radiation vs Temperature Relationships', y=1.02)
     plt.show()
 
     # Wind and solar variables
-    sns.pairplot(df[wind_solar_vars].sample(1000),
+    sns.pairplot(df.sample(1000)[wind_solar_vars],
                 diag_kind='kde')
     plt.suptitle('Wind vs Solar Radiation Relationships', y=1.02)
     plt.show()
 
-def wind_analysis(df):
-    # Wind Analysis
-    plt.figure(figsize=(15, 5))
+def wind_analysis(df, n_sectors=36):
+    # Wind Analysis: one binning pass gives frequency, mean speed and variability per 10° sector
+    sectors, _ = wind_histogram(df, n_sectors=n_sectors)
+    theta = np.radians(sectors.index.to_numpy(dtype=np.float64))
+    width = 2 * np.pi / n_sectors
+    fig = plt.figure(figsize=(15, 5))
 
     # Wind Rose Plot
-    ax1 = plt.subplot(131, projection='polar')
-    wind_freq = df.groupby('WD').size()
-    theta = np.radians(wind_freq.index)
-    ax1.bar(theta, wind_freq.values, width=np.radians(10), alpha=0.5)
+    ax1 = polar_axes(fig, 131)
+    ax1.bar(theta, sectors['count'], width=width, alpha=0.5)
     ax1.set_title('Wind Direction Distribution')
 
     # Wind Speed Distribution by Direction
-    ax2 = plt.subplot(132, projection='polar')
-    mean_speed = df.groupby('WD')['WS'].mean()
-    theta = np.radians(mean_speed.index)
-    ax2.bar(theta, mean_speed.values, width=np.radians(10), alpha=0.5)
+    ax2 = polar_axes(fig, 132)
+    ax2.bar(theta, sectors['mean_speed'].fillna(0), width=width, alpha=0.5)
     ax2.set_title('Average Wind Speed by Direction')
 
     # Wind Direction Variability
-    ax3 = plt.subplot(133, projection='polar')
-    direction_std = df.groupby('WD')['WDstdev'].mean()
-    theta = np.radians(direction_std.index)
-    ax3.bar(theta, direction_std.values, width=np.radians(10), alpha=0.5)
+    ax3 = polar_axes(fig, 133)
+    ax3.bar(theta, sectors['mean_wdstdev'].fillna(0), width=width, alpha=0.5)
     ax3.set_title('Wind Direction Variability')
 
     plt.tight_layout()
@@ -321,29 +534,32 @@ def wind_analysis(df):
     print(f"Average Wind Speed: {df['WS'].mean():.2f} m/s")
     print(f"Maximum Wind Speed: {df['WS'].max():.2f} m/s")
     print(f"Maximum Wind Gust: {df['WSgust'].max():.2f} m/s")
-    print(f"\nPredominant Wind Direction: {df.groupby('WD').size().idxmax():.1f}°")
+    print(f"\nPredominant Wind Direction: {sectors['count'].idxmax():.1f}°")
     print(f"Average Direction Variability: {df['WDstdev'].mean():.2f}°")
+    return sectors
 
 
-def humidity_analysis(df):
-    # Create scatter plots to examine RH relationships
+def humidity_analysis(df, density_threshold=DENSITY_THRESHOLD, stats=None):
+    # Create scatter plots to examine RH relationships (density images above density_threshold rows)
     plt.figure(figsize=(15, 10))
 
-    plt.subplot(2,2,1)
-    plt.scatter(df['RH'], df['Tamb'], alpha=0.5)
+    ax = plt.subplot(2,2,1)
+    scatter_or_density(ax, df['RH'], df['Tamb'], threshold=density_threshold)
     plt.title('Relative Humidity vs Ambient Temperature')
     plt.xlabel('Relative Humidity (%)')
     plt.ylabel('Temperature (°C)')
 
-    plt.subplot(2,2,2)
-    plt.scatter(df['RH'], df['GHI'], alpha=0.5)
+    ax = plt.subplot(2,2,2)
+    scatter_or_density(ax, df['RH'], df['GHI'], threshold=density_threshold)
     plt.title('Relative Humidity vs Global Horizontal Irradiance')
     plt.xlabel('Relative Humidity (%)')
     plt.ylabel('GHI (W/m²)')
 
-    plt.subplot(2,2,3)
-    plt.scatter(df['RH'], df['TModA'], alpha=0.5, label='Module A')
-    plt.scatter(df['RH'], df['TModB'], alpha=0.5, label='Module B')
+    ax = plt.subplot(2,2,3)
+    scatter_or_density(ax, df['RH'], df['TModA'], threshold=density_threshold,
+                       cmap='Blues', label='Module A')
+    scatter_or_density(ax, df['RH'], df['TModB'], threshold=density_threshold,
+                       cmap='Oranges', label='Module B')
     plt.title('Relative Humidity vs Module Temperatures')
     plt.xlabel('Relative Humidity (%)')
     plt.ylabel('Temperature (°C)')
@@ -351,7 +567,7 @@ def humidity_analysis(df):
 
     # Calculate average temperature metrics by RH bins
     rh_bins = pd.cut(df['RH'], bins=10)
-    avg_by_rh = df.groupby(rh_bins)[['Tamb', 'TModA', 'TModB', 'GHI']].mean()
+    avg_by_rh = df.groupby(rh_bins, observed=False)[['Tamb', 'TModA', 'TModB', 'GHI']].mean()
     avg_by_rh[['Tamb', 'TModA', 'TModB']].plot(kind='line', marker='o')
     plt.title('Average Temperatures by RH Range')
     plt.xlabel('Relative Humidity Range')
@@ -366,7 +582,9 @@ def humidity_analysis(df):
     print("\nCorrelation Analysis:")
     print("=" * 50)
     corr_vars = ['RH', 'Tamb', 'TModA', 'TModB', 'GHI']
-    correlations = df[corr_vars].corr()['RH'].sort_values(ascending=False)
+    if stats is None:
+        stats = correlation_stats(df, corr_vars)
+    correlations = stats.corr(corr_vars)['RH'].sort_values(ascending=False)
     print("\nCorrelations with Relative Humidity:")
     print(correlations.round(3))
 
@@ -422,28 +640,29 @@ def distribution_analysis(df):
     print("\nDistribution Statistics:")
     print("=" * 50)
     variables = ['GHI', 'DNI', 'DHI', 'Tamb', 'TModA', 'TModB', 'WS']
-    print(df[variables].describe().round(2))
+    # Column by column: describe() on df[variables] would copy all of them first
+    print(pd.DataFrame({var: df[var].describe() for var in variables}).round(2))
 
 
 def z_score_analysis(df):
-    # Calculate z-scores for key variables
+    # Calculate z-scores for key variables one column at a time, keeping only the extreme counts
     variables = ['GHI', 'DNI', 'DHI', 'Tamb', 'TModA', 'TModB', 'WS', 'RH']
-    z_scores = pd.DataFrame()
-
-    for var in variables:
-        z_scores[f'{var}_zscore'] = (df[var] - df[var].mean()) / df[var].std()
+    extreme_counts = {}
 
     # Plot z-score distributions
     plt.figure(figsize=(15, 10))
 
     for i, var in enumerate(variables, 1):
+        z_score = (df[var] - df[var].mean()) / df[var].std()
+        extreme_counts[var] = (abs(z_score) > 3).sum()
         plt.subplot(2, 4, i)
-        plt.hist(z_scores[f'{var}_zscore'], bins=50, alpha=0.7)
+        plt.hist(z_score, bins=50, alpha=0.7)
         plt.axvline(x=3, color='r', linestyle='--', alpha=0.5, label='±3 SD')
         plt.axvline(x=-3, color='r', linestyle='--', alpha=0.5)
         plt.title(f'{var} Z-Score Distribution')
         plt.xlabel('Z-Score')
         plt.ylabel('Frequency')
+        del z_score
         
     plt.tight_layout()
     plt.show()
@@ -452,11 +671,11 @@ def z_score_analysis(df):
     print("\nExtreme Value Analysis (|Z-Score| > 3):")
     print("=" * 50)
     for var in variables:
-        extreme_count = (abs(z_scores[f'{var}_zscore']) > 3).sum()
-        extreme_pct = (extreme_count / len(z_scores) * 100).round(2)
+        extreme_count = extreme_counts[var]
+        extreme_pct = (extreme_count / len(df) * 100).round(2)
         print(f"{var}: {extreme_count} points ({extreme_pct}%) beyond ±3 standard deviations")
 
-def bubble_plot(df):
+def bubble_plot(df, stats=None):
     # Create bubble plots to explore multivariate relationships
     plt.figure(figsize=(15, 5))
 
@@ -491,52 +710,81 @@ def bubble_plot(df):
     corr_vars = ['GHI', 'Tamb', 'WS', 'RH', 'BP']
     print("\nCorrelation Matrix:")
     print("=" * 50)
-    print(df[corr_vars].corr().round(3))
-
-
-def data_cleaning(df):
-    # Drop the Comments column since it's entirely null
-    df = df.drop('Comments', axis=1)
-
-    # Handle negative irradiance values (physically impossible)
-    df.loc[df['GHI'] < 0, 'GHI'] = 0
-    df.loc[df['DNI'] < 0, 'DNI'] = 0 
-    df.loc[df['DHI'] < 0, 'DHI'] = 0
+    if stats is None:
+        stats = correlation_stats(df, corr_vars)
+    print(stats.corr(corr_vars).round(3))
+
+
+def _ffill_source(missing, limit):
+    # Row each value comes from after a forward fill of at most limit consecutive gaps
+    pos = np.arange(len(missing))
+    last = np.where(missing, -1, pos)
+    np.maximum.accumulate(last, out=last)
+    return np.where(missing & (last >= 0) & (pos - last <= limit), last, pos)
+
+
+def _cleaned_column(series, clip_negative=False, limit=3, approximate=False):
+    # One column with the data_cleaning fill rules applied; returns a new Series, the input is untouched
+    # approximate: fill numeric gaps with a quantile-sketch median instead of an exact one
+    values = series
+    if clip_negative:
+        values = values.mask(values < 0, 0)
+    missing = values.isna().to_numpy()
+    if missing.any():
+        values = values.take(_ffill_source(missing, limit))
+        if values.isna().any():
+            # Remaining gaps: median for numeric columns, mode for text and categories
+            if pd.api.types.is_numeric_dtype(values.dtype):
+                median = QuantileSketch(seed=0).update(values.to_numpy()).median() if approximate \
+                    else values.median()
+                values = values.fillna(median)
+            elif values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+                mode = values.mode()
+                if len(mode):
+                    values = values.fillna(mode.iloc[0])
+    return values
+
+
+def data_cleaning(df, output_format='csv', output_path=None, approximate=False):
+    # output_format: 'csv', 'parquet' or 'feather'; columnar output reopens without a CSV parse
+    # approximate: impute with sketch medians (rank error about 0.4%) in constant memory per column
+    # Cleans one column at a time and only materialises the surviving rows, so the
+    # input frame is left unmodified and no full-size cleaned copy of it is built
+    columns = [col for col in df.columns if col != 'Comments']  # Comments is entirely null
+    irradiance_cols = ['GHI', 'DNI', 'DHI']  # negative irradiance is physically impossible
+
+    def cleaned(col):
+        return _cleaned_column(df[col], clip_negative=col in irradiance_cols, approximate=approximate)
 
     # Handle missing values
     print("\nMissing Values Before Cleaning:")
-    print(df.isnull().sum())
-
-    # Forward fill small gaps in time series data
-    df = df.fillna(method='ffill', limit=3)
-
-    # For any remaining missing values, use median for numeric columns
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
-
-    # For categorical columns like Region, fill with mode
-    categorical_cols = df.select_dtypes(include=['object']).columns
-    df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
-
-    print("\nMissing Values After Cleaning:")
-    print(df.isnull().sum())
+    print(pd.Series({col: df[col].isnull().sum() for col in columns}))
 
-    # Remove outliers using Z-score method
+    # Remove outliers using Z-score method, on the cleaned values of the screened variables
     variables = ['GHI', 'DNI', 'DHI', 'Tamb', 'TModA', 'TModB', 'WS', 'RH']
-    z_scores = pd.DataFrame()
+    screened = pd.DataFrame({col: cleaned(col).to_numpy() for col in variables}, copy=False)
+    keep = np.flatnonzero(zscore_outliers(screened, variables, threshold=3, by=None, ddof=1) == 0)
+    del screened
+
+    # Remove duplicate timestamps (first occurrence wins), then sort by timestamp
+    timestamps = pd.Series(cleaned('Timestamp').take(keep).to_numpy(), index=keep)
+    timestamps = timestamps[~timestamps.duplicated(keep='first').to_numpy()].sort_values()
+    rows = timestamps.index.to_numpy()
+    index = df.index[rows]
+
+    # Gather the surviving rows of each cleaned column
+    remaining = {}
+    output = {}
+    for col in columns:
+        values = cleaned(col)
+        remaining[col] = values.isnull().sum()
+        values = values.take(rows)
+        values.index = index
+        output[col] = values
+    combined_df_cleaned = pd.DataFrame(output, copy=False)
 
-    for var in variables:
-        z_scores[f'{var}_zscore'] = (df[var] - df[var].mean()) / df[var].std()
-        
-    # Create mask for rows to keep (z-score within ±3)
-    mask = np.all(np.abs(z_scores) <= 3, axis=1)
-    combined_df_cleaned = df[mask].copy()
-
-    # Remove duplicate timestamps
-    combined_df_cleaned = combined_df_cleaned.drop_duplicates(subset=['Timestamp'])
-
-    # Sort by timestamp
-    combined_df_cleaned = combined_df_cleaned.sort_values('Timestamp')
+    print("\nMissing Values After Cleaning:")
+    print(pd.Series(remaining))
 
     # Print summary of changes made
     print("\nData Cleaning Summary:")
@@ -547,13 +795,19 @@ def data_cleaning(df):
     print(f"- Filled categorical missing values with mode")
     print(f"- Removed outliers (|z-score| > 3)")
     print(f"- Removed duplicate timestamps")
-    print(f"\nOriginal dataset shape: {df.shape}")
+    print(f"\nOriginal dataset shape: {(len(df), len(columns))}")
     print(f"Final dataset shape: {combined_df_cleaned.shape}")
-    print(f"Total rows removed: {df.shape[0] - combined_df_cleaned.shape[0]}")
-
-    # Save the cleaned dataset to CSV
-    combined_df_cleaned.to_csv('../data/combined_df_cleaned.csv', index=False)
-    print("\nCleaned dataset saved to '../data/combined_df_cleaned.csv'")
+    print(f"Total rows removed: {len(df) - combined_df_cleaned.shape[0]}")
+
+    # Save the cleaned dataset
+    if output_path is None:
+        output_path = '../data/combined_df_cleaned' + FORMATS.get(output_format, '.csv')
+    if output_format == 'csv':
+        combined_df_cleaned.to_csv(output_path, index=False)
+    else:
+        write_columnar(combined_df_cleaned, output_path, output_format)
+    print(f"\nCleaned dataset saved to '{output_path}'")
+    return combined_df_cleaned
 
 
 
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from scripts.ingest import CALENDAR_COLUMNS, NUMERIC_COLUMNS, timestamps
+
+# 0/1 channels that fit in one byte per row when they have no gaps
+FLAG_COLUMNS = ['Cleaning']
+
+# Sensor channels stored as float32 (instrument precision is far below float32 resolution)
+SENSOR_COLUMNS = [col for col in NUMERIC_COLUMNS if col not in FLAG_COLUMNS]
+
+
+def _is_flag(values):
+    # NaN compares unequal to both 0 and 1, so gaps keep the float representation
+    return bool(((values == 0) | (values == 1)).all())
+
+
+def _float32(series):
+    if series.dtype == np.float32:
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float32, na_value=np.nan)
+
+
+def _region_codes(region):
+    categorical = pd.Categorical(region)
+    categories = list(categorical.categories)
+    dtype = np.int8 if len(categories) < 127 else np.int16 if len(categories) < 32767 else np.int32
+    return categorical.codes.astype(dtype, copy=False), categories
+
+
+class Dataset:
+    """
+    Compact column store for station data
+
+    Sensor channels are float32, 0/1 flags such as Cleaning are bool, Region
+    is held as small integer codes plus the region labels and Timestamp as
+    int64 nanoseconds since the epoch. to_frame() wraps the arrays in a
+    DataFrame without copying them, with the dtypes the analysis and dashboard
+    functions already accept (float32, bool, categorical and datetime64).
+    Calendar columns added by prepare() are not stored; they are derived again
+    on demand.
+    """
+
+    def __init__(self, columns, regions=None, index=None):
+        # columns: name -> NumPy array in storage form, in frame order
+        self.columns = columns
+        self.regions = regions
+        self.index = index
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build a compact dataset from a frame, converting only the columns not already compact
+
+        Args:
+            df: pandas DataFrame with (a subset of) the station columns; it is not modified
+        Returns:
+            Dataset
+        """
+        columns = {}
+        regions = None
+        for col in df.columns:
+            if col in CALENDAR_COLUMNS:
+                continue
+            series = df[col]
+            if col == 'Timestamp':
+                values = timestamps(df).to_numpy()
+                columns[col] = values.astype('datetime64[ns]', copy=False).view(np.int64)
+            elif col == 'Region':
+                columns[col], regions = _region_codes(series)
+            elif col in FLAG_COLUMNS or col in SENSOR_COLUMNS:
+                values = _float32(series)
+                if col in FLAG_COLUMNS and _is_flag(values):
+                    values = values.astype(bool)
+                columns[col] = values
+            else:
+                # Columns outside the schema (e.g. Comments) are carried as they are
+                columns[col] = series.to_numpy()
+        index = None if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 \
+            and df.index.step == 1 else df.index
+        return cls(columns, regions, index)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def to_frame(self):
+        """
+        DataFrame view over the stored arrays, without copying them
+        """
+        data = {}
+        for col, values in self.columns.items():
+            if col == 'Timestamp':
+                data[col] = values.view('datetime64[ns]')
+            elif col == 'Region':
+                data[col] = pd.Categorical.from_codes(values, self.regions)
+            else:
+                data[col] = values
+        return pd.DataFrame(data, index=self.index, copy=False)
+
+    def memory_usage(self):
+        """
+        Bytes held per column (object columns count their pointers only)
+        """
+        return pd.Series({col: values.nbytes for col, values in self.columns.items()}, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return int(self.memory_usage().sum())
+
+
+def downcast(df):
+    """
+    Compact version of a station frame: float32 sensors, bool flags, categorical Region
+
+    Columns that are already compact are reused without copying, so applying
+    it to a frame from load_csv or the columnar store only converts Cleaning.
+    Calendar columns from prepare() are dropped; call prepare() on the result
+    to add them back.
+
+    Args:
+        df: pandas DataFrame with (a subset of) the station columns; it is not modified
+    Returns:
+        pandas DataFrame
+    """
+    return Dataset.from_frame(df).to_frame()
@@ -0,0 +1,214 @@
+"""
+Incremental cleaning for station data that arrives in small batches
+
+Each appended batch is cleaned with the data_cleaning rules against running
+state kept on disk (medians, z-score moments, forward-fill tails, the set of
+timestamps already written, per-region summary sketches and the rollup cube),
+so an append costs time proportional to the batch rather than the history.
+
+Usage:
+    python -m scripts.incremental state/benin data/benin_0905.csv data/benin_0910.csv --summary
+"""
+import argparse
+import glob
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.ingest import CALENDAR_COLUMNS, load_csv, numeric_columns, timestamps
+from scripts.rollup import RollupCube
+from scripts.sketches import RegionSummary
+from scripts.store import read_columnar, write_columnar
+from scripts.streaming import (ZSCORE_COLUMNS, CleaningStats, ForwardFill, TimestampSet,
+                               _clean_chunk, _clip_irradiance)
+
+STATE_FILE = 'state.pkl'
+PARTS_DIR = 'cleaned'
+SEEN_DIR = 'seen'
+CUBE_DIR = 'cube'
+
+class IncrementalCleaner:
+    """
+    Append-only version of data_cleaning whose running state lives in a directory
+
+    Every batch goes through the same steps as clean_csv: negative irradiance
+    is clipped, gaps are forward filled (the tail of the previous batch is
+    carried over), remaining gaps take the running medians and the running
+    Region mode, rows more than 3 standard deviations from the running means
+    are dropped, and timestamps already written are skipped. Cleaned rows are
+    written as one Parquet part per batch under cleaned/, and the per-region
+    summary is updated from them. The rollup cells of each batch are written
+    to cube/ next to its part and only combined when the cube is read, so an
+    append never rewrites the cells of earlier batches.
+
+    Rows are cleaned with the statistics known when they arrive and are not
+    revisited later, so the existing history should be appended first, as one
+    batch, before the stream of small batches.
+    """
+
+    def __init__(self, state_dir, sketch_k=400):
+        self.state_dir = state_dir
+        self.sketch_k = sketch_k
+        self.stats = None
+        self.summary = None
+        self._cube = None
+        self._cube_parts = []
+        self.ffill = ForwardFill()
+        self.seen = TimestampSet()
+        self.batches = 0
+        self.rows_in = 0
+        self.rows_out = 0
+
+    @classmethod
+    def open(cls, state_dir, sketch_k=400):
+        """
+        Resume from the state saved in state_dir, or start an empty state there
+        """
+        path = os.path.join(state_dir, STATE_FILE)
+        if not os.path.exists(path):
+            return cls(state_dir, sketch_k)
+        with open(path, 'rb') as f:
+            cleaner = pickle.load(f)
+        cleaner.state_dir = state_dir
+        runs = [np.load(run) for run in glob.glob(os.path.join(state_dir, SEEN_DIR, '*.npy'))]
+        cleaner.seen.runs = sorted(runs, key=len, reverse=True)
+        return cleaner
+
+    def __getstate__(self):
+        # The timestamp runs and cube cells are saved as separate files, so a save only writes the new ones
+        state = self.__dict__.copy()
+        state['seen'] = TimestampSet()
+        state['_cube'] = None
+        state['_cube_parts'] = []
+        return state
+
+    def append(self, batch):
+        """
+        Clean one batch of new rows and fold it into the running state
+
+        Args:
+            batch: pandas DataFrame with the load_csv schema; it is not modified
+        Returns:
+            pandas DataFrame with the cleaned rows that were added
+        """
+        drop = [col for col in CALENDAR_COLUMNS + ['Comments'] if col in batch.columns]
+        batch = batch.drop(columns=drop)
+        batch['Timestamp'] = timestamps(batch)
+        batch = self.ffill(_clip_irradiance(batch))
+
+        if self.stats is None:
+            zscore_columns = [col for col in ZSCORE_COLUMNS if col in batch.columns]
+            self.stats = CleaningStats(numeric_columns(batch), zscore_columns, k=self.sketch_k)
+            self.summary = RegionSummary(self.stats.numeric_columns, k=self.sketch_k)
+        missing = [col for col in self.stats.numeric_columns if col not in batch.columns]
+        if missing:
+            raise ValueError(f"Batch is missing columns: {missing}")
+        self.stats.update(batch)
+        self.stats.finalize()
+
+        cleaned = _clean_chunk(batch, self.stats, self.seen)
+        if len(cleaned):
+            parts_dir = os.path.join(self.state_dir, PARTS_DIR)
+            os.makedirs(parts_dir, exist_ok=True)
+            write_columnar(cleaned, os.path.join(parts_dir, f"part-{self.batches:06d}.parquet"))
+            self.summary.update(cleaned)
+            cube_dir = os.path.join(self.state_dir, CUBE_DIR)
+            os.makedirs(cube_dir, exist_ok=True)
+            # Pickled, as Parquet cannot hold the (stat, column) column labels
+            RollupCube.build(cleaned).cells.to_pickle(os.path.join(cube_dir, f"part-{self.batches:06d}.pkl"))
+
+        self.batches += 1
+        self.rows_in += len(batch)
+        self.rows_out += len(cleaned)
+        self.save()
+        return cleaned
+
+    def append_csv(self, source):
+        """
+        Load a station CSV with load_csv and append it as one batch
+        """
+        return self.append(load_csv(source))
+
+    def save(self):
+        """
+        Write the running state to state_dir
+        """
+        seen_dir = os.path.join(self.state_dir, SEEN_DIR)
+        os.makedirs(seen_dir, exist_ok=True)
+        # Runs are immutable and disjoint, so their first timestamp and size name them
+        wanted = {f"{run[0]}-{len(run)}.npy": run for run in self.seen.runs}
+        for name, run in wanted.items():
+            path = os.path.join(seen_dir, name)
+            if not os.path.exists(path):
+                tmp_path = f"{path}.tmp-{os.getpid()}"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, run)
+                os.replace(tmp_path, path)
+
+        path = os.path.join(self.state_dir, STATE_FILE)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+        # Runs merged away are only removed once the new state is in place
+        for path in glob.glob(os.path.join(seen_dir, '*.npy')):
+            if os.path.basename(path) not in wanted:
+                os.remove(path)
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.state_dir, PARTS_DIR, 'part-*.parquet')))
+
+    @property
+    def cube(self):
+        """
+        RollupCube of all cleaned rows, or None before any row was kept
+
+        Combined from the per-batch cells on first use; later reads only add
+        the batches appended since.
+        """
+        paths = sorted(glob.glob(os.path.join(self.state_dir, CUBE_DIR, 'part-*.pkl')))
+        new = [path for path in paths if path not in self._cube_parts]
+        if new:
+            cubes = [RollupCube(pd.read_pickle(path)) for path in new]
+            self._cube = RollupCube.concat(([self._cube] if self._cube is not None else []) + cubes)
+            self._cube_parts += new
+        return self._cube
+
+    def cleaned(self, columns=None):
+        """
+        All cleaned rows written so far, read back from the Parquet parts
+        """
+        parts = [read_columnar(path, columns) for path in self.parts()]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Append new station batches to an incrementally cleaned dataset')
+    parser.add_argument('state_dir', help='directory holding the running state and cleaned parts')
+    parser.add_argument('sources', nargs='+', help='CSV batches to append, in arrival order')
+    parser.add_argument('--summary', action='store_true', help='print the per-region summary afterwards')
+    args = parser.parse_args(argv)
+
+    cleaner = IncrementalCleaner.open(args.state_dir)
+    for source in args.sources:
+        start = time.perf_counter()
+        cleaned = cleaner.append_csv(source)
+        print(f"{source}: {len(cleaned)} rows kept in {time.perf_counter() - start:.2f}s")
+    print(f"Total: {cleaner.rows_in} rows in, {cleaner.rows_out} rows out over {cleaner.batches} batches")
+
+    if args.summary and cleaner.summary is not None:
+        stats = cleaner.summary.describe().round(2)
+        for region in stats.index.unique(level='Region'):
+            print(f"\nSummary Statistics for {region}:")
+            print("=" * 80)
+            print(stats.loc[region])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional, the pandas C parser is used instead
+    pa = None
+
+# Minute-level station exports, e.g. "2021-08-09 00:01"
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M'
+
+# Sensor channels, stored as float32: instrument precision is far below float32 resolution
+NUMERIC_COLUMNS = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WSgust',
+                   'WSstdev', 'WD', 'WDstdev', 'BP', 'Cleaning', 'Precipitation',
+                   'TModA', 'TModB']
+
+# Known column set in file order; anything else in the file (e.g. Comments) is not loaded
+SCHEMA_COLUMNS = ['Timestamp'] + NUMERIC_COLUMNS + ['Region']
+
+
+def _header(source):
+    """
+    Read the CSV header of a path or file object without consuming the file
+    """
+    if hasattr(source, 'read'):
+        position = source.tell()
+        line = source.readline()
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            line = f.readline()
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig')
+    return [name.strip().strip('"') for name in line.strip().split(',')]
+
+
+def _parse_timestamps(values):
+    # The explicit format avoids per-row format inference; fall back for other exports
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, format='ISO8601')
+
+
+def _pandas_dtypes(columns):
+    dtype = {col: np.float32 for col in columns if col in NUMERIC_COLUMNS}
+    if 'Region' in columns:
+        dtype['Region'] = 'category'
+    return dtype
+
+
+def _read_pandas(source, columns):
+    df = pd.read_csv(source, usecols=columns, dtype=_pandas_dtypes(columns), engine='c')
+    if 'Timestamp' in df.columns:
+        df['Timestamp'] = _parse_timestamps(df['Timestamp'])
+    return df
+
+
+def _pyarrow_options(columns):
+    column_types = {col: pa.float32() for col in columns if col in NUMERIC_COLUMNS}
+    if 'Region' in columns:
+        column_types['Region'] = pa.dictionary(pa.int32(), pa.string())
+    if 'Timestamp' in columns:
+        column_types['Timestamp'] = pa.timestamp('ns')
+    return pa_csv.ConvertOptions(column_types=column_types,
+                                 include_columns=columns,
+                                 timestamp_parsers=[TIMESTAMP_FORMAT])
+
+
+def _read_pyarrow(source, columns):
+    table = pa_csv.read_csv(source, convert_options=_pyarrow_options(columns))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_csv(source, columns=None, engine=None):
+    """
+    Load a station CSV export with an explicit schema
+
+    Numeric sensor columns are read as float32, Region as a categorical and
+    Timestamp is parsed once with TIMESTAMP_FORMAT. Columns outside the schema
+    (e.g. Comments) are skipped while parsing instead of being dropped afterwards.
+
+    Args:
+        source: path or binary file object with CSV data
+        columns: subset of SCHEMA_COLUMNS to load (defaults to all present in the file)
+        engine: 'pyarrow' or 'c'; defaults to pyarrow when it is installed
+    Returns:
+        pandas DataFrame with typed columns in file order
+    """
+    header = _header(source)
+    wanted = SCHEMA_COLUMNS if columns is None else columns
+    columns = [col for col in header if col in wanted]
+
+    if engine is None:
+        engine = 'pyarrow' if pa is not None else 'c'
+    if engine == 'pyarrow':
+        if pa is None:
+            raise ImportError("pyarrow is required for engine='pyarrow'")
+        # Where a file object starts, so the fallback re-reads the same bytes
+        position = source.tell() if hasattr(source, 'tell') else None
+        try:
+            return _read_pyarrow(source, columns)
+        except pa.ArrowInvalid:
+            # e.g. timestamps in another format; retry with the pandas parser
+            if position is not None:
+                source.seek(position)
+    return _read_pandas(source, columns)
+
+
+def iter_csv(source, chunksize=500_000, columns=None):
+    """
+    Read a station CSV in typed chunks, for files that do not fit in memory
+
+    Chunks use the same schema as load_csv; row labels continue across chunks.
+
+    Args:
+        source: path or file object with CSV data
+        chunksize: number of rows per chunk
+        columns: subset of SCHEMA_COLUMNS to load (defaults to all present in the file)
+    Yields:
+        pandas DataFrame chunks
+    """
+    header = _header(source)
+    wanted = SCHEMA_COLUMNS if columns is None else columns
+    columns = [col for col in header if col in wanted]
+    with pd.read_csv(source, usecols=columns, dtype=_pandas_dtypes(columns),
+                     engine='c', chunksize=chunksize) as reader:
+        for chunk in reader:
+            if 'Timestamp' in chunk.columns:
+                chunk['Timestamp'] = _parse_timestamps(chunk['Timestamp'])
+            yield chunk
+
+
+# Calendar columns derived from Timestamp by prepare()
+CALENDAR_COLUMNS = ['Month', 'Hour', 'Date']
+
+
+def timestamps(df):
+    """
+    Timestamp column as datetime64, parsing it only if it is still text
+    """
+    ts = df['Timestamp']
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        return ts
+    return pd.Series(_parse_timestamps(ts), index=df.index, name='Timestamp')
+
+
+def numeric_columns(df):
+    """
+    Names of the numeric columns, like select_dtypes(include=np.number)
+
+    Boolean columns count as numeric too, so a Cleaning flag stored as bool
+    (see dataset.downcast) is described like its float form. Reads only the
+    dtypes; select_dtypes would also copy the selected data.
+    """
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
+
+
+def datetime_index(df):
+    """
+    DatetimeIndex over the rows of df, built from the parsed Timestamp column
+    """
+    return pd.DatetimeIndex(timestamps(df))
+
+
+def _derive(ts, name):
+    if name == 'Month':
+        return ts.dt.month.astype(np.int8)
+    if name == 'Hour':
+        return ts.dt.hour.astype(np.int8)
+    if name == 'Date':
+        return ts.dt.normalize()
+    raise KeyError(f"Unknown calendar column: {name}")
+
+
+def prepare(df):
+    """
+    Parse Timestamp once and cache the derived calendar columns on the frame
+
+    Adds Month and Hour (int8) and Date (datetime64 at midnight) in place so
+    analysis functions can group on them without re-parsing timestamp strings.
+
+    Args:
+        df: pandas DataFrame with a Timestamp column
+    Returns:
+        the same DataFrame, for chaining
+    """
+    ts = timestamps(df)
+    df['Timestamp'] = ts
+    for name in CALENDAR_COLUMNS:
+        df[name] = _derive(ts, name)
+    return df
+
+
+def calendar(df, name):
+    """
+    Return a calendar column, reusing the cached one from prepare() when present
+
+    Args:
+        df: pandas DataFrame with a Timestamp column
+        name: one of CALENDAR_COLUMNS
+    Returns:
+        pandas Series aligned with df; df itself is not modified
+    """
+    if name in df.columns:
+        return df[name]
+    return _derive(timestamps(df), name)
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# Rows converted to float64 at a time, so temporaries stay small on large frames
+CHUNK_ROWS = 65_536
+
+
+def _blocks(values, columns, chunk_rows=CHUNK_ROWS):
+    # float64 blocks of at most chunk_rows rows; frames are converted slice by slice, never whole
+    if hasattr(values, 'columns'):
+        for start in range(0, len(values), chunk_rows):
+            yield values.iloc[start:start + chunk_rows][columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(columns))
+        for start in range(0, len(values), chunk_rows):
+            yield values[start:start + chunk_rows]
+
+
+class Moments:
+    """
+    Mergeable count, mean and sum of squared deviations for several columns
+
+    Chunks are folded in with the pairwise update of Chan et al., so the
+    statistics of a whole file (or of several regions) can be accumulated
+    chunk by chunk and combined without revisiting the data. NaN is ignored.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+            self.m2 = self.m2 + m2 + np.where(total > 0, delta ** 2 * self.count * weight, 0.0)
+        self.mean = np.where(count > 0, self.mean + delta * weight, self.mean)
+        self.count = total
+
+    def update(self, values):
+        """
+        Fold in a chunk of rows
+
+        Args:
+            values: pandas DataFrame containing self.columns, or a 2D array
+                with one column per entry of self.columns
+        """
+        for block in _blocks(values, self.columns):
+            valid = ~np.isnan(block)
+            count = valid.sum(axis=0).astype(np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, np.nansum(block, axis=0) / count, 0.0)
+            m2 = np.nansum((block - mean) ** 2, axis=0)
+            self._combine(count, mean, m2)
+        return self
+
+    def add_constant(self, value, count):
+        """
+        Fold in count copies of value per column, e.g. after imputing missing entries
+
+        Args:
+            value: array of per-column values
+            count: array of per-column repeat counts
+        """
+        count = np.asarray(count, dtype=np.float64)
+        value = np.where(count > 0, np.asarray(value, dtype=np.float64), 0.0)
+        self._combine(count, value, np.zeros(len(self.columns)))
+        return self
+
+    def merge(self, other):
+        """
+        Combine with the moments of another chunk, file or region (same columns)
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge moments over different columns")
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def var(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+
+class CovarianceAccumulator:
+    """
+    Mergeable pairwise covariance/correlation statistics over a set of columns
+
+    For every column pair it keeps the number of rows where both are present
+    and, over those rows, the sums, sums of squares and cross-products of the
+    values shifted by a per-column reference (the first chunk's mean, which
+    keeps the sums numerically stable). This reproduces pandas' pairwise
+    complete DataFrame.corr() for any sub-matrix, from a single pass over the
+    data, and accumulators for different chunks, files or regions can be merged.
+    """
+
+    def __init__(self, columns, chunk_rows=CHUNK_ROWS):
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sums = np.zeros((k, k))      # sums[i, j]: sum of column i over rows where i and j are present
+        self.squares = np.zeros((k, k))   # squares[i, j]: same for the squared values of column i
+        self.products = np.zeros((k, k))  # products[i, j]: sum of column i times column j
+
+    def update(self, values):
+        """
+        Fold in a chunk of rows
+
+        Args:
+            values: pandas DataFrame containing self.columns, or a 2D array
+                with one column per entry of self.columns
+        """
+        for block in _blocks(values, self.columns, self.chunk_rows):
+            if self.shift is None:
+                with np.errstate(invalid='ignore'):
+                    counts = np.count_nonzero(~np.isnan(block), axis=0)
+                    self.shift = np.nansum(block, axis=0) / np.maximum(counts, 1)
+            block = block - self.shift
+            present = ~np.isnan(block)
+            block[~present] = 0.0
+            weights = present.astype(np.float64)
+            self.n += weights.T @ weights
+            self.sums += block.T @ weights
+            self.squares += (block * block).T @ weights
+            self.products += block.T @ block
+        return self
+
+    def merge(self, other):
+        """
+        Combine with the statistics of another chunk, file or region (same columns)
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics over different columns")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        # Re-express the other accumulator's sums relative to this shift
+        d = other.shift - self.shift
+        n, sums = other.n, other.sums
+        self.products += other.products + sums * d[None, :] + sums.T * d[:, None] + n * np.outer(d, d)
+        self.squares += other.squares + 2 * d[:, None] * sums + d[:, None] ** 2 * n
+        self.sums += sums + d[:, None] * n
+        self.n += n
+        return self
+
+    def _indices(self, columns):
+        columns = self.columns if columns is None else list(columns)
+        return columns, [self.columns.index(col) for col in columns]
+
+    def cov(self, columns=None, ddof=1):
+        """
+        Pairwise covariance matrix for a subset of the columns, as a DataFrame
+        """
+        columns, idx = self._indices(columns)
+        grid = np.ix_(idx, idx)
+        n, s, c = self.n[grid], self.sums[grid], self.products[grid]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (c - s * s.T / n) / (n - ddof)
+        cov[n <= ddof] = np.nan
+        return pd.DataFrame(cov, index=columns, columns=columns)
+
+    def corr(self, columns=None):
+        """
+        Pairwise Pearson correlation matrix for a subset of the columns, as a DataFrame
+        """
+        columns, idx = self._indices(columns)
+        grid = np.ix_(idx, idx)
+        n, s, q, c = self.n[grid], self.sums[grid], self.squares[grid], self.products[grid]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            numerator = n * c - s * s.T
+            denominator = np.sqrt((n * q - s ** 2) * (n * q.T - s.T ** 2))
+            corr = np.clip(numerator / denominator, -1.0, 1.0)
+        corr[n < 2] = np.nan
+        diagonal = np.diag_indices(len(columns))
+        corr[diagonal] = np.where(np.diag(n) >= 2, 1.0, np.nan)
+        return pd.DataFrame(corr, index=columns, columns=columns)
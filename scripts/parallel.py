@@ -0,0 +1,274 @@
+import contextlib
+import io
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from scripts import data_proccess
+from scripts.data_proccess import CORRELATION_VARS, region_slices, region_stats, region_missing
+from scripts.ingest import numeric_columns
+from scripts.moments import Moments, CovarianceAccumulator
+from scripts.rollup import RollupCube
+from scripts.sketches import SketchSummary
+from scripts.wind import wind_histogram
+from scripts.zscores import KEY_COLUMNS, zscore_outliers, outlier_counts
+
+
+def _shared_columns(df):
+    # Columns that can live in a flat shared buffer: numbers, booleans and naive datetimes
+    return [col for col in df.columns if col != 'Region' and (
+        pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_datetime64_dtype(df[col]))]
+
+
+# Per-region analyses: each takes one region's frame and returns a partial result
+def _summary(df):
+    return region_stats(df)
+
+
+def _missing(df):
+    return region_missing(df)
+
+
+def _negative(df):
+    columns = numeric_columns(df)
+    return df[columns].lt(0).sum()
+
+
+def _outliers(df):
+    # Z-scores are computed per region, so one region's frame needs no grouping
+    columns = [col for col in KEY_COLUMNS if col in df.columns]
+    return outlier_counts(zscore_outliers(df, columns, by=None), columns)
+
+
+def _moments(df):
+    return Moments(numeric_columns(df)).update(df)
+
+
+def _sketches(df):
+    return SketchSummary(numeric_columns(df)).update(df)
+
+
+def _correlation(df):
+    return CovarianceAccumulator([col for col in CORRELATION_VARS if col in df.columns]).update(df)
+
+
+def _wind(df):
+    sectors, _ = wind_histogram(df)
+    return sectors
+
+
+def _rollup(df):
+    return RollupCube.build(df).cells
+
+
+def _plotted(name):
+    # Run a plotting analysis from data_proccess on one region; its figures come back as PNG
+    # bytes and its printed report as text, since open figures cannot leave a worker process
+    def run(df):
+        # Run in this process (max_workers=1) other figures may be open; leave those alone
+        already_open = set(plt.get_fignums())
+        printed = io.StringIO()
+        with contextlib.redirect_stdout(printed), warnings.catch_warnings():
+            # plt.show() is a no-op under the Agg backend workers use
+            warnings.filterwarnings('ignore', message='.*non-interactive.*')
+            result = getattr(data_proccess, name)(df)
+        figures = []
+        for number in [number for number in plt.get_fignums() if number not in already_open]:
+            fig = plt.figure(number)
+            buffer = io.BytesIO()
+            try:
+                fig.savefig(buffer, format='png', bbox_inches='tight')
+            finally:
+                plt.close(fig)
+            figures.append(buffer.getvalue())
+        return {'result': result, 'figures': figures, 'output': printed.getvalue()}
+    return run
+
+
+# How the per-region partial results combine into one result for the whole dataset
+def _concat(parts):
+    return pd.concat(parts.values())
+
+
+def _by_region(parts):
+    return pd.DataFrame(parts).T.rename_axis('Region')
+
+
+def _merge_all(parts):
+    parts = list(parts.values())
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    return merged
+
+
+def _concat_keyed(parts):
+    return pd.concat(parts, names=['Region'])
+
+
+def _concat_rollup(parts):
+    return RollupCube(pd.concat(parts.values(), ignore_index=True))
+
+
+TASKS = {
+    'summary': (_summary, _concat),
+    'missing': (_missing, _concat),
+    'negative': (_negative, _by_region),
+    'outliers': (_outliers, _by_region),
+    'moments': (_moments, _merge_all),
+    'sketches': (_sketches, _merge_all),
+    'correlation': (_correlation, _merge_all),
+    'wind': (_wind, _concat_keyed),
+    'rollup': (_rollup, _concat_rollup),
+    # Plotting analyses: per region, the returned value, PNG figures and printed output
+    'distribution_analysis': (_plotted('distribution_analysis'), dict),
+    'z_score_analysis': (_plotted('z_score_analysis'), dict),
+    'wind_analysis': (_plotted('wind_analysis'), dict),
+}
+
+
+class SharedFrame:
+    """
+    Numeric and datetime columns of a frame, grouped by Region, in one shared-memory block
+
+    Rows are reordered once so every region is a contiguous slice of each
+    column; worker processes attach to the block by name and wrap their slice
+    in a DataFrame without copying or pickling the data. Text columns such as
+    Comments are not shared. Building it costs one copy of the shared columns;
+    when the rows are already grouped by Region that copy is a plain memcpy,
+    otherwise a gather about twice as slow.
+    """
+
+    def __init__(self, df):
+        self.regions, order, self.bounds = region_slices(df)
+        # order is a permutation, so it is the identity exactly when it increases
+        grouped = bool(np.all(order[1:] > order[:-1]))
+        columns = _shared_columns(df)
+        arrays = [df[col].to_numpy() for col in columns]
+
+        self.layout = []
+        offset = 0
+        for col, values in zip(columns, arrays):
+            # Align every column to 64 bytes
+            offset = -(-offset // 64) * 64
+            self.layout.append((col, values.dtype.str, offset))
+            offset += len(order) * values.dtype.itemsize
+        self.n_rows = len(order)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (col, dtype, offset), values in zip(self.layout, arrays):
+            target = np.ndarray(self.n_rows, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            if grouped:
+                target[:] = values
+            else:
+                np.take(values, order, out=target)
+            del target
+
+    def spec(self, i):
+        """
+        Picklable description of region i for a worker process
+        """
+        return (self.shm.name, self.layout, self.n_rows,
+                self.regions[i], int(self.bounds[i]), int(self.bounds[i + 1]))
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _region_frame(buffer, layout, n_rows, region, start, stop):
+    data = {
+        col: np.ndarray(n_rows, dtype=dtype, buffer=buffer, offset=offset)[start:stop]
+        for col, dtype, offset in layout
+    }
+    df = pd.DataFrame(data, copy=False)
+    df['Region'] = pd.Categorical.from_codes(np.zeros(stop - start, dtype=np.int8), [region])
+    return df
+
+
+def _run_tasks(df, tasks):
+    return {name: TASKS[name][0](df) for name in tasks}
+
+
+def _init_worker():
+    # Workers never show figures; the plotting tasks render them to PNG instead
+    matplotlib.use('Agg')
+
+
+def _run_region(spec, tasks):
+    name, layout, n_rows, region, start, stop = spec
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        df = _region_frame(shm.buf, layout, n_rows, region, start, stop)
+        results = _run_tasks(df, tasks)
+        # Every view into the block must be gone before it can be closed
+        del df
+    finally:
+        shm.close()
+    return region, results
+
+
+def run_by_region(df, tasks=None, max_workers=None):
+    """
+    Run per-region analyses in parallel worker processes and merge the results
+
+    The frame is partitioned by Region into shared memory once (see
+    SharedFrame); each region is analysed in its own process and the partial
+    results are combined: describe() tables and missing-value counts are
+    concatenated, negative and outlier counts become one row per region,
+    Moments, SketchSummary and CovarianceAccumulator objects are merged, wind sector tables
+    are keyed by region and rollup cells form one RollupCube. The plotting
+    analyses (distribution_analysis, z_score_analysis, wind_analysis) give a
+    dict per region with their return value, figures as PNG bytes and printed
+    output; run in this process (max_workers=1) they use the current
+    matplotlib backend, so an interactive one also shows the figures.
+
+    Wall time is the partition step plus the slowest region, not the sum over
+    regions. The partition step copies every shared column once and costs
+    about as much as one region's full task set on interleaved rows, about
+    half that on rows already grouped by Region, so the speedup stays well
+    below the worker count and a short task list may run faster in-process.
+
+    Args:
+        df: pandas DataFrame with a Region column; text columns other than
+            Region are left out of the analysis
+        tasks: names from TASKS to run (defaults to all of them)
+        max_workers: worker processes (defaults to one per region, capped at the CPU count);
+            1 runs everything in this process
+    Returns:
+        dict of task name -> merged result
+    """
+    tasks = list(TASKS) if tasks is None else list(tasks)
+    unknown = [name for name in tasks if name not in TASKS]
+    if unknown:
+        raise ValueError(f"Unknown analysis tasks: {unknown}")
+
+    if max_workers is None:
+        max_workers = min(df['Region'].nunique(), os.cpu_count() or 1)
+    parts = {}
+    if max_workers <= 1:
+        regions, order, bounds = region_slices(df)
+        # Same columns the workers would see
+        df = df[_shared_columns(df) + ['Region']]
+        for i, region in enumerate(regions):
+            parts[region] = _run_tasks(df.iloc[order[bounds[i]:bounds[i + 1]]], tasks)
+    else:
+        with SharedFrame(df) as shared, ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_run_region, shared.spec(i), tasks) for i in range(len(shared.regions))]
+            for future in futures:
+                region, results = future.result()
+                parts[region] = results
+
+    return {name: TASKS[name][1]({region: results[name] for region, results in parts.items()})
+            for name in tasks}
@@ -0,0 +1,182 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class RSSSampler:
+    """
+    Peak resident set size above the starting level, sampled from a background thread
+
+    Complements tracemalloc, which does not see memory allocated by Arrow's
+    own memory pool (CSV parsing, columnar reads). Linux only; elsewhere
+    peak_mb stays None.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def rss():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            return None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record(self.rss())
+
+    def _record(self, rss):
+        # A failed read (None) is skipped rather than ending the sampling thread
+        if rss is not None:
+            self._peak = max(self._peak, rss)
+
+    def __enter__(self):
+        self._start = self.rss()
+        if self._start is not None:
+            self._peak = self._start
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            self._stop.set()
+            self._thread.join()
+            self._record(self.rss())
+            self.peak_mb = (self._peak - self._start) / 1024 ** 2
+
+
+def _row_count(value):
+    return len(value) if hasattr(value, 'shape') else None
+
+
+def _timed(get_profiler, name, rows):
+    # Decorator recording each call as a stage of the profiler get_profiler() returns at call time
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            count = _row_count(args[0]) if rows == 'input' and args else None
+            with get_profiler().stage(label, rows=count) as record:
+                result = fn(*args, **kwargs)
+                if rows == 'output':
+                    record['rows'] = _row_count(result)
+            return result
+        return wrapper
+    return decorator
+
+
+class Profiler:
+    """
+    Bounded log of per-stage wall time, rows processed and peak memory
+
+    Stages are recorded with the stage() context manager or the timed()
+    decorator. Records are grouped into runs (one per Streamlit rerun, started
+    with new_run()) so the latest run can be shown on its own, and the whole
+    log can be exported as JSON for offline analysis.
+    """
+
+    def __init__(self, max_records=1000, sample_memory=True):
+        self.sample_memory = sample_memory
+        self.run = 0
+        self.records = deque(maxlen=max_records)
+
+    def new_run(self):
+        self.run += 1
+        return self.run
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Record one stage; the yielded dict can be updated (e.g. rows) inside the block
+
+        Args:
+            name: stage label
+            rows: rows processed, if known up front
+        """
+        record = {'run': self.run, 'stage': name, 'rows': rows, 'seconds': None,
+                  'peak_mb': None, 'error': None}
+        sampler = RSSSampler() if self.sample_memory else None
+        start = time.perf_counter()
+        try:
+            if sampler is not None:
+                with sampler:
+                    yield record
+            else:
+                yield record
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if sampler is not None:
+                record['peak_mb'] = sampler.peak_mb
+            self.records.append(record)
+
+    def timed(self, name=None, rows='input'):
+        """
+        Decorator recording every call of a function as a stage
+
+        Args:
+            name: stage label (defaults to the function name)
+            rows: 'input' to count the rows of the first argument, 'output'
+                to count the rows of the return value, or None
+        """
+        return _timed(lambda: self, name, rows)
+
+    def latest(self):
+        """
+        Records of the most recent run
+        """
+        return [record for record in self.records if record['run'] == self.run]
+
+    def to_json(self, indent=2):
+        return json.dumps(list(self.records), indent=indent)
+
+    def clear(self):
+        self.records.clear()
+
+
+# Profiler for code running outside a session (scripts, benchmarks)
+profiler = Profiler()
+
+# Streamlit runs every browser session's reruns in that session's own script thread
+_active = threading.local()
+
+
+def activate(session_profiler):
+    """
+    Make a profiler the one timed() records into, for the calling thread
+
+    The dashboard keeps one Profiler per browser session (in st.session_state)
+    and activates it at the start of every rerun, so the functions decorated
+    in shared modules record into the session that called them.
+
+    Returns:
+        session_profiler
+    """
+    _active.profiler = session_profiler
+    return session_profiler
+
+
+def active():
+    """
+    Profiler activated for the calling thread, or the module-level profiler
+    """
+    return getattr(_active, 'profiler', None) or profiler
+
+
+def timed(name=None, rows='input'):
+    """
+    Like Profiler.timed, recording into whichever profiler is active() when the function is called
+    """
+    return _timed(active, name, rows)
@@ -0,0 +1,216 @@
+import os
+import shutil
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from scripts.dataset import downcast
+from scripts.ingest import load_csv
+from scripts.store import DEFAULT_STORE_DIR, content_hash, to_table
+
+# Rows per Parquet row group; small enough that a narrow range skips most of a partition
+ROW_GROUP_ROWS = 32_768
+
+# Rows of each Region partition are ordered by this column, so the min/max statistics of
+# consecutive row groups cover narrow, mostly disjoint ranges of it
+CLUSTER_COLUMN = 'Tamb'
+
+# One directory per region (Region=Benin/...); the regions are discovered from the
+# directory names when reading and come back as a categorical Region column
+PARTITIONING = ds.partitioning(pa.schema([('Region', pa.string())]), flavor='hive')
+
+PARTS_SUFFIX = '.parts'
+
+# Partition of rows without a Region; hive would otherwise write them to Region= and read them back as ''
+MISSING_REGION = 'Unknown'
+
+
+def write_partitioned(df, root, cluster_by=CLUSTER_COLUMN, row_group_rows=ROW_GROUP_ROWS):
+    """
+    Write a station frame as Parquet partitioned by Region, for Query
+
+    Within each region the rows are ordered by cluster_by (time order is not
+    kept; Timestamp stays a column), so a range filter on it reads only the
+    few row groups whose statistics overlap the range. Rows without a Region
+    go to a MISSING_REGION partition.
+
+    Args:
+        df: pandas DataFrame with a Region column; it is not modified
+        root: destination directory, replaced as a whole once written
+        cluster_by: column to order rows by within each partition, or None
+        row_group_rows: rows per Parquet row group
+    Returns:
+        root
+    """
+    table = to_table(df)
+    keys = []
+    if cluster_by is not None and cluster_by in df.columns:
+        keys.append((cluster_by, 'ascending'))
+    if 'Region' in df.columns:
+        keys.insert(0, ('Region', 'ascending'))
+        table = table.set_column(table.schema.get_field_index('Region'), 'Region',
+                                 pc.fill_null(pc.cast(table['Region'], pa.string()), MISSING_REGION))
+    if keys:
+        table = table.take(pc.sort_indices(table, sort_keys=keys, null_placement='at_end'))
+
+    # Write to a temporary directory first so readers never see a partial store
+    tmp_root = f"{root}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    ds.write_dataset(table, tmp_root, format='parquet',
+                     partitioning=PARTITIONING if 'Region' in df.columns else None,
+                     min_rows_per_group=row_group_rows, max_rows_per_group=row_group_rows,
+                     # A threaded write may reorder rows, which would undo the clustering
+                     use_threads=False)
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp_root, root)
+    return root
+
+
+def to_partitioned(source, store_dir=DEFAULT_STORE_DIR):
+    """
+    Convert a station CSV into a content-addressed partitioned store, once
+
+    Args:
+        source: path or binary file object with CSV data
+        store_dir: directory holding the stores
+    Returns:
+        directory of the partitioned store
+    """
+    root = os.path.join(store_dir, content_hash(source) + PARTS_SUFFIX)
+    if not os.path.exists(root):
+        os.makedirs(store_dir, exist_ok=True)
+        write_partitioned(downcast(load_csv(source)), root)
+    return root
+
+
+class Query:
+    """
+    Lazy selection over a partitioned station store
+
+    select(), where(), between() and isin() only record projections and
+    filters and return a new Query; nothing is read until count(), to_table()
+    or to_frame(). The whole selection is then handed to pyarrow.dataset in
+    one scan, which skips Region partitions that cannot match, skips row
+    groups whose min/max statistics rule them out, and decodes only the
+    selected columns.
+    """
+
+    def __init__(self, dataset, columns=None, filter=None):
+        self.dataset = dataset
+        self.columns = columns
+        self.filter = filter
+
+    @classmethod
+    def open(cls, root):
+        """
+        Query over a store written by write_partitioned
+        """
+        return cls(ds.dataset(root, format='parquet',
+                              partitioning=ds.HivePartitioning.discover(infer_dictionary=True)))
+
+    @property
+    def schema_columns(self):
+        return self.dataset.schema.names
+
+    def _derive(self, columns=None, filter=None):
+        return Query(self.dataset, self.columns if columns is None else columns,
+                     self.filter if filter is None else filter)
+
+    def select(self, columns):
+        """
+        Read only these columns; names not in the store are skipped
+        """
+        return self._derive(columns=[col for col in columns if col in self.schema_columns])
+
+    def where(self, expression):
+        """
+        Keep rows matching a pyarrow.compute expression, in addition to earlier filters
+        """
+        return self._derive(filter=expression if self.filter is None else self.filter & expression)
+
+    def between(self, column, lo, hi):
+        """
+        Keep rows with lo <= column <= hi; NaN and missing values never match
+        """
+        field = pc.field(column)
+        expression = (field >= lo) & (field <= hi)
+        if pa.types.is_floating(self.dataset.schema.field(column).type):
+            # Parquet min/max statistics skip NaN, so without this count() takes a row group
+            # whose statistics lie inside the range as matching in full, NaN rows included
+            expression &= ~field.is_nan()
+        return self.where(expression)
+
+    def isin(self, column, values):
+        """
+        Keep rows whose column is one of values; an empty selection matches no rows
+        """
+        values = list(values)
+        if not values:
+            # pyarrow cannot type an empty value set, and no partition or row group needs reading
+            return self.where(pc.scalar(False))
+        return self.where(pc.field(column).isin(values))
+
+    def partitions(self):
+        """
+        Region values of the partitions the current filter can match, read from the directory names
+        """
+        regions = set()
+        for fragment in self.dataset.get_fragments(filter=self.filter):
+            regions.update(ds.get_partition_keys(fragment.partition_expression).values())
+        return sorted(regions)
+
+    def column_range(self, column):
+        """
+        (min, max) of a column over the whole store, from Parquet statistics when they are present
+        """
+        lo, hi = np.inf, -np.inf
+        for fragment in self.dataset.get_fragments():
+            for row_group in fragment.metadata.to_dict()['row_groups']:
+                stats = next((c['statistics'] for c in row_group['columns']
+                              if c['path_in_schema'] == column), None)
+                if not stats or not stats.get('has_min_max'):
+                    # No statistics to go by; fall back to scanning the column
+                    result = pc.min_max(self.dataset.to_table(columns=[column])[column])
+                    return result['min'].as_py(), result['max'].as_py()
+                lo, hi = min(lo, stats['min']), max(hi, stats['max'])
+        return (None, None) if lo > hi else (lo, hi)
+
+    def scan_stats(self):
+        """
+        Partitions and row groups the current filter reads, out of the totals
+
+        Returns:
+            dict with partitions, row_groups and rows (read) and their *_total counterparts
+        """
+        stats = dict.fromkeys(['partitions', 'partitions_total', 'row_groups', 'row_groups_total',
+                               'rows', 'rows_total'], 0)
+        kept = {fragment.path for fragment in self.dataset.get_fragments(filter=self.filter)}
+        for fragment in self.dataset.get_fragments():
+            metadata = fragment.metadata
+            stats['partitions_total'] += 1
+            stats['row_groups_total'] += metadata.num_row_groups
+            stats['rows_total'] += metadata.num_rows
+            if fragment.path not in kept:
+                continue
+            stats['partitions'] += 1
+            for piece in fragment.split_by_row_group(self.filter, schema=self.dataset.schema):
+                stats['row_groups'] += len(piece.row_groups)
+                stats['rows'] += sum(row_group.num_rows for row_group in piece.row_groups)
+        return stats
+
+    def count(self):
+        """
+        Rows matching the filters
+        """
+        return self.dataset.count_rows(filter=self.filter)
+
+    def to_table(self):
+        return self.dataset.to_table(columns=self.columns, filter=self.filter)
+
+    def to_frame(self):
+        """
+        Matching rows of the selected columns as a pandas DataFrame (Region categorical)
+        """
+        return self.to_table().to_pandas(split_blocks=True, self_destruct=True)
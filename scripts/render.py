@@ -0,0 +1,69 @@
+import numpy as np
+from matplotlib.colors import LogNorm
+
+# Above this many points scatter plots are drawn as 2D density images instead
+DENSITY_THRESHOLD = 50_000
+DENSITY_BINS = 200
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """
+    Count points on a regular bins x bins grid in one pass (datashader-style)
+
+    Args:
+        x, y: array-likes of equal length; pairs with a non-finite value are skipped
+        bins: grid resolution per axis
+    Returns:
+        (counts, x_edges, y_edges) with counts shaped (bins, bins) and indexed [x, y]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if len(x) == 0:
+        return np.zeros((bins, bins)), np.linspace(0, 1, bins + 1), np.linspace(0, 1, bins + 1)
+
+    edges = []
+    indices = []
+    for values in (x, y):
+        lo, hi = values.min(), values.max()
+        if hi == lo:
+            hi = lo + 1.0
+        edges.append(np.linspace(lo, hi, bins + 1))
+        idx = ((values - lo) * (bins / (hi - lo))).astype(np.intp)
+        # The maximum falls exactly on the last edge; keep it in the last bin
+        np.clip(idx, 0, bins - 1, out=idx)
+        indices.append(idx)
+    counts = np.bincount(indices[0] * bins + indices[1], minlength=bins * bins)
+    return counts.reshape(bins, bins), edges[0], edges[1]
+
+
+def scatter_or_density(ax, x, y, threshold=DENSITY_THRESHOLD, bins=DENSITY_BINS,
+                       cmap='viridis', alpha=0.5, label=None):
+    """
+    Scatter plot for small inputs, log-scaled density image for large ones
+
+    Above threshold points the values are aggregated on a fixed grid, so the
+    drawing cost depends on the grid size rather than on the number of rows.
+
+    Args:
+        ax: matplotlib Axes to draw on
+        x, y: array-likes of equal length
+        threshold: point count above which the density image is used
+        bins: grid resolution per axis for the density image
+        cmap: colormap for the density image
+        alpha: transparency of scatter markers (density images use max(alpha, 0.6))
+        label: legend label
+    Returns:
+        the matplotlib artist that was drawn
+    """
+    if len(x) <= threshold:
+        return ax.scatter(x, y, alpha=alpha, label=label)
+
+    counts, x_edges, y_edges = density_grid(x, y, bins)
+    # Empty cells stay transparent so overlaid series remain readable
+    masked = np.ma.masked_equal(counts.T, 0)
+    vmax = max(counts.max(), 2)
+    return ax.pcolormesh(x_edges, y_edges, masked, cmap=cmap, norm=LogNorm(vmin=1, vmax=vmax),
+                         alpha=max(alpha, 0.6), label=label, rasterized=True)
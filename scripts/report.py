@@ -0,0 +1,267 @@
+"""
+Headless batch report over one or more solar datasets
+
+Runs the data_proccess analysis suite with the Agg backend, writing every
+figure to PNG or SVG, every returned table to JSON or Parquet and the printed
+output to a text file per analysis. Analyses run concurrently in worker
+processes, and each figure is closed as soon as it is saved.
+
+Usage:
+    python -m scripts.report data/benin.csv data/togo.csv --output reports --workers 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from scripts import data_proccess
+from scripts.dataset import downcast
+from scripts.ingest import prepare
+from scripts.store import DEFAULT_STORE_DIR, read_columnar, to_columnar
+
+# Analyses run by default, in report order
+ANALYSES = ['summary_stats', 'missing_values', 'negative_values', 'outliers', 'time_series',
+            'cleaning_impact', 'correlation', 'wind_analysis', 'humidity_analysis',
+            'distribution_analysis', 'z_score_analysis', 'bubble_plot']
+
+FIGURE_FORMATS = ['png', 'svg']
+STATS_FORMATS = ['json', 'parquet']
+
+# Frames already loaded by this worker process, keyed by columnar path
+_frames = {}
+
+
+def _dataset(path):
+    if path not in _frames:
+        _frames[path] = prepare(downcast(read_columnar(path)))
+    return _frames[path]
+
+
+def save_figures(prefix, fmt='png', dpi=100):
+    """
+    Save every open pyplot figure as <prefix>_<n>.<fmt> and close it
+
+    Returns:
+        list of written paths
+    """
+    paths = []
+    for n, number in enumerate(plt.get_fignums(), 1):
+        fig = plt.figure(number)
+        path = f"{prefix}_{n}.{fmt}"
+        try:
+            fig.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+        finally:
+            plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def _tables(result):
+    # Analyses return a table, a tuple of tables or nothing
+    if result is None:
+        return []
+    if isinstance(result, tuple):
+        return [table for part in result for table in _tables(part)]
+    if isinstance(result, pd.Series):
+        return [result.to_frame()]
+    if isinstance(result, pd.DataFrame):
+        return [result]
+    return []
+
+
+def save_stats(prefix, result, fmt='json'):
+    """
+    Write the tables returned by an analysis as <prefix>[_<n>].<fmt>
+
+    Returns:
+        list of written paths
+    """
+    tables = _tables(result)
+    paths = []
+    for n, table in enumerate(tables, 1):
+        path = f"{prefix}.{fmt}" if len(tables) == 1 else f"{prefix}_{n}.{fmt}"
+        table = table.copy(deep=False)
+        # JSON and Parquet both need string column labels
+        table.columns = ['/'.join(map(str, col)) if isinstance(col, tuple) else str(col)
+                         for col in table.columns]
+        if fmt == 'parquet':
+            table.to_parquet(path)
+        else:
+            table.to_json(path, orient='split', date_format='iso', indent=2)
+        paths.append(path)
+    return paths
+
+
+def run_analysis(name, dataset, path, output_dir, figure_format='png', stats_format='json'):
+    """
+    Run one analysis on one dataset and write its figures, tables and printed output
+
+    Args:
+        name: function name in data_proccess
+        dataset: dataset name used for the output sub-directory
+        path: columnar copy of the dataset (see store.to_columnar)
+        output_dir: report root directory
+    Returns:
+        dict describing the run: dataset, analysis, rows, seconds, written files and error
+    """
+    start = time.perf_counter()
+    target = os.path.join(output_dir, dataset)
+    os.makedirs(target, exist_ok=True)
+    prefix = os.path.join(target, name)
+    record = {'dataset': dataset, 'analysis': name, 'rows': 0, 'files': [], 'error': None}
+    printed = io.StringIO()
+    try:
+        df = _dataset(path)
+        record['rows'] = len(df)
+        with contextlib.redirect_stdout(printed), warnings.catch_warnings():
+            # plt.show() is a no-op under Agg; figures are saved below instead
+            warnings.filterwarnings('ignore', message='.*non-interactive.*')
+            result = getattr(data_proccess, name)(df)
+        record['files'] += save_figures(prefix, figure_format)
+        record['files'] += save_stats(prefix, result, stats_format)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        plt.close('all')
+        if printed.getvalue():
+            with open(f"{prefix}.txt", 'w') as f:
+                f.write(printed.getvalue())
+            record['files'].append(f"{prefix}.txt")
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def throughput(records, wall_times, sizes):
+    """
+    Per-dataset rows, analysis time and throughput from the run records
+    """
+    rows = []
+    for dataset, wall in wall_times.items():
+        runs = [r for r in records if r['dataset'] == dataset]
+        n_rows = max((r['rows'] for r in runs), default=0)
+        rows.append({
+            'dataset': dataset,
+            'rows': n_rows,
+            'analyses': len(runs),
+            'failed': sum(r['error'] is not None for r in runs),
+            'cpu_seconds': sum(r['seconds'] for r in runs),
+            'wall_seconds': wall,
+            'rows_per_second': n_rows / wall if wall else float('nan'),
+            'mb_per_second': sizes[dataset] / 1e6 / wall if wall else float('nan'),
+        })
+    return pd.DataFrame(rows).set_index('dataset')
+
+
+def dataset_names(sources):
+    """
+    Output name per source: the file name without extension, prefixed with as
+    many parent directories as it takes to tell sources of the same name apart
+
+    Returns:
+        list of names, in the order of sources
+    """
+    parts = [os.path.normpath(os.path.abspath(source)).split(os.sep) for source in sources]
+    parts = [path[:-1] + [os.path.splitext(path[-1])[0]] for path in parts]
+    depth = {i: 1 for i in range(len(parts))}
+    while True:
+        names = ['_'.join(filter(None, path[-depth[i]:])) for i, path in enumerate(parts)]
+        # Only different files need a longer name; the same file passed twice is numbered below
+        grown = [i for i, name in enumerate(names) if depth[i] < len(parts[i]) and any(
+            names[j] == name and parts[j] != parts[i] for j in range(len(parts)))]
+        if not grown:
+            break
+        for i in grown:
+            depth[i] += 1
+    # The same file passed twice still gets two output directories
+    seen = {}
+    for i, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[i] = f"{name}_{seen[name]}"
+    return names
+
+
+def run_report(sources, output_dir, analyses=None, figure_format='png', stats_format='json',
+               workers=None, store_dir=DEFAULT_STORE_DIR):
+    """
+    Run the analysis suite over several datasets in worker processes
+
+    Each CSV is converted to its columnar copy once up front, so workers
+    memory-map it instead of parsing the CSV again.
+
+    Args:
+        sources: CSV paths
+        output_dir: directory receiving one sub-directory per dataset (see dataset_names); created
+            if missing
+        analyses: data_proccess function names (defaults to ANALYSES)
+        figure_format: 'png' or 'svg'
+        stats_format: 'json' or 'parquet'
+        workers: worker processes (defaults to the CPU count)
+        store_dir: directory holding the columnar copies
+    Returns:
+        (records, summary): one record per (dataset, analysis) run and the
+        per-dataset throughput table
+    """
+    analyses = analyses or ANALYSES
+    unknown = [name for name in analyses if not callable(getattr(data_proccess, name, None))]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {unknown}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    datasets = {}
+    sizes = {}
+    for dataset, source in zip(dataset_names(sources), sources):
+        datasets[dataset] = to_columnar(source, store_dir=store_dir)
+        sizes[dataset] = os.path.getsize(source)
+
+    records = []
+    finished = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_analysis, name, dataset, path, output_dir, figure_format, stats_format)
+                   for dataset, path in datasets.items() for name in analyses]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            finished[record['dataset']] = time.perf_counter() - start
+            status = record['error'] or f"{len(record['files'])} files"
+            print(f"{record['dataset']}/{record['analysis']}: {record['seconds']:.2f}s, {status}")
+
+    summary = throughput(records, {dataset: finished[dataset] for dataset in datasets}, sizes)
+    with open(os.path.join(output_dir, 'report.json'), 'w') as f:
+        json.dump({'runs': records, 'throughput': summary.reset_index().to_dict(orient='records')}, f, indent=2)
+    return records, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the solar analysis report without a display')
+    parser.add_argument('sources', nargs='+', help='CSV files to analyse')
+    parser.add_argument('-o', '--output', default='reports', help='output directory')
+    parser.add_argument('-a', '--analyses', nargs='+', choices=ANALYSES, help='analyses to run (default: all)')
+    parser.add_argument('--figures', choices=FIGURE_FORMATS, default='png', help='figure format')
+    parser.add_argument('--stats', choices=STATS_FORMATS, default='json', help='table format')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR, help='directory for the columnar copies')
+    args = parser.parse_args(argv)
+
+    records, summary = run_report(args.sources, args.output, args.analyses, args.figures,
+                                  args.stats, args.workers, args.store_dir)
+
+    print("\nThroughput:")
+    print("=" * 80)
+    print(summary.round(2).to_string())
+    return 1 if any(r['error'] for r in records) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+from scripts.dataset import SENSOR_COLUMNS
+from scripts.ingest import timestamps
+from scripts.zscores import group_codes
+
+# Irradiance channels in W/m²; their energy integral is reported in Wh/m²
+ENERGY_COLUMNS = ['GHI', 'DNI', 'DHI']
+
+STATS = ['mean', 'min', 'max', 'sum', 'count']
+
+# Bucket sizes tried by auto_freq, finest first
+FREQUENCIES = ['1min', '5min', '15min', '30min', '1h', '3h', '6h', '12h', '1D', '7D']
+
+# Longest interval between consecutive samples that is still integrated
+MAX_GAP = '5min'
+
+_NS_PER_HOUR = 3600 * 10 ** 9
+
+
+def auto_freq(start, end, max_buckets=2000):
+    """
+    Finest entry of FREQUENCIES that splits [start, end] into at most max_buckets buckets
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for freq in FREQUENCIES:
+        if span / pd.Timedelta(freq) <= max_buckets:
+            return freq
+    return FREQUENCIES[-1]
+
+
+def _sort_order(codes, ts):
+    # Row order by (group, time), or None when the rows already come that way
+    step = np.diff(codes)
+    if (step >= 0).all() and (np.diff(ts)[step == 0] >= 0).all():
+        return None
+    return np.lexsort((ts, codes))
+
+
+def _energy(ts, codes, cell, n_cells, v, max_gap):
+    # Trapezoid integral between consecutive samples of the same group, with rows sorted by
+    # (group, time); intervals longer than max_gap are data gaps and are skipped. Each interval
+    # counts towards the bucket of its left sample. Also returns the integrated time per cell.
+    dt = np.diff(ts)
+    linked = (codes[1:] == codes[:-1]) & (dt > 0) & (dt <= max_gap)
+    left = cell[:-1]
+    covered = np.bincount(left[linked], weights=dt[linked], minlength=n_cells)
+    if v is None:
+        return None, covered
+    # Negative irradiance is physically impossible and is not integrated
+    v = np.clip(v, 0, None)
+    ok = linked & ~np.isnan(v[1:]) & ~np.isnan(v[:-1])
+    area = (v[1:][ok] + v[:-1][ok]) / 2 * (dt[ok] / _NS_PER_HOUR)
+    return np.bincount(left[ok], weights=area, minlength=n_cells), covered
+
+
+def resample(df, freq='15min', columns=None, stats=('mean',), energy=('GHI',), by='Region',
+             max_gap=MAX_GAP, dense=False):
+    """
+    Aggregate minute data into fixed time buckets per region in one vectorized pass
+
+    Rows are ordered by (region, time) once, which station frames usually are
+    already, so every bucket is a contiguous run of rows and each statistic of
+    each channel is a single ufunc.reduceat over the runs. Buckets are aligned
+    to the epoch, so days start at midnight. Irradiance channels can also be
+    integrated over time (trapezoid rule, in Wh/m²) without bridging gaps
+    longer than max_gap, and the fraction of each bucket covered by integrated
+    intervals is reported alongside.
+
+    Args:
+        df: pandas DataFrame with a Timestamp column
+        freq: bucket size as a pandas offset string (e.g. '5min', '1h', '1D'), or
+            'auto' for the finest of FREQUENCIES giving at most 2000 buckets
+        columns: channels to aggregate (defaults to the sensor columns present)
+        stats: statistics from STATS
+        energy: irradiance channels (from ENERGY_COLUMNS) to integrate
+        by: grouping column, or None (or absent from df) to aggregate all rows together
+        max_gap: longest sample interval that is integrated
+        dense: include empty buckets (as NaN, count 0) so plotted lines break at gaps
+    Returns:
+        pandas DataFrame indexed by (Region, Timestamp), or Timestamp when by is
+        None, where Timestamp is the bucket start; columns are (stat, column)
+        pairs plus ('energy', column) and ('coverage', '') when energy is requested;
+        attrs['freq'] holds the bucket size used (useful with 'auto')
+    """
+    columns = [col for col in (columns or SENSOR_COLUMNS) if col in df.columns]
+    energy = [col for col in energy if col in df.columns]
+    unknown = [stat for stat in stats if stat not in STATS]
+    if unknown:
+        raise ValueError(f"Unknown statistics: {unknown}")
+    not_irradiance = [col for col in energy if col not in ENERGY_COLUMNS]
+    if not_irradiance:
+        raise ValueError(f"Energy integrals need irradiance channels, got: {not_irradiance}")
+    if by is not None and by not in df.columns:
+        by = None
+
+    ts = timestamps(df).to_numpy().astype('datetime64[ns]', copy=False).view(np.int64)
+    codes, labels = group_codes(df, by)
+    keep = (codes >= 0) & (ts != np.iinfo(np.int64).min)
+    if freq == 'auto':
+        freq = auto_freq(ts[keep].min(), ts[keep].max()) if keep.any() else FREQUENCIES[0]
+    step = pd.Timedelta(freq).value
+
+    names = [(stat, col) for stat in stats for col in columns] + [('energy', col) for col in energy]
+    if energy:
+        names.append(('coverage', ''))
+    index = pd.DatetimeIndex([], name='Timestamp')
+    if by is not None:
+        index = pd.MultiIndex.from_arrays([[], index], names=['Region', 'Timestamp'])
+    if not keep.any():
+        return pd.DataFrame(index=index, columns=pd.MultiIndex.from_tuples(names), dtype=np.float64)
+
+    rows = np.flatnonzero(keep) if not keep.all() else None
+    if rows is not None:
+        ts, codes = ts[rows], codes[rows]
+    codes = codes.astype(np.int64, copy=False)
+    order = _sort_order(codes, ts)
+    if order is not None:
+        ts, codes = ts[order], codes[order]
+        rows = order if rows is None else rows[order]
+
+    # Cell = (group, bucket); after the sort each cell is a run of consecutive rows
+    buckets = ts // step
+    first = buckets.min()
+    n_buckets = int(buckets.max() - first) + 1
+    key = codes * n_buckets + (buckets - first)
+    starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+    cell_keys = key[starts]
+    n_cells = len(starts)
+    sizes = np.diff(np.append(starts, len(key)))
+
+    def column(col):
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return values if rows is None else values[rows]
+
+    result = {}
+    for col in columns:
+        v = column(col)
+        missing = np.isnan(v)
+        if missing.any():
+            counts = sizes - np.add.reduceat(missing, starts, dtype=np.int64)
+            sums = np.add.reduceat(np.where(missing, 0, v), starts)
+        else:
+            counts = sizes
+            sums = np.add.reduceat(v, starts)
+        empty = counts == 0
+        for stat in stats:
+            if stat == 'count':
+                out = counts.astype(np.float64)
+            elif stat == 'sum':
+                out = np.where(empty, np.nan, sums)
+            elif stat == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    out = np.where(empty, np.nan, sums / counts)
+            else:
+                # fmin/fmax skip NaN, leaving NaN only where a bucket has no values at all
+                out = (np.fmin if stat == 'min' else np.fmax).reduceat(v, starts)
+            result[(stat, col)] = out
+    if energy:
+        cell = np.repeat(np.arange(n_cells), sizes)
+        gap = pd.Timedelta(max_gap).value
+        for col in energy:
+            result[('energy', col)], covered = _energy(ts, codes, cell, n_cells, column(col), gap)
+        result[('coverage', '')] = np.minimum(covered / step, 1.0)
+
+    if dense:
+        # Every bucket between the first and last sample, for every group
+        n_groups = len(labels)
+        full = np.arange(n_groups * n_buckets)
+        position = np.full(len(full), -1)
+        position[cell_keys] = np.arange(n_cells)
+        present = position >= 0
+        for name, out in result.items():
+            filled = np.full(len(full), 0.0 if name[0] == 'count' or name[0] == 'coverage' else np.nan)
+            filled[present] = out
+            result[name] = filled
+        cell_keys = full
+
+    groups, offsets = np.divmod(cell_keys, n_buckets)
+    starts_ns = ((first + offsets) * step).astype('datetime64[ns]')
+    index = pd.DatetimeIndex(starts_ns, name='Timestamp')
+    if by is not None:
+        region = np.asarray(labels, dtype=object)[groups]
+        index = pd.MultiIndex.from_arrays([region, index], names=['Region', 'Timestamp'])
+    table = pd.DataFrame({name: result[name] for name in names}, index=index)
+    table.columns = pd.MultiIndex.from_tuples(names)
+    table.attrs['freq'] = freq
+    return table
+
+
+def plot_resampled(ax, table, column, stat='mean', label=None):
+    """
+    Draw one line per region of a resample() table on ax
+
+    Args:
+        ax: matplotlib Axes
+        table: result of resample()
+        column: channel name, or '' for coverage
+        stat: first level of the table's columns ('mean', 'energy', ...)
+        label: legend label prefix (defaults to the region names only)
+    """
+    series = table[(stat, column)]
+    if isinstance(series.index, pd.MultiIndex):
+        groups = series.groupby(level='Region', sort=False)
+    else:
+        groups = [(None, series)]
+    for region, values in groups:
+        times = values.index.get_level_values('Timestamp')
+        name = ' '.join(str(part) for part in (label, region) if part is not None) or None
+        ax.plot(times, values.to_numpy(), label=name, linewidth=1)
+    return ax
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from scripts.ingest import calendar
+
+# Numeric channels kept in the cube
+ROLLUP_COLUMNS = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WSgust',
+                  'WSstdev', 'WD', 'WDstdev', 'BP', 'Precipitation', 'TModA', 'TModB']
+
+KEYS = ['Region', 'Date', 'Hour']
+STATS = ['sum', 'count', 'min', 'max']
+
+# How each stored statistic combines when cells are merged into coarser groups
+_COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+# The same combination as array reductions; fmin/fmax skip NaN like groupby min/max
+_REDUCE = {'sum': np.add, 'count': np.add, 'min': np.fmin, 'max': np.fmax}
+
+# Hours since the epoch per region in a cell code, with room on both sides of 1970
+_REGION_STRIDE = 1 << 40
+
+
+def _cell_codes(cells):
+    # One int64 per (Region, Date, Hour) cell, ordered like KEYS
+    region, _ = pd.factorize(cells['Region'], sort=True)
+    hours = cells['Date'].to_numpy().astype('datetime64[h]').astype(np.int64) + cells['Hour'].to_numpy(np.int64)
+    return region.astype(np.int64) * _REGION_STRIDE + hours + _REGION_STRIDE // 2
+
+
+class RollupCube:
+    """
+    Pre-aggregated sum, count, min and max at Region x Date x Hour granularity
+
+    Built once per dataset with a single grouped pass; monthly, daily, hourly
+    and per-region views are then answered by re-aggregating the cube's cells
+    (a few thousand rows per station-year) instead of the raw minute rows.
+    """
+
+    def __init__(self, cells):
+        # cells: DataFrame with the KEYS columns and (stat, column) MultiIndex columns
+        self.cells = cells
+
+    @classmethod
+    def build(cls, df, columns=None):
+        """
+        Aggregate raw rows into a cube
+
+        Args:
+            df: pandas DataFrame with Timestamp (or prepared Date/Hour) columns
+            columns: numeric columns to keep (defaults to the ROLLUP_COLUMNS present)
+        Returns:
+            RollupCube
+        """
+        columns = [col for col in (columns or ROLLUP_COLUMNS) if col in df.columns]
+        region = df['Region'] if 'Region' in df.columns else pd.Series('All', index=df.index)
+        keys = [region.rename('Region'), calendar(df, 'Date').rename('Date'),
+                calendar(df, 'Hour').rename('Hour')]
+        grouped = df[columns].groupby(keys, observed=True, sort=True)
+        cells = pd.concat({stat: getattr(grouped, stat)() for stat in STATS}, axis=1)
+        cells = cells.reset_index()
+        cells['Region'] = cells['Region'].astype(object)
+        return cls(cells)
+
+    @classmethod
+    def concat(cls, cubes):
+        """
+        One cube from the cells of several, e.g. built from consecutive batches
+
+        Cells are matched on an int64 code per (Region, Date, Hour): the codes
+        are sorted once, and cells with the same code are combined statistic
+        by statistic with one ufunc.reduceat per statistic, so no index over
+        the keys is built.
+
+        Returns:
+            RollupCube with cells sorted by KEYS
+        """
+        cells = pd.concat([cube.cells for cube in cubes if len(cube.cells)], ignore_index=True)
+        if not len(cells):
+            return cls(cubes[0].cells) if cubes else cls(pd.DataFrame(columns=KEYS))
+        codes = _cell_codes(cells)
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+        if len(starts) == len(cells):
+            return cls(cells.take(order).reset_index(drop=True))
+        # Key columns sit under ('Region', '') etc. next to the (stat, column) pairs
+        combined = {(key, ''): cells[key].to_numpy()[order[starts]] for key in KEYS}
+        for stat in STATS:
+            values = cells[stat]
+            reduced = _REDUCE[stat].reduceat(values.to_numpy(dtype=np.float64)[order], starts, axis=0)
+            for j, col in enumerate(values.columns):
+                combined[(stat, col)] = reduced[:, j].astype(values[col].dtype, copy=False)
+        return cls(pd.DataFrame(combined))
+
+    def merge(self, other):
+        """
+        Combine with a cube built from other rows (e.g. a newly appended batch)
+
+        Cells present in only one cube are kept as they are; cells with the
+        same Region, Date and Hour are combined statistic by statistic.
+
+        Returns:
+            RollupCube with the cells of both
+        """
+        return RollupCube.concat([self, other])
+
+    @property
+    def columns(self):
+        return list(self.cells['sum'].columns)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def select(self, regions=None, start=None, end=None):
+        """
+        Sub-cube restricted to some regions and/or a date range (inclusive)
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        if regions is not None:
+            mask &= self.cells['Region'].isin(list(regions)).to_numpy()
+        if start is not None:
+            mask &= (self.cells['Date'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.cells['Date'] <= pd.Timestamp(end)).to_numpy()
+        return RollupCube(self.cells[mask])
+
+    def _keys(self, by):
+        keys = []
+        for name in by:
+            if name == 'Month':
+                keys.append(self.cells['Date'].dt.month.rename('Month'))
+            elif name == 'Year':
+                keys.append(self.cells['Date'].dt.year.rename('Year'))
+            else:
+                keys.append(self.cells[name])
+        return keys
+
+    def aggregate(self, by='Month', stat='mean', columns=None):
+        """
+        Re-aggregate the cube's cells to a coarser grouping
+
+        Args:
+            by: key or list of keys among Region, Date, Hour, Month and Year
+            stat: 'mean', 'sum', 'count', 'min' or 'max'
+            columns: columns to return (defaults to all cube columns)
+        Returns:
+            pandas DataFrame indexed by the grouping keys
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        columns = columns or self.columns
+        keys = self._keys(by)
+        if stat == 'mean':
+            sums = self.cells['sum'][columns].groupby(keys).sum()
+            counts = self.cells['count'][columns].groupby(keys).sum()
+            return sums / counts.where(counts > 0)
+        if stat not in _COMBINE:
+            raise ValueError(f"Unknown statistic: {stat}")
+        return self.cells[stat][columns].groupby(keys).agg(_COMBINE[stat])
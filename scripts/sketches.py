@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+
+from scripts.moments import CHUNK_ROWS, Moments, _blocks
+from scripts.zscores import group_codes
+
+# Row labels of describe(), in order
+DESCRIBE_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+QUARTILES = [0.25, 0.5, 0.75]
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch for a single numeric column
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h input values. When a level outgrows its capacity it is sorted and
+    every other item (random offset) is promoted to the next level. Memory
+    stays O(k) items and the rank error is roughly 1.7 / k, independent of
+    how many values are fed in. NaN values are ignored.
+    """
+
+    def __init__(self, k=400, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values, chunk_rows=CHUNK_ROWS):
+        """
+        Feed a batch of values (array-like); NaN entries are skipped
+
+        Large batches are folded in chunk_rows values at a time, so memory
+        stays bounded by the chunk rather than by the batch.
+        """
+        values = np.asarray(values).ravel()
+        for start in range(0, len(values), chunk_rows):
+            block = values[start:start + chunk_rows].astype(np.float64)
+            block = block[~np.isnan(block)]
+            if len(block) == 0:
+                continue
+            self.n += len(block)
+            self.levels[0] = np.concatenate([self.levels[0], block])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Combine with another sketch, e.g. from another chunk, file or region
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved exactly
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2.0 ** level)
+                                  for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) of the values seen so far
+
+        Ranks are interpolated linearly between neighbouring items, so for a
+        sketch that has not compacted yet the result equals np.quantile.
+
+        Args:
+            q: quantile or array of quantiles in [0, 1]
+        Returns:
+            float or numpy array matching q; NaN if the sketch is empty
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        items, cumulative = self._weighted()
+        # An item of weight w stands for ranks cumulative - w .. cumulative - 1; placing it at the
+        # middle of that span and interpolating between neighbours gives np.quantile's linear
+        # method exactly while every weight is still 1 (fewer than k values seen)
+        positions = cumulative - (np.diff(cumulative, prepend=0) + 1) / 2
+        result = np.interp(q * (cumulative[-1] - 1), positions, items)
+        return result if q.ndim else float(result)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def __len__(self):
+        return self.n
+
+
+class SketchSummary:
+    """
+    Mergeable describe() for several columns in constant memory
+
+    Count, mean and standard deviation come from Moments and the minimum and
+    maximum are tracked exactly; quartiles (or any other quantile) come from
+    one QuantileSketch per column, with a rank error of about 1.7 / k. Rows
+    are fed in blocks, and summaries of different chunks, files or regions
+    merge into the summary of their union.
+    """
+
+    def __init__(self, columns, k=400, seed=0):
+        self.columns = list(columns)
+        self.sketches = {col: QuantileSketch(k=k, seed=seed) for col in self.columns}
+        self.moments = Moments(self.columns)
+        self.minimum = np.full(len(self.columns), np.inf)
+        self.maximum = np.full(len(self.columns), -np.inf)
+
+    def update(self, values):
+        """
+        Fold in a chunk of rows
+
+        Args:
+            values: pandas DataFrame containing self.columns, or a 2D array
+                with one column per entry of self.columns
+        """
+        for block in _blocks(values, self.columns):
+            self.moments.update(block)
+            for j, col in enumerate(self.columns):
+                self.sketches[col].update(block[:, j])
+            # fmin/fmax skip NaN, so all-missing columns keep their infinite start values
+            self.minimum = np.fmin(self.minimum, np.fmin.reduce(block, axis=0, initial=np.inf))
+            self.maximum = np.fmax(self.maximum, np.fmax.reduce(block, axis=0, initial=-np.inf))
+        return self
+
+    def merge(self, other):
+        """
+        Combine with the summary of another chunk, file or region (same columns)
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge summaries over different columns")
+        self.moments.merge(other.moments)
+        for col in self.columns:
+            self.sketches[col].merge(other.sketches[col])
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) per column
+
+        Returns:
+            pandas Series over the columns for a scalar q, or a DataFrame
+            indexed by q for a list of quantiles
+        """
+        if np.ndim(q) == 0:
+            return pd.Series({col: self.sketches[col].quantile(q) for col in self.columns}, dtype=np.float64)
+        return pd.DataFrame({col: self.sketches[col].quantile(q) for col in self.columns}, index=list(q))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def describe(self):
+        """
+        describe()-style table: exact count, mean, std, min and max with sketched quartiles
+        """
+        count = self.moments.count
+        empty = count == 0
+        quartiles = np.array([self.sketches[col].quantile(QUARTILES) for col in self.columns]).T
+        stats = np.vstack([count, self.moments.mean, self.moments.std(ddof=1),
+                           self.minimum, quartiles, self.maximum])
+        stats[1:, empty] = np.nan
+        return pd.DataFrame(stats, index=DESCRIBE_STATS, columns=self.columns)
+
+
+class RegionSummary:
+    """
+    One SketchSummary per Region, updated chunk by chunk and mergeable across files
+    """
+
+    def __init__(self, columns, k=400, seed=0):
+        self.columns = list(columns)
+        self.k = k
+        self.seed = seed
+        self.regions = {}
+
+    def _summary(self, region):
+        if region not in self.regions:
+            self.regions[region] = SketchSummary(self.columns, k=self.k, seed=self.seed)
+        return self.regions[region]
+
+    def update(self, df, chunk_rows=CHUNK_ROWS):
+        """
+        Fold in a chunk of rows; without a Region column every row counts towards 'All'
+
+        The frame is read chunk_rows rows at a time and each block is split by
+        Region, so no per-region copy of the frame is built.
+        """
+        by = 'Region' if 'Region' in df.columns else None
+        for start in range(0, len(df), chunk_rows):
+            block = df.iloc[start:start + chunk_rows]
+            codes, labels = group_codes(block, by)
+            for i, region in enumerate(labels):
+                self._summary('All' if region is None else region).update(block[codes == i])
+        return self
+
+    def merge(self, other):
+        """
+        Combine with the summaries of other chunks or files (same columns)
+        """
+        for region, summary in other.regions.items():
+            self._summary(region).merge(summary)
+        return self
+
+    def describe(self):
+        """
+        Table indexed by (Region, stat) with one column per input column, like region_stats
+        """
+        tables = {region: summary.describe() for region, summary in self.regions.items()}
+        if not tables:
+            index = pd.MultiIndex.from_product([[], DESCRIBE_STATS], names=['Region', 'stat'])
+            return pd.DataFrame(index=index, columns=self.columns, dtype=np.float64)
+        return pd.concat(tables, names=['Region', 'stat'])
@@ -0,0 +1,154 @@
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from scripts.ingest import load_csv
+
+# Content-addressed columnar copies of CSV inputs live next to the raw data
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'data', 'cache')
+
+FORMATS = {'feather': '.feather', 'parquet': '.parquet'}
+
+
+def content_hash(source):
+    """
+    Hash the contents of a path or binary file object without consuming it
+
+    Args:
+        source: path or binary file object
+    Returns:
+        hex digest identifying the contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(source, 'getbuffer'):
+        digest.update(source.getbuffer())
+    elif hasattr(source, 'read'):
+        position = source.tell()
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def to_table(df):
+    """
+    Convert a DataFrame to an Arrow table, keeping NaN in float columns as values
+    """
+    arrays = {}
+    for name, col in df.items():
+        if pd.api.types.is_float_dtype(col.dtype):
+            # Arrow nulls would force a copy on read; NaN values can be mapped directly
+            arrays[name] = pa.array(col.to_numpy())
+        else:
+            arrays[name] = pa.array(col)
+    return pa.table(arrays)
+
+
+def write_columnar(df, path, fmt=None):
+    """
+    Write a DataFrame as Feather (uncompressed, memory-mappable) or Parquet
+
+    Args:
+        df: pandas DataFrame to store (the index is not stored)
+        path: destination file
+        fmt: 'feather' or 'parquet'; inferred from the file extension when omitted
+    Returns:
+        path of the written file
+    """
+    fmt = fmt or _format_of(path)
+    table = to_table(df)
+    # Write to a temporary name first so readers never see a partial file
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if fmt == 'feather':
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+    elif fmt == 'parquet':
+        pq.write_table(table, tmp_path)
+    else:
+        raise ValueError(f"Unsupported columnar format: {fmt}")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_columnar(path, columns=None):
+    """
+    Read a Feather or Parquet file, memory-mapping it where possible
+
+    Args:
+        path: file written by write_columnar
+        columns: optional list of columns to read
+    Returns:
+        pandas DataFrame
+    """
+    if _format_of(path) == 'feather':
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    # split_blocks lets numeric columns without nulls reference the mapped buffers directly
+    return table.to_pandas(split_blocks=True)
+
+
+def _format_of(path):
+    for fmt, ext in FORMATS.items():
+        if str(path).endswith(ext):
+            return fmt
+    raise ValueError(f"Cannot infer columnar format from file name: {path}")
+
+
+def store_path(key, store_dir=DEFAULT_STORE_DIR, fmt='feather'):
+    return os.path.join(store_dir, key + FORMATS[fmt])
+
+
+def to_columnar(source, store_dir=DEFAULT_STORE_DIR, fmt='feather'):
+    """
+    Convert a CSV into a content-addressed columnar file, once
+
+    Args:
+        source: path or binary file object with CSV data
+        store_dir: directory holding the columnar copies
+        fmt: 'feather' or 'parquet'
+    Returns:
+        path of the columnar file
+    """
+    path = store_path(content_hash(source), store_dir, fmt)
+    if not os.path.exists(path):
+        os.makedirs(store_dir, exist_ok=True)
+        write_columnar(load_csv(source), path, fmt)
+    return path
+
+
+def load(source, columns=None, store_dir=DEFAULT_STORE_DIR, fmt='feather'):
+    """
+    Load a CSV through the columnar store
+
+    The first load parses the CSV and writes its columnar copy; later loads of
+    the same content read the memory-mapped copy instead of parsing again.
+    If the store is not writable the parsed frame is returned as is.
+
+    Args:
+        source: path or binary file object with CSV data
+        columns: optional list of columns to load
+        store_dir: directory holding the columnar copies
+        fmt: 'feather' or 'parquet'
+    Returns:
+        pandas DataFrame with the load_csv schema
+    """
+    path = store_path(content_hash(source), store_dir, fmt)
+    if os.path.exists(path):
+        return read_columnar(path, columns)
+
+    df = load_csv(source)
+    try:
+        os.makedirs(store_dir, exist_ok=True)
+        write_columnar(df, path, fmt)
+    except OSError:
+        pass
+    return df if columns is None else df[columns]
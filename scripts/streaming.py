@@ -0,0 +1,245 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from scripts.ingest import iter_csv, numeric_columns
+from scripts.moments import Moments
+from scripts.sketches import QuantileSketch
+from scripts.store import to_table
+
+# Same cleaning rules as data_cleaning in data_proccess.py
+IRRADIANCE_COLUMNS = ['GHI', 'DNI', 'DHI']
+ZSCORE_COLUMNS = ['GHI', 'DNI', 'DHI', 'Tamb', 'TModA', 'TModB', 'WS', 'RH']
+FFILL_LIMIT = 3
+
+
+class ForwardFill:
+    """
+    Forward fill with a gap limit that carries state across chunk boundaries
+
+    The last `limit` raw rows seen so far are prepended to the next chunk, which
+    is exactly the context a limited forward fill can reach back to. They may
+    span several chunks when chunks are shorter than `limit`.
+    """
+
+    def __init__(self, limit=FFILL_LIMIT):
+        self.limit = limit
+        self.tail = None
+
+    def __call__(self, chunk):
+        if self.tail is not None and len(self.tail):
+            n = len(self.tail)
+            combined = pd.concat([self.tail, chunk])
+            filled = combined.ffill(limit=self.limit).iloc[n:]
+            self.tail = combined.iloc[-self.limit:]
+        else:
+            filled = chunk.ffill(limit=self.limit)
+            self.tail = chunk.iloc[-self.limit:]
+        return filled
+
+
+def _clip_irradiance(chunk):
+    # Negative irradiance is physically impossible
+    for col in IRRADIANCE_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].clip(lower=0)
+    return chunk
+
+
+class CleaningStats:
+    """
+    Global statistics data_cleaning needs, accumulated chunk by chunk
+
+    Holds medians (quantile sketches), the Region mode, per-column NaN counts
+    left after forward filling, and mergeable moments of the z-score columns.
+    """
+
+    def __init__(self, numeric_columns, zscore_columns, k=400):
+        self.numeric_columns = numeric_columns
+        self.zscore_columns = zscore_columns
+        self.sketches = {col: QuantileSketch(k=k, seed=0) for col in numeric_columns}
+        self.moments = Moments(zscore_columns)
+        self.remaining_nans = pd.Series(0, index=numeric_columns, dtype=np.int64)
+        self.region_counts = pd.Series(dtype=np.int64)
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in self.numeric_columns:
+            self.sketches[col].update(chunk[col].to_numpy())
+        self.remaining_nans += chunk[self.numeric_columns].isnull().sum()
+        self.moments.update(chunk[self.zscore_columns])
+        if 'Region' in chunk.columns:
+            counts = chunk['Region'].astype(object).value_counts()
+            self.region_counts = self.region_counts.add(counts, fill_value=0)
+
+    def finalize(self):
+        self.medians = pd.Series({col: self.sketches[col].median() for col in self.numeric_columns})
+        # Missing values are imputed with the median, which shifts the z-score moments;
+        # the correction goes on a copy so more chunks can still be folded in afterwards
+        moments = copy.deepcopy(self.moments).add_constant(self.medians[self.zscore_columns].to_numpy(),
+                                                           self.remaining_nans[self.zscore_columns].to_numpy())
+        self.means = moments.mean
+        self.stds = moments.std(ddof=1)
+        self.region_mode = self.region_counts.idxmax() if len(self.region_counts) else None
+        return self
+
+
+class TimestampSet:
+    """
+    Set of int64 timestamps kept as sorted runs, for deduplicating across chunks
+
+    Each added chunk becomes a new run, and runs of similar size are merged
+    like the carries of a binary counter. Lookups binary-search each of the
+    O(log n) runs, so adding and checking a chunk costs time proportional to
+    the chunk (amortised) rather than to every timestamp seen so far.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, ts):
+        """
+        Boolean array telling which of the int64 timestamps ts were added before
+        """
+        found = np.zeros(len(ts), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, ts), len(run) - 1)
+            found |= run[pos] == ts
+        return found
+
+    def add(self, ts):
+        run = np.unique(ts)
+        if not len(run):
+            return self
+        self.runs.append(run)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], last)
+        return self
+
+
+class ChunkWriter:
+    """
+    Append cleaned chunks to a CSV or Parquet file
+    """
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._tmp_path = f"{path}.tmp-{os.getpid()}"
+        self._parquet = None
+        self._first = True
+
+    def write(self, chunk):
+        if self.output_format == 'csv':
+            chunk.to_csv(self._tmp_path, mode='w' if self._first else 'a',
+                         header=self._first, index=False)
+        elif self.output_format == 'parquet':
+            table = to_table(chunk)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._tmp_path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            raise ValueError(f"Unsupported streaming output format: {self.output_format}")
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if os.path.exists(self._tmp_path):
+            os.replace(self._tmp_path, self.path)
+
+
+def _clean_chunk(chunk, stats, seen):
+    # seen: TimestampSet of rows already written; updated with this chunk's rows
+    chunk = chunk.fillna(stats.medians)
+    if stats.region_mode is not None and 'Region' in chunk.columns:
+        chunk['Region'] = chunk['Region'].astype(object).fillna(stats.region_mode)
+
+    # Remove outliers using the global z-score statistics
+    keep = np.ones(len(chunk), dtype=bool)
+    for j, col in enumerate(stats.zscore_columns):
+        values = chunk[col].to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            keep &= np.abs(values - stats.means[j]) <= 3 * stats.stds[j]
+    chunk = chunk[keep]
+
+    # Remove duplicate timestamps, including ones already written by earlier chunks
+    ts = chunk['Timestamp'].to_numpy().view(np.int64)
+    keep = ~chunk['Timestamp'].duplicated().to_numpy() & ~seen.contains(ts)
+    seen.add(ts[keep])
+    return chunk[keep]
+
+
+def clean_csv(source, output_path, chunksize=500_000, output_format='csv', sketch_k=400):
+    """
+    Streaming version of data_cleaning for inputs larger than memory
+
+    Pass 1 reads the file chunk by chunk and accumulates what the cleaning
+    rules need globally: medians (KLL sketches), the Region mode, and the
+    z-score means and standard deviations (mergeable moments, corrected for
+    the median imputation). Pass 2 re-reads the file, applies the same steps
+    as data_cleaning to every chunk and appends it to the output. Forward-fill
+    state is carried across chunk boundaries.
+
+    Peak memory is a few chunks plus O(sketch_k) per column; the only state
+    that grows with the input is the set of distinct timestamps (8 bytes
+    each) used to drop duplicates across chunks. Rows are written in input
+    order rather than re-sorted, so inputs are expected to be chronological.
+
+    Args:
+        source: path to the raw CSV
+        output_path: destination file for the cleaned data
+        chunksize: rows per chunk
+        output_format: 'csv' or 'parquet'
+        sketch_k: quantile sketch size; median rank error is about 1.7 / sketch_k
+    Returns:
+        dict with row counts and the statistics used for cleaning
+    """
+    # Pass 1: global statistics
+    stats = None
+    ffill = ForwardFill()
+    for chunk in iter_csv(source, chunksize):
+        chunk = ffill(_clip_irradiance(chunk))
+        if stats is None:
+            zscore_columns = [col for col in ZSCORE_COLUMNS if col in chunk.columns]
+            stats = CleaningStats(numeric_columns(chunk), zscore_columns, k=sketch_k)
+        stats.update(chunk)
+    if stats is None:
+        raise ValueError(f"No rows to clean in {source}")
+    stats.finalize()
+
+    # Pass 2: clean and write
+    ffill = ForwardFill()
+    writer = ChunkWriter(output_path, output_format)
+    seen = TimestampSet()
+    rows_written = 0
+    try:
+        for chunk in iter_csv(source, chunksize):
+            cleaned = _clean_chunk(ffill(_clip_irradiance(chunk)), stats, seen)
+            writer.write(cleaned)
+            rows_written += len(cleaned)
+    finally:
+        writer.close()
+
+    print("\nStreaming Data Cleaning Summary:")
+    print(f"Original rows: {stats.rows}")
+    print(f"Final rows: {rows_written}")
+    print(f"Total rows removed: {stats.rows - rows_written}")
+    print(f"\nCleaned dataset saved to '{output_path}'")
+
+    return {
+        'rows_in': stats.rows,
+        'rows_out': rows_written,
+        'medians': stats.medians,
+        'means': pd.Series(stats.means, index=stats.zscore_columns),
+        'stds': pd.Series(stats.stds, index=stats.zscore_columns),
+        'region_mode': stats.region_mode,
+    }
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# Wind speed bin edges in m/s; the last bin is open-ended
+SPEED_BINS = np.arange(0, 35, 5)
+
+
+def _speed_labels(speed_bins):
+    labels = [f"[{lo:g}, {hi:g})" for lo, hi in zip(speed_bins[:-1], speed_bins[1:])]
+    return labels + [f"[{speed_bins[-1]:g}, inf)"]
+
+
+def wind_histogram(df, n_sectors=16, speed_bins=SPEED_BINS):
+    """
+    Direction-sector x speed-bin histogram of wind measurements in one pass
+
+    Sectors are centred on north (sector 0 spans ±half a sector around 0°).
+    Counts and per-sector sums are accumulated with bincount, so the cost is
+    linear in rows and the result has n_sectors rows however finely WD is
+    recorded.
+
+    Args:
+        df: pandas DataFrame with WD and WS columns (WDstdev is optional)
+        n_sectors: number of direction sectors
+        speed_bins: increasing speed bin edges; values at or above the last edge
+            fall into an open-ended last bin
+    Returns:
+        (sectors, speeds): sectors is a DataFrame indexed by sector centre in
+        degrees with count, frequency (%), mean_speed and mean_wdstdev columns;
+        speeds is a DataFrame of frequencies (%) per sector and speed bin
+    """
+    direction = df['WD'].to_numpy(dtype=np.float64, na_value=np.nan)
+    speed = df['WS'].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = np.isfinite(direction) & np.isfinite(speed) & (speed >= speed_bins[0])
+    direction, speed = direction[valid], speed[valid]
+
+    width = 360.0 / n_sectors
+    # Shift by half a sector so sector 0 is centred on north, then wrap
+    position = direction * (1.0 / width)
+    position += 0.5
+    np.floor(position, out=position)
+    sector = position.astype(np.intp)
+    sector %= n_sectors
+    speed_bin = np.searchsorted(speed_bins, speed, side='right') - 1
+    n_bins = len(speed_bins)
+
+    counts = np.bincount(sector, minlength=n_sectors).astype(np.float64)
+    speed_counts = np.bincount(sector * n_bins + speed_bin, minlength=n_sectors * n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_speed = np.bincount(sector, weights=speed, minlength=n_sectors) / counts
+        if 'WDstdev' in df.columns:
+            wdstdev = df['WDstdev'].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+            present = ~np.isnan(wdstdev)
+            mean_wdstdev = (np.bincount(sector[present], weights=wdstdev[present], minlength=n_sectors)
+                            / np.bincount(sector[present], minlength=n_sectors))
+        else:
+            mean_wdstdev = np.full(n_sectors, np.nan)
+
+    total = max(counts.sum(), 1.0)
+    centres = pd.Index(np.arange(n_sectors) * width, name='Direction')
+    sectors = pd.DataFrame({
+        'count': counts.astype(np.int64),
+        'frequency': counts / total * 100,
+        'mean_speed': mean_speed,
+        'mean_wdstdev': mean_wdstdev,
+    }, index=centres)
+    speeds = pd.DataFrame(speed_counts.reshape(n_sectors, n_bins) / total * 100,
+                          index=centres, columns=_speed_labels(speed_bins))
+    return sectors, speeds
+
+
+def polar_axes(fig, position=111):
+    """
+    Polar axes laid out like a compass: north up, angles increasing clockwise
+    """
+    ax = fig.add_subplot(position, projection='polar')
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_xticks(np.radians(np.arange(0, 360, 45)))
+    ax.set_xticklabels(['N', 'N-E', 'E', 'S-E', 'S', 'S-W', 'W', 'N-W'])
+    return ax
+
+
+def stacked_rose(ax, speeds, opening=0.8, cmap='viridis', edgecolor='white'):
+    """
+    Draw a stacked wind rose from the speed table returned by wind_histogram
+
+    Args:
+        ax: polar axes (see polar_axes)
+        speeds: DataFrame of frequencies indexed by sector centre, one column per speed bin
+        opening: fraction of each sector covered by its bar
+    """
+    theta = np.radians(speeds.index.to_numpy(dtype=np.float64))
+    width = 2 * np.pi / len(speeds) * opening
+    colors = plt.get_cmap(cmap)(np.linspace(0, 1, speeds.shape[1]))
+    bottom = np.zeros(len(speeds))
+    for color, label in zip(colors, speeds.columns):
+        values = speeds[label].to_numpy()
+        ax.bar(theta, values, width=width, bottom=bottom, color=color,
+               edgecolor=edgecolor, label=label)
+        bottom += values
+    return ax
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# Measurements screened for outliers by default
+KEY_COLUMNS = ['GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS']
+
+
+def group_codes(df, by='Region'):
+    """
+    Integer group code per row and the matching labels
+
+    Args:
+        df: pandas DataFrame
+        by: grouping column, or None to treat the frame as one group
+    Returns:
+        (codes, labels); rows with a missing group label get code -1
+    """
+    if by is None:
+        return np.zeros(len(df), dtype=np.intp), [None]
+    codes, labels = pd.factorize(df[by], sort=False)
+    return codes, list(labels)
+
+
+def grouped_moments(df, columns, by='Region', ddof=0):
+    """
+    Per-group mean and standard deviation of several columns, ignoring NaN
+
+    Each column costs two bincount passes (sums, then squared deviations from
+    the group mean), with no per-group Python callbacks.
+
+    Args:
+        df: pandas DataFrame
+        columns: numeric columns to summarise
+        by: grouping column, or None for whole-frame moments
+        ddof: delta degrees of freedom (0 matches scipy.stats.zscore, 1 matches pandas std)
+    Returns:
+        (means, stds, labels) where means and stds have shape (groups, columns)
+    """
+    codes, labels = group_codes(df, by)
+    n_groups = len(labels)
+    means = np.full((n_groups, len(columns)), np.nan)
+    stds = np.full((n_groups, len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values) & (codes >= 0)
+        g, v = codes[valid], values[valid]
+        counts = np.bincount(g, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[:, j] = np.bincount(g, weights=v, minlength=n_groups) / counts
+            squares = np.bincount(g, weights=(v - means[g, j]) ** 2, minlength=n_groups)
+            stds[:, j] = np.sqrt(squares / (counts - ddof))
+    return means, stds, labels
+
+
+def _bitset_dtype(n_columns):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_columns <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError("At most 64 columns can be packed into an outlier bitset")
+
+
+def zscore_outliers(df, columns=KEY_COLUMNS, threshold=3, by='Region', ddof=0):
+    """
+    Flag |z-score| > threshold per row as a bitset, without touching df
+
+    Group means and stds are computed once, then each column is compared as
+    |x - mean| > threshold * std with the group statistics broadcast by row
+    code, so no z-score columns are materialised. NaN values are never flagged.
+
+    Args:
+        df: pandas DataFrame
+        columns: columns to screen (at most 64); bit j of a row's flags is columns[j]
+        threshold: z-score magnitude above which a value is an outlier
+        by: grouping column for the z-scores, or None for whole-frame z-scores
+        ddof: delta degrees of freedom for the standard deviation
+    Returns:
+        numpy array of unsigned ints, one per row, with a bit set per outlying column
+    """
+    dtype = _bitset_dtype(len(columns))
+    means, stds, _ = grouped_moments(df, columns, by=by, ddof=ddof)
+    codes, _ = group_codes(df, by)
+    flags = np.zeros(len(df), dtype=dtype)
+    for j, col in enumerate(columns):
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Rows with no group get NaN statistics and therefore never compare as outliers
+        mean = np.append(means[:, j], np.nan)[codes]
+        limit = threshold * np.append(stds[:, j], np.nan)[codes]
+        with np.errstate(invalid='ignore'):
+            is_outlier = np.abs(values - mean) > limit
+        flags |= is_outlier.astype(dtype) << dtype(j)
+    return flags
+
+
+def column_mask(flags, columns, selected):
+    """
+    Boolean row mask of rows flagged in any of the selected columns
+
+    Args:
+        flags: bitset returned by zscore_outliers
+        columns: the columns passed to zscore_outliers
+        selected: subset of columns to test
+    Returns:
+        numpy boolean array
+    """
+    bits = 0
+    for col in selected:
+        bits |= 1 << columns.index(col)
+    return (flags & flags.dtype.type(bits)) != 0
+
+
+def outlier_counts(flags, columns):
+    """
+    Number of flagged rows per column
+
+    Args:
+        flags: bitset returned by zscore_outliers
+        columns: the columns passed to zscore_outliers
+    Returns:
+        pandas Series indexed by column
+    """
+    return pd.Series({col: int(np.count_nonzero(column_mask(flags, columns, [col])))
+                      for col in columns}, name='Outliers')
@@ -0,0 +1,112 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.cache import DataCache, FigureCache, nbytes
+
+
+def _frame(n_rows):
+    return pd.DataFrame({'x': np.zeros(n_rows), 'label': ['a'] * n_rows})
+
+
+def test_data_cache_builds_once_and_counts_hits():
+    cache = DataCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return _frame(10)
+
+    first = cache.get_or_build(('key', 'rollup'), build)
+    assert cache.get_or_build(('key', 'rollup'), build) is first
+    assert len(builds) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['bytes'] == nbytes(first)
+
+
+def test_data_cache_evicts_least_recently_used_by_bytes():
+    size = nbytes(_frame(1000))
+    cache = DataCache(max_bytes=int(2.5 * size))
+    for key in 'abc':
+        cache.get_or_build(key, lambda: _frame(1000))
+    # 'a' was the oldest once 'c' pushed the total over the budget
+    assert cache.stats()['entries'] == 2 and cache.stats()['bytes'] == 2 * size
+    cache.get_or_build('b', lambda: _frame(1000))
+    cache.get_or_build('d', lambda: _frame(1000))
+    assert set(cache._entries) == {'b', 'd'}
+
+    # An entry larger than the whole budget is still kept until the next one arrives
+    cache.get_or_build('huge', lambda: _frame(10_000))
+    assert list(cache._entries) == ['huge']
+
+
+def test_data_cache_evicts_by_entry_count():
+    cache = DataCache(max_entries=2)
+    for key in 'abc':
+        cache.get_or_build(key, lambda: pd.Series([1.0]))
+    assert list(cache._entries) == ['b', 'c']
+
+
+def test_nbytes_counts_object_contents_and_nbytes_attribute():
+    frame = _frame(100)
+    assert nbytes(frame) == frame.memory_usage(index=True, deep=True).sum()
+    assert nbytes(frame['label']) > frame['label'].memory_usage(deep=False)
+    assert nbytes(np.zeros(10)) == 80
+
+
+def _figure(renders):
+    def render():
+        renders.append(1)
+        fig, ax = plt.subplots(figsize=(2, 2))
+        # The same drawing every time, so every PNG has the same size
+        ax.plot([0, 1], [0, 1])
+        return fig
+    return render
+
+
+def test_figure_cache_renders_once_and_closes_figures():
+    cache = FigureCache()
+    renders = []
+    open_before = set(plt.get_fignums())
+    png = cache.get_or_render(('key', 'correlation'), _figure(renders))
+    assert png.startswith(b'\x89PNG')
+    assert cache.get_or_render(('key', 'correlation'), _figure(renders)) is png
+    assert len(renders) == 1
+    assert set(plt.get_fignums()) == open_before
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 1, 1, len(png))
+
+
+def test_figure_cache_evicts_least_recently_used_by_bytes():
+    renders = []
+    size = len(FigureCache().get_or_render('probe', _figure(renders)))
+    # Room for two figures of about that size, not three
+    cache = FigureCache(max_bytes=int(2.5 * size))
+    for key in 'abc':
+        cache.get_or_render(key, _figure(renders))
+    assert list(cache._entries) == ['b', 'c']
+    cache.get_or_render('b', _figure(renders))
+    cache.get_or_render('d', _figure(renders))
+    assert list(cache._entries) == ['b', 'd']
+    assert cache.stats()['bytes'] == sum(len(png) for png in cache._entries.values()) <= cache.max_bytes
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    # A figure larger than the whole budget is still returned and kept on its own
+    cache.max_bytes = 10
+    assert cache.get_or_render('e', _figure(renders)).startswith(b'\x89PNG')
+    assert list(cache._entries) == ['e']
+
+
+def test_figure_cache_closes_figure_when_saving_fails(monkeypatch):
+    def savefig(*args, **kwargs):
+        raise RuntimeError('no backend')
+
+    cache = FigureCache()
+    fig = plt.figure()
+    monkeypatch.setattr(fig, 'savefig', savefig)
+    with pytest.raises(RuntimeError):
+        cache.get_or_render('broken', lambda: fig)
+    assert not plt.fignum_exists(fig.number)
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.catalog import Catalog, region_from_name
+from scripts.ingest import load_csv
+from scripts.store import write_columnar
+
+
+def _station(region, n_rows, seed):
+    df = synthetic(n_rows, n_regions=1, seed=seed)
+    df['Region'] = region
+    return df
+
+
+@pytest.fixture(scope='module')
+def station_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('stations')
+    _station('Benin', 1200, 0).to_csv(directory / 'benin-malanville.csv', index=False)
+    _station('Benin', 800, 1).to_csv(directory / 'Benin_Kandi.csv', index=False)
+    # A Parquet export with the load_csv dtypes
+    raw = tmp_path_factory.mktemp('raw') / 'togo.csv'
+    _station('Togo', 900, 2).to_csv(raw, index=False)
+    write_columnar(load_csv(raw), directory / 'togo-dapaong_qc.parquet')
+    # Region only known from the file's Region column
+    _station('Sierra Leone', 700, 3).to_csv(directory / 'station-7.csv', index=False)
+    # Blank lines make the counted rows an upper bound
+    lines = _station('Sierra Leone', 500, 4).to_csv(index=False).splitlines()
+    (directory / 'sierraleone-bumbuna.csv').write_text('\n'.join(lines[:200] + [''] * 3 + lines[200:]) + '\n\n')
+    (directory / 'notes.txt').write_text('not a station file')
+    return directory
+
+
+def _expected(station_dir, names):
+    frames = []
+    for name in names:
+        path = station_dir / name
+        frames.append(load_csv(path) if name.endswith('.csv') else pd.read_parquet(path))
+    expected = pd.concat(frames, ignore_index=True)
+    return expected.drop(columns=[col for col in ('Comments',) if col in expected.columns])
+
+
+def test_region_from_name():
+    assert region_from_name('data/benin-malanville.csv') == 'Benin'
+    assert region_from_name('Sierra_Leone-Bumbuna.csv') == 'Sierra Leone'
+    assert region_from_name('sierraleone-bumbuna.csv') == 'Sierra Leone'
+    assert region_from_name('station-7.csv') is None
+
+
+def test_scan_infers_regions(station_dir):
+    catalog = Catalog.scan(station_dir)
+    regions = dict(zip(catalog.files['path'].map(lambda path: path.split('/')[-1]), catalog.files['region']))
+    assert regions == {'Benin_Kandi.csv': 'Benin', 'benin-malanville.csv': 'Benin',
+                       'sierraleone-bumbuna.csv': 'Sierra Leone', 'station-7.csv': 'Sierra Leone',
+                       'togo-dapaong_qc.parquet': 'Togo'}
+    assert catalog.regions == ['Benin', 'Sierra Leone', 'Togo']
+
+
+def test_read_matches_concatenated_files(station_dir):
+    dataset = Catalog.scan(station_dir).read(max_workers=2)
+    assert dataset.bounds == {'Benin': (0, 2000), 'Sierra Leone': (2000, 3200), 'Togo': (3200, 4100)}
+
+    expected = _expected(station_dir, ['Benin_Kandi.csv', 'benin-malanville.csv', 'sierraleone-bumbuna.csv',
+                                       'station-7.csv', 'togo-dapaong_qc.parquet'])
+    result = dataset.to_frame()[expected.columns]
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+
+def test_partition_reads_one_region(station_dir):
+    catalog = Catalog.scan(station_dir)
+    expected = _expected(station_dir, ['sierraleone-bumbuna.csv', 'station-7.csv'])
+    partition = catalog.partition('Sierra Leone', columns=['Timestamp', 'GHI'])
+    assert list(partition.columns) == ['Timestamp', 'GHI', 'Region']
+    pd.testing.assert_frame_equal(partition, expected[['Timestamp', 'GHI', 'Region']],
+                                  check_dtype=False, check_categorical=False)
+
+    view = catalog.read().partition('Togo')
+    pd.testing.assert_frame_equal(view.reset_index(drop=True), _expected(station_dir, ['togo-dapaong_qc.parquet']),
+                                  check_dtype=False, check_categorical=False)
+    with pytest.raises(KeyError):
+        catalog.read(['Ghana'])
+
+
+def test_mixed_region_file_is_rejected(tmp_path):
+    pd.concat([_station('Benin', 100, 0), _station('Togo', 100, 1)]).to_csv(tmp_path / 'benin-mixed.csv',
+                                                                           index=False)
+    with pytest.raises(ValueError, match='one file per region'):
+        Catalog.scan(tmp_path).read(max_workers=1)
+
+
+def test_unknown_region_needs_a_mapping(tmp_path):
+    _station('Benin', 100, 0).drop(columns='Region').to_csv(tmp_path / 'station.csv', index=False)
+    with pytest.raises(ValueError, match='Cannot infer the region'):
+        Catalog.scan(tmp_path)
+    catalog = Catalog.scan(tmp_path, regions={'station.csv': 'Benin'})
+    assert catalog.regions == ['Benin'] and len(catalog.read()) == 100
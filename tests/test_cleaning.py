@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.data_proccess import cleaning_events, cleaning_impact
+from scripts.ingest import prepare
+
+SENSORS = ['ModA', 'ModB']
+
+
+@pytest.fixture(scope='module')
+def df():
+    frame = prepare(synthetic(30_000, n_regions=3, seed=5, nan_frac=0.05))
+    rng = np.random.default_rng(5)
+    # Cleanings at any minute, including the first day (nothing before it) and the last
+    frame['Cleaning'] = 0
+    frame.loc[rng.choice(len(frame), 12, replace=False), 'Cleaning'] = 1
+    frame.loc[[0, len(frame) - 1], 'Cleaning'] = 1
+    # A day with every ModA reading missing
+    frame.loc[frame['Date'] == frame['Date'].iloc[len(frame) // 2], 'ModA'] = np.nan
+    # Shuffled rows, so nothing relies on time order
+    return frame.sample(frac=1, random_state=0)
+
+
+def _old_events(df, window=1):
+    # The per-date loop cleaning_events replaced, widened to window days on each side
+    dates = df['Timestamp'].dt.normalize()
+    rows = {}
+    for date in dates[df['Cleaning'] == 1].unique():
+        before = df[(dates >= date - pd.Timedelta(days=window)) & (dates < date)][SENSORS].mean()
+        after = df[(dates >= date) & (dates < date + pd.Timedelta(days=window))][SENSORS].mean()
+        rows[date] = [*before, *after]
+    columns = pd.MultiIndex.from_product([['Before', 'After'], SENSORS])
+    return pd.DataFrame.from_dict(rows, orient='index', columns=columns).sort_index()
+
+
+@pytest.mark.parametrize('window', [1, 2])
+def test_events_match_per_date_loop(df, window):
+    events = cleaning_events(df, window=window)
+    pd.testing.assert_frame_equal(events, _old_events(df, window), check_names=False,
+                                  check_index_type=False, check_freq=False)
+    assert events[('Before', 'ModA')].isna().iloc[0]
+
+
+def test_events_by_region_match_per_region_loop(df):
+    events = cleaning_events(df, by_region=True)
+    for region, group in df.groupby('Region'):
+        expected = _old_events(group)
+        result = events.xs(region, level='Region')
+        pd.testing.assert_frame_equal(result, expected, check_names=False,
+                                      check_index_type=False, check_freq=False)
+    assert len(events) == df.groupby('Region')[['Date', 'Cleaning']].apply(
+        lambda group: group.loc[group['Cleaning'] == 1, 'Date'].nunique()).sum()
+
+
+def test_impact_averages_the_events(df, capsys):
+    result = cleaning_impact(df)
+    # The old table: groupby('Day') over the concatenated before/after rows
+    events = _old_events(df)
+    expected = pd.DataFrame({day: events[day].mean() for day in ['After', 'Before']}).T
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+    assert 'Percentage Change After Cleaning' in capsys.readouterr().out
+
+
+def test_no_cleaning_days(df):
+    events = cleaning_events(df.assign(Cleaning=0))
+    assert events.empty and list(events.columns) == [(side, sensor) for side in ['Before', 'After']
+                                                      for sensor in SENSORS]
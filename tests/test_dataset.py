@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.dataset import SENSOR_COLUMNS, Dataset, downcast
+from scripts.ingest import CALENDAR_COLUMNS, prepare
+
+
+@pytest.fixture(scope='module')
+def raw():
+    # Raw CSV schema: Timestamp as text, float64 sensors, int64 Cleaning, Region as text
+    return synthetic(5000, n_regions=3, seed=12, nan_frac=0.02)
+
+
+def test_storage_form(raw):
+    dataset = Dataset.from_frame(raw)
+    timestamps = dataset.columns['Timestamp']
+    assert timestamps.dtype == np.int64
+    np.testing.assert_array_equal(timestamps, pd.to_datetime(raw['Timestamp']).to_numpy().view(np.int64))
+    assert timestamps[0] == pd.Timestamp(raw['Timestamp'].iloc[0]).value
+
+    assert dataset.columns['Cleaning'].dtype == bool
+    np.testing.assert_array_equal(dataset.columns['Cleaning'], raw['Cleaning'] == 1)
+    assert all(dataset.columns[col].dtype == np.float32 for col in SENSOR_COLUMNS if col in raw.columns)
+    assert dataset.columns['Region'].dtype == np.int8 and dataset.regions == ['Benin', 'Sierra Leone', 'Togo']
+    assert dataset.columns['Comments'].dtype == raw['Comments'].dtype
+    assert len(dataset) == len(raw)
+    assert dataset.nbytes == dataset.memory_usage().sum() < raw.memory_usage(deep=True).sum() / 2
+
+
+def test_to_frame_round_trip(raw):
+    frame = Dataset.from_frame(raw).to_frame()
+    assert list(frame.columns) == list(raw.columns)
+    pd.testing.assert_series_equal(frame['Timestamp'], pd.to_datetime(raw['Timestamp']))
+    assert frame['Region'].dtype == 'category'
+    pd.testing.assert_series_equal(frame['Region'].astype(object), raw['Region'])
+    pd.testing.assert_frame_equal(frame[SENSOR_COLUMNS], raw[SENSOR_COLUMNS].astype(np.float32))
+    assert frame['Cleaning'].sum() == raw['Cleaning'].sum()
+
+
+def test_to_frame_does_not_copy(raw):
+    dataset = Dataset.from_frame(raw)
+    frame = dataset.to_frame()
+    for col in ['GHI', 'Cleaning', 'Timestamp']:
+        assert np.shares_memory(frame[col].to_numpy(), dataset.columns[col])
+    # A frame that is already compact is wrapped again without converting its columns
+    again = Dataset.from_frame(frame)
+    assert np.shares_memory(again.columns['GHI'], dataset.columns['GHI'])
+
+
+def test_cleaning_with_gaps_stays_float(raw):
+    df = raw.astype({'Cleaning': np.float64})
+    df.loc[[3, 7], 'Cleaning'] = np.nan
+    values = Dataset.from_frame(df).columns['Cleaning']
+    assert values.dtype == np.float32 and np.isnan(values[[3, 7]]).all()
+
+
+def test_prepared_frame_and_index(raw):
+    prepared = prepare(raw.copy()).iloc[::2]
+    prepared.loc[prepared.index[:5], 'Region'] = np.nan
+    frame = downcast(prepared)
+    # Calendar columns are left out and derived again by prepare()
+    assert not set(CALENDAR_COLUMNS) & set(frame.columns)
+    pd.testing.assert_index_equal(frame.index, prepared.index)
+    assert frame['Region'].isna().sum() == 5
+    pd.testing.assert_series_equal(frame['Timestamp'], prepared['Timestamp'])
+    pd.testing.assert_frame_equal(prepare(frame)[CALENDAR_COLUMNS], prepared[CALENDAR_COLUMNS])
+
+
+def test_many_regions_widen_the_codes():
+    df = pd.DataFrame({'GHI': np.arange(300.0), 'Region': [f"Station {i}" for i in range(300)]})
+    dataset = Dataset.from_frame(df)
+    assert dataset.columns['Region'].dtype == np.int16
+    pd.testing.assert_series_equal(dataset.to_frame()['Region'].astype(object), df['Region'])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.filters import FilterIndex, active_range
+from scripts.benchmark import synthetic
+from scripts.ingest import load_csv
+
+
+@pytest.fixture(scope='module')
+def frame(tmp_path_factory):
+    path = tmp_path_factory.mktemp('raw') / 'stations.csv'
+    synthetic(20_000, n_regions=3, seed=10, nan_frac=0.05).to_csv(path, index=False)
+    df = load_csv(path).sample(frac=1, random_state=0, ignore_index=True)
+    df.loc[df.index[:50], 'Region'] = np.nan
+    return df
+
+
+def _mask(df, ranges, categories):
+    mask = np.ones(len(df), dtype=bool)
+    for col, bounds in ranges.items():
+        if bounds is not None:
+            mask &= df[col].astype(np.float64).between(*bounds).to_numpy()
+    if categories is not None:
+        mask &= df['Region'].isin(categories).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize('ranges, categories', [
+    ({'Tamb': (20.0, 30.5)}, None),
+    ({'WS': (0.5, 0.6)}, None),
+    ({'Tamb': (25.1, 25.2), 'WS': (1.0, 6.0)}, ['Benin', 'Togo']),
+    ({'Tamb': None, 'WS': (2.0, 3.0)}, ['Togo', 'Togo']),
+    ({}, ['Sierra Leone', 'Ghana']),
+    ({'Tamb': (50.0, 60.0)}, ['Benin']),
+    ({}, []),
+])
+def test_select_matches_boolean_masks(frame, ranges, categories):
+    index = FilterIndex(frame)
+    expected = _mask(frame, ranges, categories)
+    np.testing.assert_array_equal(index.select(ranges, categories), expected)
+    assert index.count(ranges, categories) == len(expected)
+
+
+def test_no_active_filter_selects_nothing_to_copy(frame):
+    index = FilterIndex(frame)
+    assert index.select({'Tamb': None, 'WS': None}) is None
+    assert index.count() == len(frame)
+    assert index.nbytes > 0
+
+
+def test_without_region_column(frame):
+    index = FilterIndex(frame.drop(columns='Region'))
+    np.testing.assert_array_equal(index.select({'WS': (1.0, 2.0)}, ['Benin']),
+                                  _mask(frame, {'WS': (1.0, 2.0)}, None))
+
+
+def test_active_range():
+    assert active_range((1.0, 5.0), (1.0, 5.0)) is None
+    assert active_range([1.5, 5.0], (1.0, 5.0)) == (1.5, 5.0)
@@ -0,0 +1,78 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.incremental import IncrementalCleaner
+from scripts.ingest import load_csv
+from scripts.rollup import RollupCube
+from scripts.sketches import RegionSummary
+from scripts.streaming import clean_csv
+
+
+@pytest.fixture(scope='module')
+def raw(tmp_path_factory):
+    # One station, so timestamps are chronological and unique as clean_csv expects
+    path = tmp_path_factory.mktemp('raw') / 'station.csv'
+    synthetic(3000, n_regions=1, seed=5, nan_frac=0.05).to_csv(path, index=False)
+    return path
+
+
+def _batches(df, n):
+    return [df.iloc[i:i + len(df) // n] for i in range(0, len(df), len(df) // n)]
+
+
+def test_single_append_matches_clean_csv(tmp_path, raw):
+    # A sketch larger than the input keeps the medians exact
+    cleaner = IncrementalCleaner(tmp_path / 'state', sketch_k=8192)
+    cleaner.append(load_csv(raw))
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean_csv(raw, tmp_path / 'streamed.parquet', chunksize=700, output_format='parquet', sketch_k=8192)
+
+    expected = pd.read_parquet(tmp_path / 'streamed.parquet')
+    pd.testing.assert_frame_equal(cleaner.cleaned(), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False, rtol=1e-5)
+
+
+def test_cube_and_summary_match_cleaned_rows(tmp_path, raw):
+    cleaner = IncrementalCleaner(tmp_path / 'state', sketch_k=8192)
+    for batch in _batches(load_csv(raw), 4):
+        cleaner.append(batch)
+    cleaned = cleaner.cleaned()
+
+    expected = RollupCube.build(cleaned).cells
+    pd.testing.assert_frame_equal(cleaner.cube.cells, expected)
+
+    summary = RegionSummary(cleaner.summary.columns, k=8192).update(cleaned)
+    pd.testing.assert_frame_equal(cleaner.summary.describe(), summary.describe())
+
+
+def test_reopened_state_continues_like_one_session(tmp_path, raw):
+    batches = _batches(load_csv(raw), 5)
+    session = IncrementalCleaner(tmp_path / 'session')
+    for batch in batches:
+        session.append(batch)
+        # Reading the cube between appends only folds in the new parts
+        assert len(session.cube) > 0
+
+    for batch in batches:
+        IncrementalCleaner.open(tmp_path / 'reopened').append(batch)
+    reopened = IncrementalCleaner.open(tmp_path / 'reopened')
+
+    assert (reopened.batches, reopened.rows_in, reopened.rows_out) == (5, 3000, session.rows_out)
+    pd.testing.assert_frame_equal(reopened.cleaned(), session.cleaned())
+    pd.testing.assert_frame_equal(reopened.cube.cells, session.cube.cells)
+    pd.testing.assert_frame_equal(reopened.summary.describe(), session.summary.describe())
+
+
+def test_merged_cubes_match_one_build():
+    df = synthetic(6000, n_regions=3, seed=6, nan_frac=0.05)
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    # Overlapping hours across batches, so cells present in several cubes are combined
+    parts = [df.iloc[i::3] for i in range(3)]
+    merged = RollupCube.build(parts[0]).merge(RollupCube.build(parts[1])).merge(RollupCube.build(parts[2]))
+    expected = RollupCube.build(df).cells
+    pd.testing.assert_frame_equal(merged.cells, expected)
+    pd.testing.assert_frame_equal(RollupCube.concat([RollupCube.build(part) for part in parts]).cells, expected)
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from scripts.benchmark import MEMORY_BOUNDS, check_memory, synthetic
+from scripts.dataset import downcast
+from scripts.ingest import prepare
+from scripts.render import DENSITY_THRESHOLD
+
+
+@pytest.fixture(scope='module')
+def frames():
+    # The baseline run absorbs figure and sampling costs that do not grow with the rows; both
+    # frames are above the density threshold, so humidity_analysis draws the same plots for each
+    df = prepare(downcast(synthetic(4 * (DENSITY_THRESHOLD + 1), seed=0)))
+    return df, prepare(downcast(synthetic(DENSITY_THRESHOLD + 1, seed=1)))
+
+
+@pytest.mark.parametrize('name', list(MEMORY_BOUNDS))
+def test_analysis_memory_bound(frames, tmp_path, name):
+    df, baseline = frames
+    table, failures = check_memory(df, str(tmp_path), bounds={name: MEMORY_BOUNDS[name]}, baseline=baseline)
+    row = table.loc[name]
+    assert not row['modified'], f"{name} modified its input frame"
+    assert row['peak_mb'] <= row['bound_mb'], (
+        f"{name} traced {row['peak_mb']:.1f} MB, bound {row['bound_mb']:.1f} MB "
+        f"(baseline {row['baseline_peak_mb']:.1f} MB)")
+    assert failures == []
+
+
+def test_raw_frame_is_not_modified(tmp_path):
+    # A frame straight from the CSV, with Timestamp as text and no calendar columns
+    df = synthetic(20_000, seed=2)
+    expected = df.copy()
+    check_memory(df, str(tmp_path), bounds={'summary_stats': 0.5, 'time_series': 0.5, 'data_cleaning': 1.5})
+    pd.testing.assert_frame_equal(df, expected)
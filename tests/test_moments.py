@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.moments import CovarianceAccumulator, Moments
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    x = rng.normal(1000, 5, 5000)
+    df = pd.DataFrame({'x': x, 'y': 0.5 * x + rng.normal(size=5000), 'z': rng.uniform(size=5000)})
+    # Different missing rows per column, so pairwise-complete counts differ by pair
+    df.loc[::11, 'x'] = np.nan
+    df.loc[::7, 'y'] = np.nan
+    df.loc[3::13, 'z'] = np.nan
+    return df
+
+
+def test_moments_match_pandas(frame):
+    moments = Moments(list(frame.columns)).update(frame)
+    np.testing.assert_allclose(moments.count, frame.count().to_numpy())
+    np.testing.assert_allclose(moments.mean, frame.mean().to_numpy())
+    np.testing.assert_allclose(moments.std(), frame.std().to_numpy())
+    np.testing.assert_allclose(moments.var(ddof=0), frame.var(ddof=0).to_numpy())
+
+
+def test_moments_merge_equals_single_pass(frame):
+    columns = list(frame.columns)
+    merged = Moments(columns)
+    for part in np.array_split(np.arange(len(frame)), 4):
+        merged.merge(Moments(columns).update(frame.iloc[part]))
+    whole = Moments(columns).update(frame)
+    np.testing.assert_allclose(merged.count, whole.count)
+    np.testing.assert_allclose(merged.mean, whole.mean)
+    np.testing.assert_allclose(merged.m2, whole.m2)
+
+
+def test_moments_add_constant():
+    values = pd.DataFrame({'a': [1.0, 2.0, np.nan, 4.0]})
+    moments = Moments(['a']).update(values).add_constant([2.0], [1])
+    np.testing.assert_allclose(moments.std(), values.fillna(2.0).std().to_numpy())
+
+
+def test_moments_merge_rejects_other_columns():
+    with pytest.raises(ValueError):
+        Moments(['a']).merge(Moments(['b']))
+
+
+def test_corr_matches_pandas(frame):
+    stats = CovarianceAccumulator(list(frame.columns), chunk_rows=512).update(frame)
+    pd.testing.assert_frame_equal(stats.corr(), frame.corr(), rtol=1e-9)
+    pd.testing.assert_frame_equal(stats.cov(), frame.cov(), rtol=1e-9)
+    pd.testing.assert_frame_equal(stats.corr(['z', 'x']), frame[['z', 'x']].corr(), rtol=1e-9)
+
+
+def test_corr_merge_equals_single_pass(frame):
+    columns = list(frame.columns)
+    merged = CovarianceAccumulator(columns).update(frame.iloc[:1000])
+    merged.merge(CovarianceAccumulator(columns).update(frame.iloc[1000:] + 50))
+    shifted = pd.concat([frame.iloc[:1000], frame.iloc[1000:] + 50])
+    pd.testing.assert_frame_equal(merged.corr(), shifted.corr(), rtol=1e-9)
+    pd.testing.assert_frame_equal(merged.cov(), shifted.cov(), rtol=1e-9)
+    # Merging an empty accumulator changes nothing
+    before = merged.corr()
+    merged.merge(CovarianceAccumulator(columns))
+    pd.testing.assert_frame_equal(merged.corr(), before)
+
+
+def test_corr_of_sparse_columns_is_nan():
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': [np.nan, 1.0, np.nan]})
+    result = CovarianceAccumulator(['a', 'b']).update(df).corr()
+    pd.testing.assert_frame_equal(result, df.corr())
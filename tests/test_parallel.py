@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.data_proccess import region_missing, region_slices, region_stats
+from scripts.ingest import prepare
+from scripts.parallel import SharedFrame, _region_frame, _shared_columns, run_by_region
+from scripts.zscores import KEY_COLUMNS, column_mask, zscore_outliers
+
+TASKS = ['summary', 'missing', 'negative', 'outliers', 'moments', 'sketches', 'correlation', 'wind', 'rollup',
+         'z_score_analysis']
+
+
+@pytest.fixture(scope='module')
+def df():
+    # Shuffled rows, so the regions are interleaved and SharedFrame has to regroup them
+    return prepare(synthetic(6000, n_regions=3, seed=11, nan_frac=0.05)).sample(frac=1, random_state=0)
+
+
+@pytest.fixture(scope='module')
+def serial(df):
+    return run_by_region(df, TASKS, max_workers=1)
+
+
+@pytest.fixture(scope='module')
+def parallel(df):
+    return run_by_region(df, TASKS, max_workers=2)
+
+
+def test_parallel_matches_serial(serial, parallel):
+    for name in ['summary', 'missing', 'negative', 'outliers', 'wind']:
+        pd.testing.assert_frame_equal(parallel[name], serial[name], check_categorical=False, obj=name)
+    pd.testing.assert_frame_equal(parallel['sketches'].describe(), serial['sketches'].describe())
+    for attr in ['count', 'mean', 'm2']:
+        np.testing.assert_array_equal(getattr(parallel['moments'], attr), getattr(serial['moments'], attr))
+    pd.testing.assert_frame_equal(parallel['correlation'].corr(), serial['correlation'].corr())
+    pd.testing.assert_frame_equal(parallel['rollup'].cells, serial['rollup'].cells, check_categorical=False)
+
+    for region, run in serial['z_score_analysis'].items():
+        assert parallel['z_score_analysis'][region]['output'] == run['output']
+        assert len(parallel['z_score_analysis'][region]['figures']) == len(run['figures']) > 0
+
+
+def test_results_match_whole_frame_functions(df, parallel):
+    columns = _shared_columns(df) + ['Region']
+    pd.testing.assert_frame_equal(parallel['summary'], region_stats(df[columns]), check_categorical=False)
+    pd.testing.assert_frame_equal(parallel['missing'].sort_index(), region_missing(df[columns]).sort_index(),
+                                  check_categorical=False)
+
+    flags = zscore_outliers(df)
+    expected = pd.DataFrame({col: column_mask(flags, KEY_COLUMNS, [col]) for col in KEY_COLUMNS},
+                            index=df.index).groupby(df['Region'], sort=False).sum()
+    pd.testing.assert_frame_equal(parallel['outliers'], expected, check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('grouped', [True, False])
+def test_shared_frame_holds_each_region(df, grouped):
+    frame = df.sort_values('Region', kind='stable') if grouped else df
+    regions, order, bounds = region_slices(frame)
+    assert (order == np.arange(len(frame))).all() == grouped
+    with SharedFrame(frame) as shared:
+        for i, region in enumerate(shared.regions):
+            _, layout, n_rows, label, start, stop = shared.spec(i)
+            part = _region_frame(shared.shm.buf, layout, n_rows, label, start, stop)
+            expected = frame[frame['Region'] == region][_shared_columns(frame)]
+            pd.testing.assert_frame_equal(part.drop(columns='Region'), expected.reset_index(drop=True))
+            del part
+
+
+def test_unknown_task(df):
+    with pytest.raises(ValueError, match='Unknown analysis tasks'):
+        run_by_region(df, ['summary', 'plot'])
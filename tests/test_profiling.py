@@ -0,0 +1,116 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from scripts import profiling
+from scripts.profiling import Profiler, RSSSampler, activate, active, timed
+
+
+@pytest.fixture(autouse=True)
+def no_active_profiler():
+    # activate() is per thread and the test thread is shared, so leave it as found
+    yield
+    activate(None)
+
+
+def test_stage_records_each_run():
+    profiler = Profiler(sample_memory=False)
+    profiler.new_run()
+    with profiler.stage('filter', rows=10):
+        pass
+    with profiler.stage('render') as record:
+        record['rows'] = 4
+    assert profiler.new_run() == 2
+    with profiler.stage('filter', rows=3):
+        pass
+
+    assert [(r['run'], r['stage'], r['rows']) for r in profiler.records] == [
+        (1, 'filter', 10), (1, 'render', 4), (2, 'filter', 3)]
+    assert [r['stage'] for r in profiler.latest()] == ['filter']
+    assert all(r['seconds'] >= 0 and r['peak_mb'] is None and r['error'] is None for r in profiler.records)
+    assert json.loads(profiler.to_json()) == list(profiler.records)
+    profiler.clear()
+    assert profiler.latest() == []
+
+
+def test_failed_stage_is_recorded_and_raised():
+    profiler = Profiler(sample_memory=False)
+    with pytest.raises(KeyError):
+        with profiler.stage('read'):
+            raise KeyError('GHI')
+    (record,) = profiler.records
+    assert record['error'] == "KeyError: 'GHI'" and record['seconds'] is not None
+
+
+def test_records_are_bounded():
+    profiler = Profiler(max_records=3, sample_memory=False)
+    for i in range(5):
+        with profiler.stage(f'stage {i}'):
+            pass
+    assert [r['stage'] for r in profiler.records] == ['stage 2', 'stage 3', 'stage 4']
+
+
+def test_timed_counts_input_and_output_rows():
+    profiler = Profiler(sample_memory=False)
+
+    @profiler.timed()
+    def head(df, n):
+        return df.head(n)
+
+    @profiler.timed(name='load', rows='output')
+    def load():
+        return pd.DataFrame({'x': range(7)})
+
+    head(load(), 2)
+    assert [(r['stage'], r['rows']) for r in profiler.records] == [('load', 7), ('head', 7)]
+    assert head.__name__ == 'head'
+
+
+def test_module_timed_records_into_the_thread_active_profiler():
+    @timed(rows='output')
+    def build(n):
+        return pd.DataFrame({'x': range(n)})
+
+    assert active() is profiling.profiler
+    sessions = [Profiler(sample_memory=False) for _ in range(2)]
+
+    def session(profiler, n):
+        activate(profiler)
+        build(n)
+
+    threads = [threading.Thread(target=session, args=(profiler, n)) for profiler, n in zip(sessions, [3, 5])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [[(r['stage'], r['rows']) for r in p.records] for p in sessions] == [[('build', 3)], [('build', 5)]]
+    # Activation in the other threads did not change this one
+    assert active() is profiling.profiler
+
+    main = activate(Profiler(sample_memory=False))
+    build(2)
+    assert [r['rows'] for r in main.records] == [2]
+
+
+def test_memory_sampling():
+    profiler = Profiler()
+    with profiler.stage('allocate'):
+        block = bytearray(64 * 1024 ** 2)
+        block[::4096] = b'\1' * len(block[::4096])
+    del block
+    (record,) = profiler.records
+    if RSSSampler.rss() is not None:
+        assert record['peak_mb'] >= 32
+
+
+def test_sampler_skips_failed_reads(monkeypatch):
+    reads = iter([100, None, 300, None, 200])
+    monkeypatch.setattr(RSSSampler, 'rss', staticmethod(lambda: next(reads, 200)))
+    sampler = RSSSampler(interval=10)
+    with sampler:
+        sampler._record(RSSSampler.rss())
+        sampler._record(RSSSampler.rss())
+        sampler._record(RSSSampler.rss())
+    assert sampler.peak_mb == 200 / 1024 ** 2
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.dataset import downcast
+from scripts.ingest import load_csv
+from scripts.query import MISSING_REGION, Query, to_partitioned, write_partitioned
+
+
+@pytest.fixture(scope='module')
+def frame(tmp_path_factory):
+    path = tmp_path_factory.mktemp('raw') / 'stations.csv'
+    synthetic(30_000, n_regions=3, seed=8, nan_frac=0.02).to_csv(path, index=False)
+    return downcast(load_csv(path))
+
+
+@pytest.fixture(scope='module')
+def query(frame, tmp_path_factory):
+    # Small row groups, so a narrow Tamb range can skip most of each partition
+    root = tmp_path_factory.mktemp('store') / 'stations.parts'
+    return Query.open(write_partitioned(frame, root, row_group_rows=1000))
+
+
+def _sorted(df):
+    # Region as text, as the category order differs between the store and the frame
+    return df.assign(Region=df['Region'].astype(str)).sort_values(['Region', 'Timestamp'], ignore_index=True)
+
+
+def test_full_scan_returns_every_row(frame, query):
+    result = query.to_frame()
+    assert query.count() == len(frame)
+    pd.testing.assert_frame_equal(_sorted(result)[frame.columns], _sorted(frame), check_dtype=False)
+
+
+def test_region_filter_prunes_partitions(frame, query):
+    selected = query.isin('Region', ['Togo'])
+    assert selected.partitions() == ['Togo']
+    stats = selected.scan_stats()
+    assert (stats['partitions'], stats['partitions_total']) == (1, 3)
+    assert stats['rows'] == selected.count() == (frame['Region'] == 'Togo').sum()
+    assert set(selected.to_frame()['Region']) == {'Togo'}
+
+
+def test_empty_selection_matches_no_rows(frame, query):
+    empty = query.isin('Region', [])
+    assert empty.count() == 0
+    assert empty.partitions() == []
+    assert empty.scan_stats()['row_groups'] == 0
+    result = empty.select(['GHI', 'Region']).to_frame()
+    assert result.empty and list(result.columns) == ['GHI', 'Region']
+
+
+def test_between_matches_pandas_and_skips_row_groups(frame, query):
+    lo, hi = np.nanpercentile(frame['Tamb'], [40, 45])
+    selected = query.between('Tamb', lo, hi).between('WS', 1, 4)
+    expected = frame[frame['Tamb'].between(lo, hi) & frame['WS'].between(1, 4)]
+
+    result = selected.select(['Timestamp', 'Region', 'Tamb', 'WS']).to_frame()
+    # NaN rows fall inside row groups whose statistics cover the range; they must not be counted
+    assert selected.count() == len(expected)
+    assert query.between('Tamb', *np.nanpercentile(frame['Tamb'], [0, 100])).count() == frame['Tamb'].notna().sum()
+    pd.testing.assert_frame_equal(_sorted(result), _sorted(expected[['Timestamp', 'Region', 'Tamb', 'WS']]),
+                                  check_dtype=False)
+    # Rows are clustered by Tamb within each partition, so most row groups are ruled out
+    stats = selected.scan_stats()
+    assert stats['row_groups'] < stats['row_groups_total'] / 4
+    assert len(result) <= stats['rows'] < stats['rows_total']
+
+
+def test_where_combines_with_other_filters(frame, query):
+    selected = query.isin('Region', ['Benin', 'Togo']).where(pc.field('GHI') > 500)
+    expected = frame['Region'].isin(['Benin', 'Togo']) & (frame['GHI'] > 500)
+    assert selected.count() == expected.sum()
+    assert selected.partitions() == ['Benin', 'Togo']
+
+
+def test_select_and_column_range(frame, query):
+    assert list(query.select(['GHI', 'Comments', 'Tamb']).to_frame().columns) == ['GHI', 'Tamb']
+    lo, hi = query.column_range('Tamb')
+    assert (lo, hi) == (frame['Tamb'].min(), frame['Tamb'].max())
+
+
+def test_to_partitioned_is_content_addressed(tmp_path, frame):
+    path = tmp_path / 'stations.csv'
+    synthetic(3000, n_regions=2, seed=9).to_csv(path, index=False)
+    root = to_partitioned(str(path), store_dir=tmp_path / 'store')
+    with open(path, 'rb') as f:
+        assert to_partitioned(f, store_dir=tmp_path / 'store') == root
+    assert Query.open(root).partitions() == ['Benin', 'Togo']
+    assert Query.open(root).count() == 3000
+
+
+def test_rows_without_region_get_their_own_partition(tmp_path, frame):
+    df = frame.sample(3000, random_state=0)
+    df.loc[df.index[:40], 'Region'] = np.nan
+    query = Query.open(write_partitioned(df, tmp_path / 'stations.parts'))
+    assert query.partitions() == sorted(['Benin', 'Sierra Leone', 'Togo', MISSING_REGION])
+    assert '' not in set(query.to_frame()['Region'])
+    assert query.count() == len(df)
+    assert query.isin('Region', [MISSING_REGION]).count() == 40
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.data_proccess import missing_values, region_missing, region_stats, summary_stats
+from scripts.ingest import prepare
+
+
+@pytest.fixture(scope='module')
+def df():
+    frame = prepare(synthetic(9000, n_regions=3, seed=6, nan_frac=0.05))
+    # A region with a single row (std undefined) and rows without a Region
+    frame.loc[len(frame)] = frame.iloc[0]
+    frame.loc[len(frame) - 1, 'Region'] = 'Ghana'
+    frame.loc[frame.sample(25, random_state=1).index, 'Region'] = np.nan
+    # Shuffled rows, so regions are interleaved and appear in a different order
+    return frame.sample(frac=1, random_state=0)
+
+
+def _old_stats(df):
+    # The per-region mask and describe() that region_stats replaced
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    return pd.concat({region: df[df['Region'] == region][numeric_cols].describe()
+                      for region in df['Region'].dropna().unique()}, names=['Region', 'stat'])
+
+
+def test_region_stats_match_describe(df):
+    result = region_stats(df)
+    expected = _old_stats(df)
+    assert list(result.index.unique(level='Region')) == list(df['Region'].dropna().unique())
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert (result.loc[('Ghana', 'count')] <= 1).all()
+    assert result.loc[('Ghana', 'std')].isna().all()
+
+
+def test_region_stats_of_selected_columns(df):
+    result = region_stats(df, columns=['GHI', 'Month'])
+    pd.testing.assert_frame_equal(result, _old_stats(df)[['GHI', 'Month']], check_dtype=False)
+
+
+def test_summary_stats_prints_every_region(df, capsys):
+    stats = summary_stats(df)
+    pd.testing.assert_frame_equal(stats, _old_stats(df).round(2), check_dtype=False)
+    out = capsys.readouterr().out
+    assert all(f"Summary Statistics for {region}:" in out for region in ['Benin', 'Togo', 'Sierra Leone', 'Ghana'])
+
+
+def test_region_missing_matches_groupby(df, capsys):
+    result = region_missing(df)
+    grouped = df.groupby('Region')
+    expected = grouped.apply(lambda x: x.isnull().sum()).stack()
+    pd.testing.assert_series_equal(result['Missing Values'], expected, check_names=False)
+    percentages = grouped.apply(lambda x: x.isnull().sum() / len(x) * 100).stack()
+    pd.testing.assert_series_equal(result['Percentage Missing'], percentages.round(2), check_names=False)
+
+    summary, by_region = missing_values(df)
+    pd.testing.assert_frame_equal(by_region, result)
+    assert summary.loc['Region', 'Missing Values'] == 25
+    assert 'Missing Values by Region' in capsys.readouterr().out
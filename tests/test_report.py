@@ -0,0 +1,46 @@
+import json
+import os
+
+import pandas as pd
+
+from scripts import report
+from scripts.benchmark import synthetic
+from scripts.report import dataset_names
+
+
+def test_dataset_names_tell_same_named_files_apart():
+    assert dataset_names(['data/benin.csv', 'data/togo.csv']) == ['benin', 'togo']
+    assert dataset_names(['a/2021/benin.csv', 'b/2021/benin.csv', 'togo.csv']) == [
+        'a_2021_benin', 'b_2021_benin', 'togo']
+    assert dataset_names(['benin.csv', 'benin.csv']) == ['benin', 'benin_2']
+
+
+def test_cli_writes_report(tmp_path, capsys):
+    sources = []
+    for seed, directory in enumerate(['benin', 'togo']):
+        os.makedirs(tmp_path / directory)
+        source = tmp_path / directory / 'station.csv'
+        synthetic(3000, n_regions=2, seed=seed, nan_frac=0.01).to_csv(source, index=False)
+        sources.append(str(source))
+    output = tmp_path / 'reports'
+
+    status = report.main(sources + ['-o', str(output), '-w', '1', '--store-dir', str(tmp_path / 'store'),
+                                    '-a', 'summary_stats', 'missing_values', 'correlation', '--stats', 'parquet'])
+    assert status == 0
+    assert 'Throughput:' in capsys.readouterr().out
+
+    with open(output / 'report.json') as f:
+        result = json.load(f)
+    assert sorted((run['dataset'], run['analysis']) for run in result['runs']) == sorted(
+        (dataset, analysis) for dataset in ['benin_station', 'togo_station']
+        for analysis in ['summary_stats', 'missing_values', 'correlation'])
+    assert all(run['error'] is None and run['rows'] == 3000 for run in result['runs'])
+    assert [row['rows'] for row in result['throughput']] == [3000, 3000]
+
+    target = output / 'benin_station'
+    stats = pd.read_parquet(target / 'summary_stats.parquet')
+    assert stats.shape[1] > 10 and len(stats) == 2 * 8
+    assert (target / 'missing_values_1.parquet').exists() and (target / 'missing_values_2.parquet').exists()
+    assert (target / 'correlation_1.png').exists()
+    assert 'Summary Statistics for Benin' in (target / 'summary_stats.txt').read_text()
+    assert os.listdir(tmp_path / 'store')
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.ingest import prepare
+from scripts.resample import auto_freq, resample
+
+
+@pytest.fixture(scope='module')
+def df():
+    frame = prepare(synthetic(9000, n_regions=3, seed=7, nan_frac=0.05))
+    # Shuffled rows, so the (region, time) sort is exercised too
+    return frame.sample(frac=1, random_state=0)
+
+
+def _station(minutes, values):
+    # One region sampled at the given minutes
+    ts = pd.Timestamp('2021-08-09') + pd.to_timedelta(minutes, unit='min')
+    return pd.DataFrame({'Timestamp': ts, 'GHI': np.asarray(values, dtype=np.float32), 'Region': 'Benin'})
+
+
+@pytest.mark.parametrize('freq', ['15min', '1h', '1D'])
+def test_matches_pandas_resample(df, freq):
+    columns = ['GHI', 'Tamb', 'WS']
+    stats = ['mean', 'min', 'max', 'sum', 'count']
+    table = resample(df, freq, columns=columns, stats=stats, energy=())
+
+    grouped = df.groupby(['Region', pd.Grouper(key='Timestamp', freq=freq)], observed=True)[columns]
+    for stat in stats:
+        expected = grouped.agg(stat).astype(np.float64)
+        if stat == 'sum':
+            # pandas sums an all-NaN bucket to 0; resample leaves it missing
+            expected = expected.where(grouped.count() > 0)
+        result = table[stat].sort_index()
+        result.index = result.index.set_levels(result.index.levels[0].astype(str), level='Region')
+        expected.index = expected.index.set_levels(expected.index.levels[0].astype(str), level='Region')
+        pd.testing.assert_frame_equal(result, expected.sort_index(), check_names=False,
+                                      check_index_type=False, rtol=1e-6)
+
+
+def test_without_groups_matches_pandas(df):
+    table = resample(df, '1h', columns=['GHI'], energy=(), by=None)
+    expected = df.set_index('Timestamp')['GHI'].astype(np.float64).resample('1h').mean().dropna()
+    pd.testing.assert_series_equal(table[('mean', 'GHI')], expected, check_names=False, check_freq=False)
+
+
+def test_energy_integrates_full_bucket():
+    # Constant 60 W/m² for an hour of minute samples is 60 Wh/m²
+    table = resample(_station(np.arange(121), np.full(121, 60.0)), '1h', columns=['GHI'])
+    assert table[('energy', 'GHI')].tolist() == pytest.approx([60.0, 60.0, 0.0])
+    assert table[('coverage', '')].tolist() == pytest.approx([1.0, 1.0, 0.0])
+
+
+def test_energy_skips_gaps_and_clips_negatives():
+    minutes = np.r_[np.arange(10), np.arange(30, 61)]
+    values = np.full(len(minutes), 60.0)
+    values[-1] = -60.0
+    table = resample(_station(minutes, values), '1h', columns=['GHI'])
+    # The 21 minute gap is not bridged; the last interval ramps from 60 down to a clipped 0
+    assert table[('energy', 'GHI')].iloc[0] == pytest.approx((9 + 29) + 0.5)
+    assert table[('coverage', '')].iloc[0] == pytest.approx(39 / 60)
+
+    bridged = resample(_station(minutes, values), '1h', columns=['GHI'], max_gap='30min')
+    assert bridged[('energy', 'GHI')].iloc[0] == pytest.approx((9 + 21 + 29) + 0.5)
+
+
+def test_dense_keeps_empty_buckets():
+    minutes = np.r_[np.arange(60), np.arange(180, 240)]
+    sparse = resample(_station(minutes, np.arange(120)), '1h', columns=['GHI'], stats=['mean', 'count'])
+    dense = resample(_station(minutes, np.arange(120)), '1h', columns=['GHI'], stats=['mean', 'count'],
+                     dense=True)
+    assert len(sparse) == 2
+    assert dense.index.get_level_values('Timestamp').hour.tolist() == [0, 1, 2, 3]
+    assert dense[('count', 'GHI')].tolist() == [60, 0, 0, 60]
+    assert dense[('mean', 'GHI')].isna().tolist() == [False, True, True, False]
+    pd.testing.assert_frame_equal(dense.dropna(), sparse)
+
+
+def test_auto_freq_and_empty_input(df):
+    assert auto_freq('2021-08-09', '2021-08-10') == '1min'
+    assert auto_freq('2021-01-01', '2022-01-01') == '6h'
+    table = resample(df, 'auto', columns=['GHI'])
+    assert table.attrs['freq'] == auto_freq(df['Timestamp'].min(), df['Timestamp'].max())
+
+    empty = resample(df.iloc[:0], '1h', columns=['GHI'])
+    assert empty.empty and list(empty.columns) == [('mean', 'GHI'), ('energy', 'GHI'), ('coverage', '')]
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.sketches import DESCRIBE_STATS, QuantileSketch, RegionSummary, SketchSummary
+
+QS = np.linspace(0, 1, 21)
+
+
+def _rank_error(values, estimates, qs):
+    # Largest distance between the requested rank and the rank of the estimate
+    ordered = np.sort(values)
+    lo = np.searchsorted(ordered, estimates, side='left') / len(values)
+    hi = np.searchsorted(ordered, estimates, side='right') / len(values)
+    return np.max(np.maximum(0, np.maximum(lo - qs, qs - hi)))
+
+
+@pytest.mark.parametrize('values', [[1, 2, 3, 4], [5.0], [3, 1, 2], list(range(100, 0, -1))])
+def test_exact_sketch_matches_numpy(values):
+    sketch = QuantileSketch().update(values)
+    np.testing.assert_allclose(sketch.quantile(QS), np.quantile(values, QS))
+    assert sketch.median() == pd.Series(values).median()
+
+
+def test_nan_and_empty():
+    assert np.isnan(QuantileSketch().quantile(0.5))
+    assert np.isnan(QuantileSketch().quantile([0.25, 0.75])).all()
+    sketch = QuantileSketch().update([np.nan, 1.0, np.nan, 3.0])
+    assert len(sketch) == 2
+    assert sketch.median() == 2.0
+
+
+def test_rank_error_within_bound():
+    values = np.random.default_rng(0).lognormal(size=200_000)
+    sketch = QuantileSketch(k=400, seed=0).update(values, chunk_rows=10_000)
+    assert len(sketch) == len(values)
+    assert _rank_error(values, sketch.quantile(QS), QS) < 1.7 / 400 * 2
+    assert sum(len(items) for items in sketch.levels) < 4 * 400
+
+
+def test_merge_matches_union():
+    rng = np.random.default_rng(1)
+    parts = [rng.normal(loc, 1, 50_000) for loc in (0, 2, 5)]
+    merged = QuantileSketch(seed=0).update(parts[0])
+    for part in parts[1:]:
+        merged.merge(QuantileSketch(seed=0).update(part))
+    union = np.concatenate(parts)
+    assert len(merged) == len(union)
+    assert _rank_error(union, merged.quantile(QS), QS) < 1.7 / 400 * 2
+
+
+def test_merge_of_exact_sketches_is_exact():
+    merged = QuantileSketch().update([4, 1]).merge(QuantileSketch().update([3, 2]))
+    assert merged.median() == 2.5
+
+
+def test_summary_describe_matches_pandas():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'a': rng.normal(size=300), 'b': rng.uniform(size=300)})
+    df.loc[::7, 'a'] = np.nan
+    summary = SketchSummary(['a', 'b']).update(df.iloc[:100]).merge(SketchSummary(['a', 'b']).update(df.iloc[100:]))
+    result = summary.describe()
+    assert list(result.index) == DESCRIBE_STATS
+    pd.testing.assert_frame_equal(result, df.describe(), check_exact=False, rtol=1e-9)
+
+
+def test_region_summary_matches_groupby():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'Region': rng.choice(['Benin', 'Togo'], 250), 'GHI': rng.normal(size=250)})
+    result = RegionSummary(['GHI']).update(df, chunk_rows=60).describe()
+    expected = df.groupby('Region')['GHI'].describe()
+    for region in ['Benin', 'Togo']:
+        np.testing.assert_allclose(result.loc[region, 'GHI'].to_numpy(), expected.loc[region].to_numpy())
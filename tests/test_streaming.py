@@ -0,0 +1,57 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.benchmark import synthetic
+from scripts.data_proccess import data_cleaning
+from scripts.ingest import load_csv
+from scripts.streaming import FFILL_LIMIT, ForwardFill, clean_csv
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3, 5])
+def test_forward_fill_carries_across_chunks(chunk_rows):
+    # Gaps shorter than, equal to and longer than the limit, spanning several chunks
+    values = pd.DataFrame({
+        'x': [1.0, np.nan, np.nan, np.nan, np.nan, 2.0, np.nan, np.nan, np.nan, 3.0, np.nan,
+              np.nan, np.nan, np.nan, np.nan, np.nan, 4.0, np.nan],
+        'y': [np.nan, np.nan, 5.0, np.nan, 6.0, np.nan, np.nan, np.nan, np.nan, np.nan, 7.0,
+              np.nan, np.nan, 8.0, np.nan, np.nan, np.nan, np.nan],
+    })
+    ffill = ForwardFill()
+    chunked = pd.concat([ffill(values.iloc[i:i + chunk_rows]) for i in range(0, len(values), chunk_rows)])
+    pd.testing.assert_frame_equal(chunked, values.ffill(limit=FFILL_LIMIT))
+
+
+def test_forward_fill_of_synthetic_batches():
+    df = synthetic(2000, n_regions=1, seed=4, nan_frac=0.3)
+    ffill = ForwardFill()
+    sizes = np.random.default_rng(0).integers(1, 8, 600)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    chunked = pd.concat([ffill(df.iloc[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:]) if lo < len(df)])
+    pd.testing.assert_frame_equal(chunked, df.ffill(limit=FFILL_LIMIT))
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_clean_csv_matches_data_cleaning(tmp_path, output_format):
+    # One station, so timestamps are chronological and unique as clean_csv expects;
+    # a sketch larger than the input keeps the medians exact
+    source = tmp_path / 'station.csv'
+    synthetic(3000, n_regions=1, seed=3, nan_frac=0.05).to_csv(source, index=False)
+
+    streamed_path = tmp_path / f'streamed.{output_format}'
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = clean_csv(source, streamed_path, chunksize=700, output_format=output_format, sketch_k=8192)
+        expected = data_cleaning(load_csv(source), output_format=output_format,
+                                 output_path=tmp_path / f'expected.{output_format}')
+
+    if output_format == 'csv':
+        streamed = pd.read_csv(streamed_path, parse_dates=['Timestamp'])
+    else:
+        streamed = pd.read_parquet(streamed_path)
+    assert result['rows_in'] == 3000
+    assert result['rows_out'] == len(expected) == len(streamed)
+    pd.testing.assert_frame_equal(streamed.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False, rtol=1e-5)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.wind import SPEED_BINS, wind_histogram
+
+
+def _windrose_table(direction, speed, speed_bins, n_sectors):
+    # windrose.histogram (1.9): a 2D histogram over speed and direction where the
+    # sector straddling north is split at 0° and its two halves are added back together
+    angle = 360.0 / n_sectors
+    dir_bins = np.arange(-angle / 2, 360.0 + angle, angle, dtype=float)
+    dir_bins[0] = 0.0
+    var_bins = list(speed_bins) + [np.inf]
+    table = np.histogram2d(x=speed, y=direction, bins=[var_bins, dir_bins])[0]
+    table[:, 0] = table[:, 0] + table[:, -1]
+    table = table[:, :-1]
+    return table * 100 / table.sum()
+
+
+@pytest.fixture(scope='module')
+def wind():
+    rng = np.random.default_rng(11)
+    n = 20_000
+    df = pd.DataFrame({
+        'WD': np.round(rng.uniform(0, 360, n), 1),
+        'WS': np.round(rng.gamma(2.0, 3.0, n), 1),
+        'WDstdev': np.round(rng.uniform(0, 20, n), 1),
+    })
+    # Sector edges, north on both sides of 0°/360°, speed bin edges and the open top bin
+    edges = pd.DataFrame({
+        'WD': [0.0, 360.0, 359.9, 348.75, 11.25, 11.2, 22.5, 180.0, 90.0, 5.0, np.nan, 10.0],
+        'WS': [0.0, 5.0, 30.0, 34.9, 35.0, 120.0, 4.99, 29.99, np.nan, 2.0, 3.0, 25.0],
+        'WDstdev': [1.0, np.nan, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0],
+    })
+    return pd.concat([df, edges], ignore_index=True)
+
+
+@pytest.mark.parametrize('n_sectors', [16, 36])
+def test_speed_table_matches_windrose(wind, n_sectors):
+    _, speeds = wind_histogram(wind, n_sectors=n_sectors, speed_bins=SPEED_BINS)
+    valid = wind['WD'].notna() & wind['WS'].notna()
+    expected = _windrose_table(wind.loc[valid, 'WD'].to_numpy(), wind.loc[valid, 'WS'].to_numpy(),
+                               SPEED_BINS, n_sectors)
+    np.testing.assert_allclose(speeds.to_numpy(), expected.T, rtol=1e-12)
+    assert speeds.columns[-1] == '[30, inf)'
+    assert speeds['[30, inf)'].sum() > 0
+
+
+def test_sector_table_matches_groupby(wind):
+    n_sectors = 36
+    sectors, _ = wind_histogram(wind, n_sectors=n_sectors)
+    valid = wind.dropna(subset=['WD', 'WS'])
+    width = 360 / n_sectors
+    # Sector of each row via pd.cut on directions shifted by half a sector and wrapped past 360°
+    sector = pd.cut((valid['WD'] + width / 2) % 360, np.arange(0, 360 + width, width),
+                    right=False, labels=False)
+    grouped = valid.groupby(sector)
+    centres = pd.Index(np.arange(n_sectors) * width, name='Direction')
+    expected = pd.DataFrame({
+        'count': grouped.size(),
+        'mean_speed': grouped['WS'].mean(),
+        'mean_wdstdev': grouped['WDstdev'].mean(),
+    }).reindex(range(n_sectors)).set_axis(centres)
+    expected['count'] = expected['count'].fillna(0).astype(np.int64)
+
+    pd.testing.assert_frame_equal(sectors[['count', 'mean_speed', 'mean_wdstdev']], expected)
+    np.testing.assert_allclose(sectors['frequency'], expected['count'] / len(valid) * 100)
+
+
+def test_north_sector_wraps_around():
+    df = pd.DataFrame({'WD': [359.9, 360.0, 0.0, 4.9, 5.0], 'WS': [1.0, 2.0, 3.0, 40.0, 4.0]})
+    sectors, speeds = wind_histogram(df, n_sectors=36)
+    assert sectors['count'].to_dict() == {**dict.fromkeys(sectors.index, 0), 0.0: 4, 10.0: 1}
+    assert speeds.loc[0.0, '[30, inf)'] == pytest.approx(20.0)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import zscore
+
+from scripts.benchmark import synthetic
+from scripts.zscores import KEY_COLUMNS, column_mask, grouped_moments, outlier_counts, zscore_outliers
+
+
+def _frame(nan_frac, seed):
+    df = synthetic(9000, n_regions=3, seed=seed, nan_frac=nan_frac)
+    rng = np.random.default_rng(seed)
+    # Spikes well outside three standard deviations
+    for col in KEY_COLUMNS:
+        rows = rng.choice(len(df), 10, replace=False)
+        df.loc[rows, col] = df[col].mean() + rng.choice([-1, 1], 10) * 20 * df[col].std()
+    # A region with a single row, so its z-scores are 0/0
+    df.loc[len(df)] = df.iloc[0]
+    df.loc[len(df) - 1, 'Region'] = 'Ghana'
+    # Shuffled rows, so regions are interleaved
+    return df.sample(frac=1, random_state=0)
+
+
+@pytest.fixture(scope='module')
+def complete():
+    return _frame(nan_frac=0, seed=3)
+
+
+@pytest.fixture(scope='module')
+def gappy():
+    return _frame(nan_frac=0.05, seed=4)
+
+
+def _old_flags(df, nan_policy='propagate'):
+    # The z-score columns outliers() used to add to the frame, one groupby transform per column
+    return pd.DataFrame({
+        col: df.groupby('Region')[col].transform(lambda x: zscore(x, nan_policy=nan_policy)).abs() > 3
+        for col in KEY_COLUMNS
+    })
+
+
+def _flags_frame(flags, df):
+    return pd.DataFrame({col: column_mask(flags, KEY_COLUMNS, [col]) for col in KEY_COLUMNS}, index=df.index)
+
+
+def test_matches_scipy_per_region(complete):
+    flags = zscore_outliers(complete)
+    expected = _old_flags(complete)
+    pd.testing.assert_frame_equal(_flags_frame(flags, complete), expected)
+    assert expected.to_numpy().sum() > 0
+    pd.testing.assert_series_equal(outlier_counts(flags, KEY_COLUMNS), expected.sum(), check_names=False)
+
+
+def test_nan_is_skipped_not_propagated(gappy):
+    flags = zscore_outliers(gappy)
+    # scipy with NaN omitted from each group's moments; plain zscore would make every z-score NaN
+    pd.testing.assert_frame_equal(_flags_frame(flags, gappy), _old_flags(gappy, nan_policy='omit'))
+    assert not (_flags_frame(flags, gappy).to_numpy() & gappy[KEY_COLUMNS].isna().to_numpy()).any()
+
+
+def test_single_value_group_is_never_flagged(gappy):
+    flags = zscore_outliers(gappy)
+    single = (gappy['Region'] == 'Ghana').to_numpy()
+    assert single.sum() == 1 and flags[single].tolist() == [0]
+    # A zero std, not NaN, for the columns its one row has a value in
+    _, stds, labels = grouped_moments(gappy, KEY_COLUMNS)
+    present = gappy.loc[single, KEY_COLUMNS].notna().to_numpy()[0]
+    assert np.all(stds[labels.index('Ghana')][present] == 0)
+
+
+def test_rows_without_region_are_never_flagged(gappy):
+    df = gappy.copy()
+    df.loc[df.sample(50, random_state=2).index, 'Region'] = np.nan
+    flags = zscore_outliers(df)
+    assert not flags[df['Region'].isna().to_numpy()].any()
+
+
+def test_whole_frame_matches_pandas_std(gappy):
+    # data_cleaning's screen: (x - mean) / std over the whole frame, with pandas' ddof=1
+    flags = zscore_outliers(gappy, by=None, ddof=1)
+    expected = pd.DataFrame({col: ((gappy[col] - gappy[col].mean()) / gappy[col].std()).abs() > 3
+                             for col in KEY_COLUMNS})
+    pd.testing.assert_frame_equal(_flags_frame(flags, gappy), expected)
+
+
+def test_column_mask_and_bitset_width(complete):
+    flags = zscore_outliers(complete)
+    assert flags.dtype == np.uint8
+    expected = _old_flags(complete)[['GHI', 'DNI', 'DHI']].any(axis=1).to_numpy()
+    np.testing.assert_array_equal(column_mask(flags, KEY_COLUMNS, ['GHI', 'DNI', 'DHI']), expected)
+    assert zscore_outliers(complete, KEY_COLUMNS * 2).dtype == np.uint16
+    with pytest.raises(ValueError, match='At most 64 columns'):
+        zscore_outliers(complete, KEY_COLUMNS * 9)